@@ -43,6 +43,9 @@ class arbiterDecision(enum.Enum) :
   PROGRESS_ALLOWED    = 1
   WRONG_INPUT         = 2
 
+# Pitches considered by the arbiter (bit 'p' set for each pitch 'p' of the keyboard)
+ARBITER_PITCH_RANGE_MASK = ((1 << len(MIDI_CODE_GRAND_PIANO_RANGE)) - 1) << MIDI_CODE_LOWEST_KEY
+
 
 
 # =============================================================================
@@ -67,8 +70,14 @@ class Arbiter(widget.Widget) :
   - midiCurr        : state of all the notes on the MIDI keyboard
   - midiSustained   : '1' for all notes that were correct in the score, but have been 
                       sustained since then.
-  - midiSuperfluous : TODO
-  - midiAssociatedID: TODO
+  - midiSuperfluous : '1' for all notes that were played while not expected in 
+                      the score, and have been held since then.
+  - midiAssociatedID: ID of the note of the score validated by each sustained note.
+
+  The states are 128-bit masks (Python integers): bit 'p' holds the state of 
+  pitch 'p'. The decisions are made on all the pitches at once with bitwise 
+  operations, which keeps the cost of an evaluation low (it runs on every 
+  MIDI event).
 
 
   Mode of operation
@@ -84,11 +93,14 @@ class Arbiter(widget.Widget) :
 
     self.name = "arbiter"
 
+    # Nothing to draw
+    self.renderRects = []
+
     self.status = False
     
-    self.midiCurr         = [0 for _ in range(128)]
-    self.midiSustained    = [0 for _ in range(128)]
-    self.midiSuperfluous  = [0 for _ in range(128)]
+    self.midiCurr         = 0
+    self.midiSustained    = 0
+    self.midiSuperfluous  = 0
     self.midiAssociatedID = [-1 for _ in range(128)]
 
     self.arpeggioCurrentSectionID = -1
@@ -98,6 +110,7 @@ class Arbiter(widget.Widget) :
 
     self.suspended = False
     self.queryNotesPitch = []
+    self.queryNotesMask = 0
 
 
 
@@ -110,12 +123,13 @@ class Arbiter(widget.Widget) :
     """
     
     if (midiMessage.type == "note_on") :
-      self.midiCurr[midiMessage.note] = 1
+      self.midiCurr |= (1 << midiMessage.note)
 
     elif (midiMessage.type == "note_off") :
-      self.midiCurr[midiMessage.note] = 0
-      self.midiSustained[midiMessage.note] = 0
-      self.midiSuperfluous[midiMessage.note] = 0
+      clearMask = ~(1 << midiMessage.note)
+      self.midiCurr         &= clearMask
+      self.midiSustained    &= clearMask
+      self.midiSuperfluous  &= clearMask
       self.midiAssociatedID[midiMessage.note] = -1
 
     else :
@@ -131,7 +145,20 @@ class Arbiter(widget.Widget) :
     Returns True if notes are currently being played on the keyboard.
     """
     
-    return (max(self.midiCurr) == 1)
+    return (self.midiCurr != 0)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Arbiter.getMidiCurr()
+  # ---------------------------------------------------------------------------
+  def getMidiCurr(self) -> list[int] :
+    """
+    Returns the state of the notes on the keyboard as an array of 128 entries
+    (one per MIDI code) set to 1 for the notes currently pressed.
+    """
+
+    return [(self.midiCurr >> pitch) & 1 for pitch in range(128)]
 
 
 
@@ -148,6 +175,9 @@ class Arbiter(widget.Widget) :
 
     self.suspended = True
     self.queryNotesPitch = queryNotesPitch
+    self.queryNotesMask = 0
+    for pitch in queryNotesPitch :
+      self.queryNotesMask |= (1 << pitch)
 
     
 
@@ -184,73 +214,71 @@ class Arbiter(widget.Widget) :
     exceptions.
     """
 
-    # Read the teacher notes in the score
-    teacherNotes = self.top.widgets[WIDGET_ID_SCORE].getTeacherNotes()
-
-    # Reformat the teacher notes
-    # Filter out the sustained notes
-    teacherNotesAsMidiArray = [0 for _ in range(128)]
-    for noteObj in teacherNotes :
-      if ((noteObj.sustained == False) and (noteObj.inactive == False)) :
-        teacherNotesAsMidiArray[noteObj.pitch] = 1
+    # Read the teacher notes in the score: pitches to play (sustained and 
+    # inactive notes excluded) and ID of the note expected on each of them
+    (teacherMask, teacherIDs) = self.top.widgets[WIDGET_ID_SCORE].getTeacherPitchIDs()
+    teacherMask &= ARBITER_PITCH_RANGE_MASK
+    
+    curr = self.midiCurr & ARBITER_PITCH_RANGE_MASK
+    sustained = self.midiSustained
+    superfluous = self.midiSuperfluous
 
     # STRATEGY: PERMISSIVE
     # Progress in the score is allowed as long as the expected notes are pressed.
     # All the other notes are ignored and flagged as 'superfluous'.
     # 'Superfluous' notes need to be released and pressed again to be accepted later on.
-    allowProgress = True
     
-    # Cumulate the different statuses
-    ret = []; step = 0
+    # Case 1: a note in the score is not played
+    incomplete = teacherMask & ~curr & ~superfluous
+
+    # Case 2: a note in the score is played, but it was hit before (it wasn't expected then) and held since.
+    # Therefore, the played note cannot count.
+    staleExcess = teacherMask & curr & superfluous
+
+    # Case 3: a note in the score is played, but it was hit before (as requested by the score) and held since.
+    # Therefore, the played note cannot count.
+    #
+    # This case is detected as follows:
+    # Every time a note is valid, we bind its pitch to the unique ID of the note in the score, and
+    # the binding lasts for as long as the note is sustained on the keyboard.
+    # Later on when the score requires this note, if binding exists then the played note is rejected.
+    #
+    # The expected ID doesn't match the ID of the sustained note:
+    # The note being played on the keyboard right now is a previous valid note being sustained.
+    # It cannot be used to trigger a new note of the same pitch.
+    staleValid = 0
+    for pitch in getPitches(teacherMask & curr & sustained) :
+      if (self.midiAssociatedID[pitch] != teacherIDs[pitch]) :
+        staleValid |= (1 << pitch)
+
+    # Case 4: a wrong note is pressed.
+    # Since it is permissive, it does not block the progress.
+    # But it resets the combo counter and plays a notification.
+    excess = ~teacherMask & curr & ~sustained
+
+    allowProgress = ((incomplete | staleExcess | staleValid) == 0)
+
+    # Cumulate the different statuses.
+    # They are listed in the order of the lowest pitch that raised them.
+    statuses = [
+      (mask, status) for (mask, status) in [
+        (incomplete,  arbiterStatus.INCOMPLETE_INPUT),
+        (staleExcess, arbiterStatus.STALE_EXCESS_NOTE),
+        (staleValid,  arbiterStatus.STALE_VALID_NOTE),
+        (excess,      arbiterStatus.EXCESS_NOTE)
+      ] if mask
+    ]
+    if (len(statuses) > 1) :
+      statuses.sort(key = lambda x: x[0] & -x[0])
     
-    for pitch in MIDI_CODE_GRAND_PIANO_RANGE :
-
-      # Case 1: a note in the score is not played
-      if ((teacherNotesAsMidiArray[pitch] == 1) and (self.midiCurr[pitch] == 0) and (self.midiSuperfluous[pitch] == 0)) :
-        allowProgress = False
-        if not(arbiterStatus.INCOMPLETE_INPUT in ret) : ret.append(arbiterStatus.INCOMPLETE_INPUT)
+    ret = [status for (_, status) in statuses]
+    step = 0
 
-      # Case 2: a note in the score is played, but it was hit before (it wasn't expected then) and held since.
-      # Therefore, the played note cannot count.
-      if ((teacherNotesAsMidiArray[pitch] == 1) and (self.midiCurr[pitch] == 1) and (self.midiSuperfluous[pitch] == 1)) :
-        allowProgress = False
-        if not(arbiterStatus.STALE_EXCESS_NOTE in ret) : ret.append(arbiterStatus.STALE_EXCESS_NOTE)
-
-      # Case 3: a note in the score is played, but it was hit before (as requested by the score) and held since.
-      # Therefore, the played note cannot count.
-      #
-      # This case is detected as follows:
-      # Every time a note is valid, we bind its pitch to the unique ID of the note in the score, and
-      # the binding lasts for as long as the note is sustained on the keyboard.
-      # Later on when the score requires this note, if binding exists then the played note is rejected.
-      if ((teacherNotesAsMidiArray[pitch] == 1) and (self.midiCurr[pitch] == 1) and (self.midiSustained[pitch] == 1)) :
-        
-        # Read the ID of the current note
-        expectedIDs = [x.id for x in teacherNotes if ((x.pitch == pitch) and (x.sustained == False) and (x.inactive == False))]
-        
-        # The expected ID doesn't match the ID of the sustained note:
-        # The note being played on the keyboard right now is a previous valid note being sustained.
-        # It cannot be used to trigger a new note of the same pitch.
-        if not(self.midiAssociatedID[pitch] in expectedIDs) :
-          allowProgress = False
-          if not(arbiterStatus.STALE_VALID_NOTE in ret) : ret.append(arbiterStatus.STALE_VALID_NOTE)
-        
-      # Case 4: a wrong note is pressed.
-      # Since it is permissive, it does not block the progress.
-      # But it resets the combo counter and plays a notification.
-      if ((teacherNotesAsMidiArray[pitch] == 0) and (self.midiCurr[pitch] == 1) and (self.midiSustained[pitch] == 0)) :
-        if not(arbiterStatus.EXCESS_NOTE in ret) : ret.append(arbiterStatus.EXCESS_NOTE)
-              
     # Case 6: progress is on hold because the "note finding" feature is active.
     # The current notes pressed are 'query' notes and all of them 
     # must be released before reenabling the arbiter.
     if (self.suspended) :
-      allDown = True
-      for x in self.queryNotesPitch :
-        if (self.midiCurr[x] == 1) :
-          allDown = False
-
-      if allDown :
+      if ((self.midiCurr & self.queryNotesMask) == 0) :
         self.suspended = False
       else :
         allowProgress = False
@@ -260,30 +288,19 @@ class Arbiter(widget.Widget) :
     # CONCLUSION
     if allowProgress :
       
-      # Update note status
-      for pitch in MIDI_CODE_GRAND_PIANO_RANGE :
-        
-        # Flag the notes played in 'excess'
-        if ((teacherNotesAsMidiArray[pitch] == 0) and (self.midiCurr[pitch] == 1)) :
-          self.midiSuperfluous[pitch] = 1
+      # Flag the notes played in 'excess'
+      self.midiSuperfluous |= ~teacherMask & curr
+
+      # Flag the sustained notes
+      # Any note that was valid becomes flagged as 'sustained' for as long as it's held.
+      # The ID of the associated teacher note is stored in an array,
+      # so that this keypress cannot validate another note of the same pitch later on.
+      valid = teacherMask & curr
+      self.midiSustained |= valid
+      for pitch in getPitches(valid) :
+        self.midiAssociatedID[pitch] = teacherIDs[pitch]
 
-        # Flag the sustained notes
-        # Any note that was valid becomes flagged as 'sustained' for as long as it's held.
-        # The ID of the associated teacher note is stored in an array,
-        # so that this keypress cannot validate another note of the same pitch later on.
-        if ((teacherNotesAsMidiArray[pitch] == 1) and (self.midiCurr[pitch] == 1)) :
-          self.midiSustained[pitch] = 1
-          
-          # Get the ID of the correct note
-          # TODO: is it really always the first one that needs to be taken?
-          q = [x for x in teacherNotes if (x.pitch == pitch)]
-          self.midiAssociatedID[pitch] = q[0].id
-
-
-      if not(arbiterStatus.VALID_INPUT in ret) : ret.append(arbiterStatus.VALID_INPUT)
-
-
-    if arbiterStatus.VALID_INPUT in ret :
+      ret.append(arbiterStatus.VALID_INPUT)
       step = 1
     
     return (ret, step)
@@ -321,17 +338,15 @@ class Arbiter(widget.Widget) :
     # TODO: notes held after entering this section cannot be taken into account.
     #       They have to be released first.
 
-    for pitch in MIDI_CODE_GRAND_PIANO_RANGE :
+    for pitch in getPitches(self.midiCurr & ARBITER_PITCH_RANGE_MASK) :
 
-      if (self.midiCurr[pitch] == 1) :
-        
-        # The user pressed a note that is not expected in the arpeggio section
-        if not(pitch in self.arpeggioExpectedPitches) :
-          if not(arbiterStatus.EXCESS_NOTE in ret) : ret.append(arbiterStatus.EXCESS_NOTE)
-        
-        else :
-          if not(pitch in self.arpeggioPitchesBuffer) :
-            self.arpeggioPitchesBuffer.append(pitch)
+      # The user pressed a note that is not expected in the arpeggio section
+      if not(pitch in self.arpeggioExpectedPitches) :
+        if not(arbiterStatus.EXCESS_NOTE in ret) : ret.append(arbiterStatus.EXCESS_NOTE)
+      
+      else :
+        if not(pitch in self.arpeggioPitchesBuffer) :
+          self.arpeggioPitchesBuffer.append(pitch)
             
     if (len(self.arpeggioPitchesBuffer) == len(self.arpeggioExpectedPitches)) :
       ret.append(arbiterStatus.VALID_INPUT)
@@ -396,6 +411,28 @@ class Arbiter(widget.Widget) :
 
 
 
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# FUNCTION getPitches()
+# -----------------------------------------------------------------------------
+def getPitches(mask: int) -> list[int] :
+  """
+  Returns the pitches set in a 128-bit mask, in increasing order.
+  """
+
+  pitches = []
+  while mask :
+    lowest = mask & -mask
+    pitches.append(lowest.bit_length() - 1)
+    mask ^= lowest
+
+  return pitches
+
+
+
 # =============================================================================
 # Unit tests
 # =============================================================================
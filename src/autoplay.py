@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : autoplay
+# File name     : autoplay.py
+# File type     : Python script (Python 3)
+# Purpose       : plays the score on the MIDI output (timer thread)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# The autoplay plays the score from a given cursor: the notes are sent to the
+# MIDI output at the time given by the tempo map of the score (see
+# 'tempoMap.py'), and the cursor follows the music.
+#
+# The main loop runs at 60 FPS: scheduling the notes there would give them a
+# jitter of up to a frame (~17 ms), which can be heard.
+# Instead, the events are scheduled by a dedicated thread:
+# - the schedule (note on/off, cursor updates) is computed once, when the
+#   autoplay starts
+# - the thread sleeps until the next event is close (AUTOPLAY_SPIN_SEC),
+#   then polls the high resolution clock ('time.perf_counter_ns()') for the
+#   remaining time. The sleep alone is not accurate enough (granularity of
+#   the OS scheduler).
+#
+# The thread does not modify the Score: it publishes the cursor reached
+# ('AutoPlayer.cursor') and the main loop moves the Score cursor at the next
+# frame (see 'Sequencer.autoPlayUpdate()').
+#
+# The tempo can be scaled while playing ('AutoPlayer.setTempoScale()'): the
+# time reference is moved to the current position so that the music carries
+# on from there at the new speed.
+#
+# The time reference is a tuple (wall clock, position in the score, tempo
+# scale): it is replaced at once, the assignment of an attribute being atomic in Python no
+# lock is needed.
+#
+# NOTE: the thread has to get the GIL back in time when an event is due.
+# The main loop spends most of its time waiting for the next frame (GIL 
+# released, see 'frameScheduler.py'), and the spin releases the GIL at each
+# turn: the switch interval of the interpreter is left untouched.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import mido
+import numpy as np
+import threading
+import time
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# Types of the scheduled events, by order of processing when they occur at the
+# same time (a note repeated is released before being pressed again)
+AUTOPLAY_EVENT_NOTE_OFF = 0
+AUTOPLAY_EVENT_NOTE_ON  = 1
+AUTOPLAY_EVENT_CURSOR   = 2
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class AutoPlayer :
+
+  """
+  AUTO_PLAYER object
+
+  Plays a Score on the MIDI output from a timer thread.
+
+  'sendFunction' is called with each MIDI message (mido.Message) to send.
+  It is called from the timer thread.
+
+  Mode of operation (from the main loop):
+  - 'AutoPlayer.start()' to start playing from a cursor
+  - read 'AutoPlayer.cursor' at each frame
+  - 'AutoPlayer.stop()' to stop. The thread stops on its own at the end of
+    the score ('AutoPlayer.finished' is set)
+  """
+
+  def __init__(self, sendFunction) :
+
+    self.sendFunction = sendFunction
+    self.tempoScale   = 1.0
+
+    self.cursor   = -1          # Last cursor reached (written by the thread only)
+    self.finished = False
+    self.events   = []          # Schedule: (time in seconds, type, data1, data2)
+
+    self._thread    = None
+    self._running   = False
+    self._wake      = threading.Event()   # Interrupts the sleep of the thread (stop, tempo change)
+    self._reference = (0, 0.0, 1.0)       # Time reference: (wall clock in ns, position in the score in seconds, tempo scale)
+    self._held      = [0 for _ in range(128)]
+
+    # Counters (written by the thread only)
+    self.eventCount = 0
+    self.jitterSum  = 0
+    self.jitterMax  = 0
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer.start()
+  # ---------------------------------------------------------------------------
+  def start(self, scoreObj, cursor: int) -> bool :
+    """
+    Starts playing the score from a cursor.
+    Returns False if there is nothing to play.
+    """
+
+    self.stop()
+
+    timecodes = scoreObj.noteOnTimecodes["LR"]
+    if not(0 <= cursor < len(timecodes)) :
+      return False
+
+    self.events = self._getSchedule(scoreObj, cursor)
+    self.cursor = cursor
+    self.finished = False
+    self.eventCount = 0
+    self.jitterSum = 0
+    self.jitterMax = 0
+
+    self._held = [0 for _ in range(128)]
+    self._running = True
+    self._wake.clear()
+
+    self._thread = threading.Thread(target = self._run, name = "autoplay", daemon = True)
+    self._thread.start()
+    return True
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer.stop()
+  # ---------------------------------------------------------------------------
+  def stop(self) -> None :
+    """
+    Stops playing. The notes still held are released.
+    """
+
+    if self._thread is None :
+      return
+
+    self._running = False
+    self._wake.set()
+    self._thread.join()
+    self._thread = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer.isRunning()
+  # ---------------------------------------------------------------------------
+  def isRunning(self) -> bool :
+    """
+    Returns True while the score is being played.
+    """
+
+    return (self._thread is not None) and not(self.finished)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer.setTempoScale()
+  # ---------------------------------------------------------------------------
+  def setTempoScale(self, scale: float) -> None :
+    """
+    Sets the tempo scaling factor (1.0: tempo of the score, 0.5: half speed)
+    Can be called while playing.
+    """
+
+    scale = min(max(scale, AUTOPLAY_TEMPO_SCALE_MIN), AUTOPLAY_TEMPO_SCALE_MAX)
+
+    # Move the time reference to the current position first
+    now = time.perf_counter_ns()
+    (wallRef, scoreRef, scaleRef) = self._reference
+    self._reference = (now, scoreRef + 1e-9*(now - wallRef)*scaleRef, scale)
+    self.tempoScale = scale
+
+    self._wake.set()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer.getCounters()
+  # ---------------------------------------------------------------------------
+  def getCounters(self) -> dict :
+    """
+    Returns the counters of the last playback: number of events sent and
+    scheduling jitter (delay between the due time of the events and the
+    time they were sent, in seconds)
+    """
+
+    return {
+      "events"      : self.eventCount,
+      "jitterMean"  : 1e-9*self.jitterSum/self.eventCount if (self.eventCount > 0) else 0.0,
+      "jitterMax"   : 1e-9*self.jitterMax
+    }
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer._getSchedule()                                  [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getSchedule(self, scoreObj, cursor: int) -> list :
+    """
+    Returns the list of the events to play from a cursor, sorted by time.
+    Times are in seconds, relative to the cursor.
+    """
+
+    timecodes = scoreObj.noteOnTimecodes["LR"]
+    store = scoreObj.noteStore
+    tickStart = timecodes[cursor]
+
+    # Notes pressed from the cursor on
+    sel = (store.startTime >= tickStart)
+    pitch     = store.pitch[sel].astype(np.int64)
+    velocity  = store.velocity[sel].astype(np.int64)
+    velocity[velocity <= 0] = AUTOPLAY_DEFAULT_VELOCITY
+    noteOn    = store.startTime[sel]
+    noteOff   = np.maximum(store.stopTime[sel], noteOn + 1)
+
+    cursorTicks = np.asarray(timecodes[cursor:], dtype = np.int64)
+    n = len(pitch); m = len(cursorTicks)
+
+    ticks = np.concatenate([noteOff, noteOn, cursorTicks])
+    types = np.concatenate([np.full(n, AUTOPLAY_EVENT_NOTE_OFF), np.full(n, AUTOPLAY_EVENT_NOTE_ON), np.full(m, AUTOPLAY_EVENT_CURSOR)])
+    data1 = np.concatenate([pitch, pitch, np.arange(cursor, cursor + m)])
+    data2 = np.concatenate([np.zeros(n, dtype = np.int64), velocity, np.zeros(m, dtype = np.int64)])
+
+    seconds = scoreObj.tempoMap.toSeconds(ticks) - scoreObj.tempoMap.toSeconds(tickStart)
+    order = np.lexsort((types, seconds))
+
+    return list(zip(seconds[order].tolist(), types[order].tolist(), data1[order].tolist(), data2[order].tolist()))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer._getDueTime()                                   [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getDueTime(self, seconds: float) -> int :
+    """
+    Returns the wall clock time (ns, 'time.perf_counter_ns()') at which a
+    position in the score (seconds) is reached with the current tempo.
+    """
+
+    (wallRef, scoreRef, scaleRef) = self._reference
+    return wallRef + int(1e9*(seconds - scoreRef)/scaleRef)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer._waitUntil()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _waitUntil(self, seconds: float) -> bool :
+    """
+    Waits until a position in the score (seconds) is reached.
+    Returns False if the autoplay was stopped in the meantime.
+
+    The due time is recomputed after each sleep: the tempo might have changed.
+    """
+
+    spinNs = int(1e9*AUTOPLAY_SPIN_SEC)
+    while self._running :
+      remaining = self._getDueTime(seconds) - time.perf_counter_ns()
+      if (remaining <= 0) :
+        return True
+
+      if (remaining > spinNs) :
+        self._wake.wait(min(1e-9*(remaining - spinNs), AUTOPLAY_SLEEP_MAX_SEC))
+        self._wake.clear()
+
+      # Spin: the GIL is released at each turn for the other threads
+      else :
+        time.sleep(0)
+
+    return False
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD AutoPlayer._run()                                          [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _run(self) -> None :
+    """
+    Main function of the timer thread: sends the events of the schedule on
+    time.
+    """
+
+    # The clock starts once the thread is up: the first events are not late
+    self._reference = (time.perf_counter_ns(), 0.0, self.tempoScale)
+
+    for (seconds, eventType, data1, data2) in self.events :
+      if not(self._waitUntil(seconds)) :
+        break
+
+      jitter = time.perf_counter_ns() - self._getDueTime(seconds)
+
+      if (eventType == AUTOPLAY_EVENT_CURSOR) :
+        self.cursor = data1
+
+      # A note pressed again before being released is not released by the
+      # note off of its previous occurrence
+      elif (eventType == AUTOPLAY_EVENT_NOTE_ON) :
+        self._held[data1] += 1
+        self.sendFunction(mido.Message("note_on", note = data1, velocity = data2))
+
+      else :
+        self._held[data1] -= 1
+        if (self._held[data1] == 0) :
+          self.sendFunction(mido.Message("note_off", note = data1, velocity = 0))
+
+      self.eventCount += 1
+      self.jitterSum += jitter
+      self.jitterMax = max(self.jitterMax, jitter)
+
+    # Release the notes still held (autoplay stopped)
+    for pitch in range(128) :
+      if (self._held[pitch] > 0) :
+        self.sendFunction(mido.Message("note_off", note = pitch, velocity = 0))
+        self._held[pitch] = 0
+
+    self.finished = True
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'autoplay.py'")
@@ -40,6 +40,15 @@ GUI_SCREEN_WIDTH = 1320
 GUI_SCREEN_HEIGHT = 500
 GUI_FPS = 60
 
+# Dirty rectangles rendering (see 'GangQin.run()'): the whole screen is redrawn
+# when the areas to redraw cover more than this ratio of the screen.
+GUI_DIRTY_AREA_MAX = 0.6
+
+# Frame scheduler (see 'frameScheduler.py'): frame rate when nothing happens,
+# and time the full rate is kept after the last activity.
+FRAME_SCHEDULER_IDLE_FPS = 4
+FRAME_SCHEDULER_HOLD_SEC = 0.5
+
 # GUI COLOR THEME
 GUI_BACKGROUND_COLOR  = (18, 67, 60)
 GUI_TEXT_COLOR        = (40, 147, 131)
@@ -87,6 +96,15 @@ SCORE_ACTIVE_HANDS_LEFT  = "L "
 SCORE_ACTIVE_HANDS_RIGHT = " R"
 SCORE_ACTIVE_HANDS_BOTH  = "LR"
 
+# Maximum number of cursors shown ahead of the current one (lookahead feature)
+LOOKAHEAD_DISTANCE_MAX = 8
+
+# PASSAGE SEARCH SETTINGS
+# - tolerance: number of missing/extra notes allowed over the whole passage
+# - transpose: when True, the passage is also searched in all transpositions
+SEARCH_PASSAGE_TOLERANCE = 1
+SEARCH_PASSAGE_TRANSPOSE = False
+
 # PIANO ROLL SETTINGS (do not edit)
 # Defines (roughly) the number of notes to be displayed ahead from the current cursor 
 # in the piano roll
@@ -108,6 +126,36 @@ MIDI_CODE_GRAND_PIANO_RANGE = range(MIDI_CODE_LOWEST_KEY, MIDI_CODE_HIGHEST_KEY
 MIDI_CODE_WHITE_NOTES_MOD12 = [0, 2, 4, 5, 7, 9, 11]
 MIDI_CODE_BLACK_NOTES_MOD12 = [1, 3, 6, 8, 10]
 
+# Number of MIDI input events buffered between 2 frames (see 'midiQueue.py')
+MIDI_QUEUE_CAPACITY = 1024
+
+# Autoplay (see 'autoplay.py')
+# The timer thread sleeps until the next event is close, then polls the 
+# clock for the remaining time (spin).
+AUTOPLAY_SPIN_SEC = 0.001
+AUTOPLAY_SLEEP_MAX_SEC = 0.02
+AUTOPLAY_DEFAULT_VELOCITY = 80
+AUTOPLAY_TEMPO_SCALE_STEP = 0.1
+AUTOPLAY_TEMPO_SCALE_MIN = 0.1
+AUTOPLAY_TEMPO_SCALE_MAX = 4.0
+
+# MIDI out playback (see 'voiceManager.py')
+# The note offs due within the same tick are sent together.
+PLAYBACK_MAX_VOICES = 24
+PLAYBACK_TICK_SEC = 0.002
+PLAYBACK_NOTE_DURATION_MIN_SEC = 0.05
+PLAYBACK_NOTE_DURATION_MAX_SEC = 8.0
+
+# Software synthesizer, used for the playback when no MIDI output port can 
+# be opened (see 'synth.py')
+SYNTH_ENABLE = True
+SYNTH_SAMPLE_RATE = 44100
+SYNTH_BLOCK_SIZE = 256
+SYNTH_MAX_VOICES = 32
+SYNTH_GAIN = 0.25
+SYNTH_NOTE_LENGTH_SEC = 3.0
+SYNTH_RELEASE_SEC = 0.2
+
 # NOTES PROPERTIES
 #NOTE_WHITE_KEY = 0                               # DEPRECATED, USE 'keyColor_T.WHITE_KEY' INSTEAD
 #NOTE_BLACK_KEY = 1                               # DEPRECATED, USE 'keyColor_T.BLACK_KEY' INSTEAD
@@ -152,9 +200,28 @@ MOUSE_SCROLL_DOWN = 5
 SONG_PATH = "./songs"
 
 # Backup feature (autosave)
+# The current state is saved periodically when there are unsaved changes (0: disabled)
 AUTOSAVE_INTERVAL_SEC = 90
 AUTOSAVE_BACKUP_PATH = "./backup"
 
+# Binary cache of the .gq3 files (speeds up the loading of large scores)
+# The cache is a sidecar file, it can be deleted at any time.
+GQ3_CACHE_ENABLE = True
+GQ3_CACHE_EXTENSION = ".gq3c"
+
+# Journal of the edits made to the .gq3 files (see 'gq3Journal.py')
+# The journal is merged into the .gq3 (compaction) on demand (CTRL + S) or 
+# when the app is idle and the journal holds enough records.
+GQ3_JOURNAL_EXTENSION = ".gq3j"
+GQ3_JOURNAL_COMPACTION_RECORDS = 200
+GQ3_JOURNAL_COMPACTION_IDLE_SEC = 60
+
+# Session recorder: the MIDI input of each session is recorded in a binary
+# file (see 'sessionRecorder.py')
+SESSION_RECORDER_ENABLE = True
+SESSION_RECORDER_PATH = "./logs/sessions"
+SESSION_RECORDER_EXTENSION = ".gqrec"
+
 # Define if the staffscope is displayed by default at startup
 STAFFSCOPE_DEFAULT_VISIBILITY = True
 
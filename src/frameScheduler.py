@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : frameScheduler
+# File name     : frameScheduler.py
+# File type     : Python script (Python 3)
+# Purpose       : paces the frames of the main loop (event driven, adaptive FPS)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# The main loop used to run at GUI_FPS all the time ('clock.tick()'), even
+# with nothing happening.
+# The scheduler decides when the next frame starts:
+# - as soon as there is something to process: a pygame event (keyboard,
+#   mouse, timer of the metronome...) or a MIDI input event. The MIDI thread
+#   wakes the main loop up by posting an event ('FrameScheduler.wake()')
+# - at full rate (GUI_FPS) while something is animating (e.g. the autoplay
+#   moving the cursor) and for a short while after the last activity
+#   (FRAME_SCHEDULER_HOLD_SEC)
+# - otherwise at the idle rate (FRAME_SCHEDULER_IDLE_FPS), or earlier if a
+#   widget asked for it (see 'Widget.getUpdateDelay()')
+#
+# The frames are never closer than the full rate period: an event arriving
+# right after a frame waits for the next period, like it did with the fixed
+# rate loop. An event arriving later (idle app) is processed at once: the
+# latency is never worse than with the fixed rate loop.
+#
+# The wait is done in 'pygame.event.wait()': the thread sleeps in SDL until
+# an event comes or the timeout expires.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import pygame
+import time
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# None.
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class FrameScheduler :
+
+  """
+  FRAME_SCHEDULER object
+
+  Paces the frames of the main loop.
+
+  Mode of operation (main loop):
+  - 'FrameScheduler.wait()' at the beginning of each frame: returns the pygame
+    events to process
+  - 'FrameScheduler.wake()' from any thread to start a frame as soon as
+    possible (MIDI input)
+
+  The pygame event type used for the wake-ups ('FrameScheduler.wakeEventType')
+  must be allowed ('pygame.event.set_allowed()').
+  """
+
+  def __init__(self, fps = GUI_FPS, idleFps = FRAME_SCHEDULER_IDLE_FPS) :
+
+    self.framePeriod  = 1.0/fps
+    self.idlePeriod   = 1.0/idleFps
+
+    self.wakeEventType = pygame.event.custom_type()
+
+    self.frameTime    = 0.0       # Start of the last frame ('time.perf_counter()')
+    self.activityTime = 0.0       # Last frame with some activity
+    self._wakePending = False     # A wake-up event is in the pygame queue
+
+    # Counters
+    self.frameCount = 0
+    self.idleCount  = 0           # Frames started at the idle rate
+    self.wakeCount  = 0           # Wake-ups posted by the other threads
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD FrameScheduler.wake()
+  # ---------------------------------------------------------------------------
+  def wake(self) -> None :
+    """
+    Requests a frame as soon as possible.
+    Can be called from any thread.
+    """
+
+    # NOTE: a single wake-up event is queued at a time. The flag is cleared
+    # by the main loop once it has read the pygame queue, before it processes
+    # the MIDI events: a request coming afterwards posts a new event.
+    if not(self._wakePending) :
+      self._wakePending = True
+      self.wakeCount += 1
+      pygame.event.post(pygame.event.Event(self.wakeEventType))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD FrameScheduler.wait()
+  # ---------------------------------------------------------------------------
+  def wait(self, active: bool, timeout = None) -> list :
+    """
+    Waits for the next frame and returns the pygame events received (wake-up
+    events excluded).
+
+    'active' tells if something happened during the last frame (input,
+    display update). 'timeout' is the time (seconds) after which the widgets
+    need the next frame (0: animating, None: nothing planned)
+    """
+
+    now = time.perf_counter()
+    if active :
+      self.activityTime = now
+
+    # Not faster than the full rate
+    minTime = self.frameTime + self.framePeriod
+    if (now < minTime) :
+      pygame.time.wait(int(1000*(minTime - now)))
+
+    # Full rate (animation, recent activity) or idle rate
+    isIdle = (((now - self.activityTime) > FRAME_SCHEDULER_HOLD_SEC) and ((timeout is None) or (timeout > 0)))
+    if isIdle :
+      deadline = self.frameTime + self.idlePeriod
+      if timeout is not None :
+        deadline = min(deadline, now + timeout)
+    else :
+      deadline = minTime
+
+    events = []
+    waitMs = int(1000*(deadline - time.perf_counter()))
+    if (waitMs > 0) :
+      event = pygame.event.wait(waitMs)
+      if (event.type != pygame.NOEVENT) :
+        events.append(event)
+
+    # NOTE: the flag is cleared after reading the queue. Cleared before, a 
+    # wake-up posted in between would be read here with the flag left set, 
+    # and the next wake-ups would not be posted.
+    events += pygame.event.get()
+    self._wakePending = False
+
+    self.frameTime = time.perf_counter()
+    self.frameCount += 1
+    if (isIdle and not(events)) :
+      self.idleCount += 1
+
+    return [event for event in events if (event.type != self.wakeEventType)]
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'frameScheduler.py'")
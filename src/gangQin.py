@@ -36,6 +36,11 @@ import src.widgets.stats as stats
 # Utilities
 import arbiter
 import score
+import src.frameScheduler as frameScheduler
+import src.latency as latency
+import src.midiQueue as midiQueue
+import src.sessionRecorder as sessionRecorder
+import src.synth as synth
 import threading
 
 # MIDI
@@ -86,7 +91,7 @@ class GangQin :
     self.screen       = pygame.display.set_mode((GUI_SCREEN_WIDTH, GUI_SCREEN_HEIGHT))
     self.screenWidth  = self.screen.get_size()[0]
     self.screenHeight = self.screen.get_size()[1]
-    self.clock        = pygame.time.Clock()
+    self.scheduler    = frameScheduler.FrameScheduler()
     
     # Enable key repeats (250 ms delay before repeat, repeat every 50 ms)
     pygame.key.set_repeat(250, 50)
@@ -95,14 +100,21 @@ class GangQin :
     self.running = False
     self.midiInPort           = None
     self.midiOutPort          = None
+    self.midiOutLock          = threading.Lock()    # Serialises the sends (autoplay and playback threads)
     self.midiTranspose        = 0         # Indicates the transpose state of the input keyboard, so that the app adapts to it.
+    self.midiQueue            = midiQueue.MidiQueue()   # MIDI input events waiting to be processed by the main loop
+    self.latency              = latency.LatencyMonitor()
+    self.recorder             = sessionRecorder.SessionRecorder()
 
     # Limit the supported key events to avoid unnecessary processing
     pygame.event.set_allowed([
       pygame.KEYDOWN,
       pygame.KEYUP,
       pygame.MOUSEBUTTONDOWN,
-      pygame.QUIT
+      pygame.MOUSEMOTION,
+      pygame.QUIT,
+      pygame.WINDOWEXPOSED,
+      self.scheduler.wakeEventType
     ])
 
     # Create the widgets
@@ -119,6 +131,9 @@ class GangQin :
       WIDGET_ID_PROGRESS_BAR    : progressBar.ProgressBar(self),
       WIDGET_ID_PLAYBACK        : playback.Playback(self)
     }
+
+    # Timer of the metronome
+    pygame.event.set_allowed(self.widgets[WIDGET_ID_METRONOME].METRONOME_TASK)
     
 
 
@@ -172,6 +187,10 @@ class GangQin :
     # Initialise the selected MIDI interface (if any)
     self._midiInterfaceInit(selectedDevice)
 
+    # Record what is played during the session
+    if (self.midiInPort is not None) :
+      self.recorder.start(selectedFile)
+
 
 
   # ---------------------------------------------------------------------------
@@ -181,42 +200,129 @@ class GangQin :
     
     # Start app
     self.appRunning = True
+    fullRedraw = True
+    active = True
+    delay = 0
 
     # Main execution loop.
     # Loop exits when the application is done
     while self.appRunning :
       
-      # Fill background screen
-      self.screen.blit(self.background, (0, 0))
-    
+      # Wait for the next frame (see 'frameScheduler.py')
+      events = self.scheduler.wait(active, delay)
+      active = (len(events) > 0)
+
       # 'main' app event catching
-      for event in pygame.event.get() :
+      for event in events :
         if (event.type == pygame.KEYDOWN) :
           if (event.key == pygame.K_q) :
             self._onExit()
           elif (event.key == pygame.K_s) :
-            self.widgets[WIDGET_ID_SCORE].save()
+            if (event.mod & pygame.KMOD_CTRL) :
+              self.widgets[WIDGET_ID_SCORE].compact()
+            else :
+              self.widgets[WIDGET_ID_SCORE].save()
+          elif (event.key == pygame.K_F12) :
+            self.latency.toggleOverlay()
         elif (event.type == pygame.QUIT) :
           self._onExit()
+        elif (event.type == pygame.WINDOWEXPOSED) :
+          fullRedraw = True
 
         # Pass keyboard/mouse messages to the widgets
         for widget in self.widgets.values() :
           widget.uiEvent(event)
 
-      # Render widgets
+      # Process the MIDI events received since the last frame
+      if (self._midiInputProcess() > 0) :
+        active = True
+
+      # Follow the autoplay (see 'autoplay.py')
+      self.widgets[WIDGET_ID_SEQUENCER].autoPlayUpdate()
+
+      # Periodic tasks of the widgets
       for widget in self.widgets.values() :
-        widget.render()
+        widget.update()
 
-      self.clock.tick(GUI_FPS)
+      # Write the recording of the session (see 'sessionRecorder.py')
+      self.recorder.update()
 
-      # Update the display
-      pygame.display.flip()
+      # Render widgets (only what changed)
+      if self.renderFrame(fullRedraw) :
+        self.latency.onFrameDisplayed()
+      fullRedraw = False
+
+      # Next frame needed by the widgets (animation, timers)
+      delays = [widget.getUpdateDelay() for widget in self.widgets.values()] + [self.latency.getUpdateDelay()]
+      delays = [d for d in delays if (d is not None)]
+      delay = min(delays) if delays else None
 
     # Quit Pygame
     self._onExit()
 
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD: GangQin.renderFrame()
+  # ---------------------------------------------------------------------------
+  def renderFrame(self, fullRedraw = False) -> bool :
+    """
+    Redraws the areas of the screen invalidated by the widgets since the last
+    frame and updates the display with these areas only.
+    Nothing is drawn when nothing changed (idle app).
+
+    The whole screen is redrawn when the areas cover most of it 
+    (GUI_DIRTY_AREA_MAX) or if 'fullRedraw' is True.
+
+    Returns True if the display was updated.
+    """
+
+    dirtyRects = []
+    for widget in self.widgets.values() :
+      dirtyRects += widget.getDirtyRects()
+    dirtyRects += self.latency.getDirtyRects()
+
+    # Merge the areas that overlap: they are drawn at once
+    mergedRects = []
+    for rect in dirtyRects :
+      i = rect.collidelist(mergedRects)
+      while (i != -1) :
+        rect = rect.union(mergedRects.pop(i))
+        i = rect.collidelist(mergedRects)
+      mergedRects.append(rect)
+
+    dirtyArea = sum(rect.width*rect.height for rect in mergedRects)
+    if (dirtyArea > (GUI_DIRTY_AREA_MAX*self.screenWidth*self.screenHeight)) :
+      fullRedraw = True
+
+    if fullRedraw :
+      self.screen.blit(self.background, (0, 0))
+      for widget in self.widgets.values() :
+        widget.render()
+      self.latency.render(self.screen)
+      pygame.display.flip()
+      return True
+
+    if not(mergedRects) :
+      return False
+
+    # Redraw each area: background then the widgets drawing in it.
+    # The clipping keeps the widgets from drawing outside the area.
+    for rect in mergedRects :
+      self.screen.set_clip(rect)
+      self.screen.blit(self.background, rect, rect)
+      for widget in self.widgets.values() :
+        if (rect.collidelist(widget.renderRects) != -1) :
+          widget.render()
+      if rect.colliderect(self.latency.overlayRect) :
+        self.latency.render(self.screen)
+    
+    self.screen.set_clip(None)
+    pygame.display.update(mergedRects)
+    return True
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD: GangQin._midiInterfaceInit()                              [PRIVATE]
   # ---------------------------------------------------------------------------
@@ -264,18 +370,24 @@ class GangQin :
   def _midiOutInit(self, deviceName: str) -> None :
     """
     Tries to open the MIDI output port for the audio playback feature.
+    Falls back to the software synthesizer (see 'synth.py') if there is none.
     """
 
-    if (deviceName == "None") :
-      return
+    if (deviceName != "None") :
+      try :
+        self.midiOutPort = mido.open_output(deviceName)
+        print(f"[INFO] MIDI out opened: {deviceName}")
+        return
+      
+      except Exception :
+        pass
 
-    try :
-      self.midiOutPort = mido.open_output(deviceName)
-      print(f"[INFO] MIDI out opened: {deviceName}")
-      return
-    
-    except Exception :
-      pass
+    if SYNTH_ENABLE :
+      synthPort = synth.Synth()
+      if synthPort.open() :
+        self.midiOutPort = synthPort
+        print("[INFO] No MIDI output port: the playback uses the software synthesizer.")
+        return
 
     print("[WARNING] No MIDI output ports found. Arrow key preview feature disabled.")
 
@@ -297,10 +409,54 @@ class GangQin :
   def _onMidiInputCallback(self, midiMessage) :
     """
     This function is triggered for each incoming MIDI event from the external 
-    keyboard and routes the message to all interested widgets.
+    keyboard. 
+    
+    It runs in the thread of the MIDI backend: the message is only queued, 
+    it is processed by the main loop (see 'GangQin._midiInputProcess()')
+    """
+
+    if not(self.midiQueue.push(midiMessage)) :
+      print("[WARNING] MIDI input queue is full: event dropped.")
+    else :
+      self.scheduler.wake()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: GangQin._midiInputProcess()                               [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _midiInputProcess(self) -> int :
+    """
+    Processes the MIDI input events queued since the last call, in their order
+    of arrival.
+    Returns the number of events processed.
+    """
+
+    events = self.midiQueue.drain()
+    for (timestamp, midiMessage) in events :
+      cursor = self.widgets[WIDGET_ID_SCORE].getCursor()
+      
+      # Recorded as played: the input transpose is undone in place by '_onMidiInput()'
+      self.recorder.record(timestamp, midiMessage, cursor, self.midiTranspose)
+      self._onMidiInput(midiMessage)
+      
+      isNoteOn = ((midiMessage.type == "note_on") and (midiMessage.velocity > 0))
+      cursorMoved = (self.widgets[WIDGET_ID_SCORE].getCursor() != cursor)
+      self.latency.onEventProcessed(timestamp, isNoteOn, cursorMoved)
+
+    return len(events)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: GangQin._onMidiInput()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _onMidiInput(self, midiMessage) :
+    """
+    Routes an incoming MIDI event from the external keyboard to all interested 
+    widgets.
     """
 
-    # Probably not super efficient in a callback
     if self.widgets[WIDGET_ID_PLAYBACK].enable :
       self.widgets[WIDGET_ID_PLAYBACK].closeOpenNotes()
       self.widgets[WIDGET_ID_PLAYBACK].enable = False
@@ -335,14 +491,19 @@ class GangQin :
     """
     This function is called every time a widget wishes to output something on 
     the MIDI output playback interface.
+
+    It is called from several threads (autoplay, voice manager of the 
+    playback): the sends are serialised.
     """
 
-    # Run some preprocessing on the message
-    # - Filter out unused messages
-    # - apply transpose when activated
-    midiMessage = self._midiOutputPreProcessor(midiMessage)
+    with self.midiOutLock :
+
+      # Run some preprocessing on the message
+      # - Filter out unused messages
+      # - apply transpose when activated
+      midiMessage = self._midiOutputPreProcessor(midiMessage)
 
-    self.midiOutPort.send(midiMessage)
+      self.midiOutPort.send(midiMessage)
     
 
 
@@ -494,6 +655,14 @@ class GangQin :
 
     if (self.midiInPort is not None) :
       self.midiInPort.close()
+      
+      counters = self.midiQueue.getCounters()
+      print(f"[INFO] MIDI input: {counters['events']} events processed, {counters['dropped']} dropped")
+      print(f"[INFO] MIDI input: queue latency {1000*counters['latencyMean']:.1f} ms (average), {1000*counters['latencyMax']:.1f} ms (max), up to {counters['depthMax']} events per frame")
+      
+      self.recorder.close()
+
+    self.widgets[WIDGET_ID_SEQUENCER].autoPlayStop()
 
     if (self.midiOutPort is not None) :
       self.widgets[WIDGET_ID_PLAYBACK].close()
@@ -505,6 +674,7 @@ class GangQin :
     
     if (WIDGET_ID_SCORE in self.widgets) :
       self.widgets[WIDGET_ID_SCORE].save(backup = True)
+      self.widgets[WIDGET_ID_SCORE].close()
 
     print("")
     print("See you!")
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : gq3Cache
+# File name     : gq3Cache.py
+# File type     : Python script (Python 3)
+# Purpose       : binary columnar cache for the '.gq3' files
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# Large '.gq3' files take a while to load: the JSON has to be parsed entirely
+# before anything can be done with it.
+#
+# The cache is a sidecar binary file ('.gq3c') stored next to the '.gq3'.
+# It holds the content of the score as raw NumPy columns so that it can be
+# memory-mapped instead of parsed.
+#
+# FILE LAYOUT
+# - magic word (4 bytes) + revision (uint32) + header length (uint32)
+# - header: JSON dictionary (source file signature, metadata, column table)
+# - columns: raw arrays (little endian), each one aligned on 64 bytes.
+#
+# The cache is considered valid if the '.gq3' file it was built from has not
+# changed. The check is first done on the modification time and size.
+# If they differ, the content hash is compared before deciding to rebuild.
+#
+# The '.gq3' remains the reference: the cache can be deleted at any time.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import hashlib
+import json
+import numpy as np
+import os
+import struct
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+GQ3_CACHE_MAGIC     = b"GQ3C"
+GQ3_CACHE_REVISION  = 1
+GQ3_CACHE_ALIGNMENT = 64
+
+# Columns describing the notes (one entry per note, in the .gq3 order)
+GQ3_CACHE_NOTE_COLUMNS = {
+  "pitch"     : "<i1",
+  "hand"      : "<i1",
+  "finger"    : "<i1",
+  "voice"     : "<i1",
+  "startTime" : "<i8",
+  "stopTime"  : "<i8"
+}
+
+# Tables with a variable shape
+GQ3_CACHE_TABLES = ["bookmarks", "tempoSections", "arpeggioSections"]
+
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# FUNCTION getCacheFile()
+# -----------------------------------------------------------------------------
+def getCacheFile(gq3File: str) -> str :
+  """
+  Returns the name of the cache file associated to a '.gq3' file.
+  """
+
+  (root, _) = os.path.splitext(gq3File)
+  return root + GQ3_CACHE_EXTENSION
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION getFileHash()
+# -----------------------------------------------------------------------------
+def getFileHash(fileName: str) -> str :
+  """
+  Returns the SHA-1 hash of the content of a file.
+  """
+
+  h = hashlib.sha1()
+  with open(fileName, "rb") as f :
+    for chunk in iter(lambda: f.read(1 << 20), b"") :
+      h.update(chunk)
+
+  return h.hexdigest()
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION _getSourceSignature()                                    [PRIVATE]
+# -----------------------------------------------------------------------------
+def _getSourceSignature(gq3File: str, fileHash = None) -> dict :
+  """
+  Returns the information used to check that a cache still matches its
+  '.gq3' file.
+  """
+
+  stat = os.stat(gq3File)
+
+  if fileHash is None :
+    fileHash = getFileHash(gq3File)
+
+  return {"mtime": stat.st_mtime_ns, "size": stat.st_size, "sha1": fileHash}
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION _readHeader()                                            [PRIVATE]
+# -----------------------------------------------------------------------------
+def _readHeader(cacheFile: str) :
+  """
+  Reads the header of a cache file.
+  Returns a (header, dataStart) tuple, or None if the file is not a valid cache.
+  """
+
+  with open(cacheFile, "rb") as f :
+    preamble = f.read(12)
+    if (len(preamble) != 12) :
+      return None
+
+    (magic, revision, headerLength) = struct.unpack("<4sII", preamble)
+    if ((magic != GQ3_CACHE_MAGIC) or (revision != GQ3_CACHE_REVISION)) :
+      return None
+
+    header = json.loads(f.read(headerLength).decode("utf-8"))
+
+  return (header, 12 + headerLength)
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION build()
+# -----------------------------------------------------------------------------
+def build(gq3File: str, columns: dict, meta: dict, fileHash = None) -> bool :
+  """
+  Writes the cache of a '.gq3' file.
+
+  'columns' is a dictionary of arrays: the note columns (see GQ3_CACHE_NOTE_COLUMNS)
+  and the tables (see GQ3_CACHE_TABLES).
+  'meta' is a dictionary with the scalar fields of the '.gq3' (appVersion, cursor)
+
+  'fileHash' can be given if the content hash of the .gq3 is already known.
+
+  The file is written under a temporary name first then renamed, so that
+  a cache is never seen half written.
+  Returns True if the cache was written.
+  """
+
+  if not(GQ3_CACHE_ENABLE) :
+    return False
+
+  cacheFile = getCacheFile(gq3File)
+  tmpFile = cacheFile + ".tmp"
+
+  try :
+    arrays = {}
+    for (name, dtype) in GQ3_CACHE_NOTE_COLUMNS.items() :
+      arrays[name] = np.ascontiguousarray(columns[name], dtype = dtype)
+
+    # Tables keep their natural type (integers, unless some float values
+    # were manually entered, e.g. a tempo)
+    for name in GQ3_CACHE_TABLES :
+      table = np.asarray(columns[name])
+      if (table.size == 0) :
+        table = np.zeros((0,) if (name == "bookmarks") else (0, 2), dtype = "<i8")
+      elif (table.dtype.kind == "f") :
+        table = table.astype("<f8")
+      else :
+        table = table.astype("<i8")
+      arrays[name] = np.ascontiguousarray(table)
+
+    # Table of the columns (offsets are relative to the start of the data)
+    columnTable = {}
+    offset = 0
+    for (name, arr) in arrays.items() :
+      offset = -(-offset // GQ3_CACHE_ALIGNMENT) * GQ3_CACHE_ALIGNMENT
+      columnTable[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+      offset += arr.nbytes
+
+    header = {
+      "source"  : _getSourceSignature(gq3File, fileHash),
+      "meta"    : meta,
+      "columns" : columnTable
+    }
+    headerBytes = json.dumps(header).encode("utf-8")
+
+    # Data starts on an aligned boundary too
+    dataStart = -(-(12 + len(headerBytes)) // GQ3_CACHE_ALIGNMENT) * GQ3_CACHE_ALIGNMENT
+    headerBytes += b" " * (dataStart - 12 - len(headerBytes))
+
+    with open(tmpFile, "wb") as f :
+      f.write(struct.pack("<4sII", GQ3_CACHE_MAGIC, GQ3_CACHE_REVISION, len(headerBytes)))
+      f.write(headerBytes)
+      for (name, arr) in arrays.items() :
+        f.seek(dataStart + columnTable[name]["offset"])
+        f.write(arr.tobytes())
+
+    os.replace(tmpFile, cacheFile)
+
+  except (OSError, ValueError, KeyError, TypeError) as err :
+    print(f"[WARNING] Could not write the cache file '{cacheFile}' ({err})")
+    if os.path.exists(tmpFile) :
+      os.remove(tmpFile)
+    return False
+
+  return True
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION load()
+# -----------------------------------------------------------------------------
+def load(gq3File: str) :
+  """
+  Returns the content of the cache associated to a '.gq3' file as a
+  (columns, meta) tuple.
+
+  Columns are memory-mapped in copy-on-write mode: they can be modified in
+  memory without affecting the cache file.
+
+  Returns None if there is no cache, or if the cache is outdated.
+  """
+
+  if not(GQ3_CACHE_ENABLE) :
+    return None
+
+  cacheFile = getCacheFile(gq3File)
+  if not(os.path.exists(cacheFile)) :
+    return None
+
+  try :
+    ret = _readHeader(cacheFile)
+    if ret is None :
+      print("[WARNING] Cache file has an unknown format, it will be rebuilt.")
+      return None
+
+    (header, dataStart) = ret
+
+    # Check the source signature
+    source = header["source"]
+    stat = os.stat(gq3File)
+    if ((stat.st_mtime_ns != source["mtime"]) or (stat.st_size != source["size"])) :
+      fileHash = getFileHash(gq3File)
+      if (fileHash != source["sha1"]) :
+        print("[INFO] The .gq3 file has changed since the last cache build.")
+        return None
+
+      # Same content with a new timestamp (e.g. file copied): the cache is
+      # still valid, but its signature is refreshed to skip the hash next time.
+      touchRequired = True
+    else :
+      touchRequired = False
+
+    columns = {}
+    for (name, desc) in header["columns"].items() :
+      shape = tuple(desc["shape"])
+      if (np.prod(shape) == 0) :
+        columns[name] = np.zeros(shape, dtype = desc["dtype"])
+      else :
+        columns[name] = np.memmap(cacheFile, dtype = desc["dtype"], mode = "c", offset = dataStart + desc["offset"], shape = shape)
+
+  except (OSError, ValueError, KeyError, TypeError) as err :
+    print(f"[WARNING] Could not read the cache file '{cacheFile}' ({err})")
+    return None
+
+  # The mapping is released before rewriting the cache (the file could not be
+  # replaced while mapped on some platforms)
+  if touchRequired :
+    columns = {k: np.array(v) for (k, v) in columns.items()}
+    build(gq3File, columns, header["meta"], fileHash = source["sha1"])
+
+  return (columns, header["meta"])
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'gq3Cache.py'")
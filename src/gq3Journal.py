@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : gq3Journal
+# File name     : gq3Journal.py
+# File type     : Python script (Python 3)
+# Purpose       : append-only journal of the edits made to a '.gq3' file
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# Rewriting the whole '.gq3' file on each save is slow on large scores, even
+# though a save usually holds a handful of edits (a finger, a bookmark...)
+#
+# The journal is a sidecar file ('.gq3j') stored next to the '.gq3'.
+# Edits are appended to it as small records (one JSON object per line):
+#   {"op": "finger", "note": 1234, "value": 3}
+#   {"op": "bookmarks", "value": [12, 40, 87]}
+#
+# The first line is a header with the signature of the '.gq3' file the edits
+# apply to. When loading the '.gq3', the records are replayed on top of it.
+#
+# Compaction: the '.gq3' is rewritten with all the edits and the journal is
+# deleted (see 'Score.compact()').
+#
+# A journal that does not match its '.gq3' anymore (e.g. the '.gq3' was
+# edited by hand) is not replayed: it is renamed and kept aside.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.gq3Cache as gq3Cache
+
+# Standard libraries
+import json
+import os
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+GQ3_JOURNAL_REVISION = 1
+
+# Operations on the notes (one value per note)
+GQ3_JOURNAL_NOTE_OPS = ["hand", "finger", "voice"]
+
+# Operations on the tables (the whole table is recorded)
+GQ3_JOURNAL_TABLE_OPS = ["bookmarks", "tempoSections", "arpeggioSections"]
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class Gq3Journal :
+
+  """
+  GQ3_JOURNAL object
+
+  Journal of the edits made to a '.gq3' file.
+
+  Records are kept in memory ('Gq3Journal.record()') until the next save
+  ('Gq3Journal.flush()'), then they are appended to the journal file.
+  The file is opened once and left open: a save only writes a few lines.
+  """
+
+  def __init__(self, gq3File: str) :
+
+    self.gq3File      = gq3File
+    self.journalFile  = getJournalFile(gq3File)
+    self.pending      = []      # Records not written yet (JSON strings)
+    self.recordCount  = 0       # Number of records in the journal file
+    self.fileHandler  = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal.read()
+  # ---------------------------------------------------------------------------
+  def read(self) -> list[dict] :
+    """
+    Returns the records of the journal file (list of dictionaries), in the
+    order they were written.
+
+    Returns an empty list if there is no journal, or if the journal does not
+    match the '.gq3' file.
+    """
+
+    self.recordCount = 0
+    if not(os.path.exists(self.journalFile)) :
+      return []
+
+    with open(self.journalFile, "r") as fileHandler :
+      lines = fileHandler.read().splitlines()
+
+    try :
+      header = json.loads(lines[0])
+      source = header["source"]
+      if (header["revision"] != GQ3_JOURNAL_REVISION) :
+        raise ValueError("unknown revision")
+    except (IndexError, ValueError, KeyError, TypeError) :
+      self._discard("the journal has an unknown format")
+      return []
+
+    # Check that the edits apply to this '.gq3'
+    stat = os.stat(self.gq3File)
+    if ((stat.st_mtime_ns != source["mtime"]) or (stat.st_size != source["size"])) :
+      if (gq3Cache.getFileHash(self.gq3File) != source["sha1"]) :
+        self._discard("the .gq3 file has changed since the journal was started")
+        return []
+
+    records = []
+    for (lineNumber, line) in enumerate(lines[1:]) :
+      try :
+        records.append(json.loads(line))
+
+      # The last line can be incomplete if the app was killed while writing it
+      except ValueError :
+        print(f"[WARNING] Journal: line {lineNumber+2} is corrupted, the next records are ignored.")
+        break
+
+    self.recordCount = len(records)
+    return records
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal.record()
+  # ---------------------------------------------------------------------------
+  def record(self, op: str, **fields) -> None :
+    """
+    Adds a record to the journal.
+    It is written to the file on the next call to 'Gq3Journal.flush()'
+
+    EXAMPLE: journal.record("finger", note = 1234, value = 3)
+    """
+
+    self.pending.append(json.dumps({"op": op} | fields))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal.flush()
+  # ---------------------------------------------------------------------------
+  def flush(self) -> int :
+    """
+    Appends the pending records to the journal file.
+    Returns the number of records written.
+    """
+
+    if not(self.pending) :
+      return 0
+
+    if self.fileHandler is None :
+      isNew = not(os.path.exists(self.journalFile))
+      self.fileHandler = open(self.journalFile, "a")
+      if isNew :
+        self.fileHandler.write(self._getHeader() + "\n")
+
+    self.fileHandler.write("\n".join(self.pending) + "\n")
+    self.fileHandler.flush()
+
+    recordCount = len(self.pending)
+    self.recordCount += recordCount
+    self.pending = []
+
+    return recordCount
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal.reset()
+  # ---------------------------------------------------------------------------
+  def reset(self) -> None :
+    """
+    Deletes the journal (to be called once the edits have been merged in the
+    '.gq3' file)
+    """
+
+    self.close()
+    if os.path.exists(self.journalFile) :
+      os.remove(self.journalFile)
+
+    self.pending = []
+    self.recordCount = 0
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal.getMark()
+  # ---------------------------------------------------------------------------
+  def getMark(self) -> int :
+    """
+    Returns the number of records made so far (written and pending).
+    To be passed to 'Gq3Journal.rebase()' once the '.gq3' has been rewritten.
+    """
+
+    return self.recordCount + len(self.pending)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal.rebase()
+  # ---------------------------------------------------------------------------
+  def rebase(self, mark: int) -> None :
+    """
+    Starts a new journal on top of the '.gq3' file that has just been rewritten.
+
+    The '.gq3' holds the edits up to the mark (see 'Gq3Journal.getMark()').
+    The records made after the mark (edits done while the file was written)
+    are kept: the written ones are written again in the new journal, the
+    pending ones stay pending.
+    """
+
+    lines = []
+    if os.path.exists(self.journalFile) :
+      with open(self.journalFile, "r") as fileHandler :
+        lines = fileHandler.read().splitlines()[1:(1+self.recordCount)]
+
+    written = lines[mark:]
+    pending = self.pending[max(0, mark - len(lines)):]
+
+    self.reset()
+    self.pending = written
+    self.flush()
+    self.pending = pending
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal.close()
+  # ---------------------------------------------------------------------------
+  def close(self) -> None :
+    """
+    Closes the journal file. Pending records are not written.
+    """
+
+    if self.fileHandler is not None :
+      self.fileHandler.close()
+      self.fileHandler = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal._getHeader()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getHeader(self) -> str :
+    """
+    Returns the header line of the journal (signature of the '.gq3')
+    """
+
+    stat = os.stat(self.gq3File)
+    source = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "sha1": gq3Cache.getFileHash(self.gq3File)}
+
+    return json.dumps({"op": "header", "revision": GQ3_JOURNAL_REVISION, "source": source})
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Gq3Journal._discard()                                      [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _discard(self, reason: str) -> None :
+    """
+    Puts aside a journal that cannot be replayed.
+    """
+
+    os.replace(self.journalFile, self.journalFile + ".old")
+    print(f"[WARNING] Journal ignored: {reason}.")
+    print(f"[WARNING] It was renamed to '{self.journalFile}.old'")
+
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# FUNCTION getJournalFile()
+# -----------------------------------------------------------------------------
+def getJournalFile(gq3File: str) -> str :
+  """
+  Returns the name of the journal file associated to a '.gq3' file.
+  """
+
+  (root, _) = os.path.splitext(gq3File)
+  return root + GQ3_JOURNAL_EXTENSION
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'gq3Journal.py'")
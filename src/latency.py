@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : latency
+# File name     : latency.py
+# File type     : Python script (Python 3)
+# Purpose       : measures the latency between the MIDI keyboard and the display
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# Each MIDI input event is stamped ('time.perf_counter_ns()') as soon as it is
+# received by the MIDI callback (see 'midiQueue.py').
+# The stamp follows the event through the app, and the time elapsed is
+# measured at several stages:
+# - "input"   : the event has been processed by the main loop (keyboard
+#               updated, arbiter decision taken, cursor moved)
+# - "display" : the frame showing the key pressed has been displayed
+#               (note_on events only)
+# - "cursor"  : the frame showing the new cursor has been displayed (events
+#               that made the cursor move only)
+#
+# The measurements of the whole session are kept: the percentiles (p50, p95,
+# p99) can be shown in an overlay (F12) and are written to the stats log on
+# exit.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.text as text
+
+# Standard libraries
+import numpy as np
+import pygame
+import time
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+LATENCY_STAGES = ["input", "display", "cursor"]
+
+LATENCY_PERCENTILES = [50, 95, 99]
+
+# Refresh period of the figures shown in the overlay
+LATENCY_OVERLAY_REFRESH_SEC = 0.5
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class LatencyMonitor :
+
+  """
+  LATENCY_MONITOR object
+
+  Collects the latency of the MIDI input events over the session.
+
+  Mode of operation:
+  - 'LatencyMonitor.onEventProcessed()' once an event has been processed
+  - 'LatencyMonitor.onFrameDisplayed()' right after each display update
+  - 'LatencyMonitor.getDirtyRects()' then 'LatencyMonitor.render()' for the
+    overlay
+  """
+
+  def __init__(self) :
+
+    self.samples        = {stage: [] for stage in LATENCY_STAGES}   # Latencies (ns)
+    self.pendingDisplay = []        # Stamps of the events waiting for a display update
+    self.pendingCursor  = []
+
+    self.overlayEnable  = False
+    self.overlayLines   = []
+    self.overlayTime    = 0.0
+    self.overlayRect    = pygame.Rect(1310 - 12*30 - 4, 40 - 4, 12*30 + 8, 18*(len(LATENCY_STAGES) + 1) + 4)
+    self.overlayDirty   = False
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LatencyMonitor.onEventProcessed()
+  # ---------------------------------------------------------------------------
+  def onEventProcessed(self, timestamp: int, isNoteOn: bool, cursorMoved: bool) -> None :
+    """
+    Records the processing of a MIDI event received at 'timestamp' (ns).
+    The event is then tracked up to the next display update.
+    """
+
+    self.samples["input"].append(time.perf_counter_ns() - timestamp)
+
+    if isNoteOn :
+      self.pendingDisplay.append(timestamp)
+
+    if cursorMoved :
+      self.pendingCursor.append(timestamp)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LatencyMonitor.onFrameDisplayed()
+  # ---------------------------------------------------------------------------
+  def onFrameDisplayed(self) -> None :
+    """
+    Records the display of the events processed since the last frame.
+    Must be called right after each display update ('pygame.display.flip()' 
+    or 'pygame.display.update()')
+    """
+
+    if not(self.pendingDisplay or self.pendingCursor) :
+      return
+
+    now = time.perf_counter_ns()
+    self.samples["display"] += [now - t for t in self.pendingDisplay]
+    self.samples["cursor"]  += [now - t for t in self.pendingCursor]
+    self.pendingDisplay = []
+    self.pendingCursor = []
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LatencyMonitor.getPercentiles()
+  # ---------------------------------------------------------------------------
+  def getPercentiles(self, stage: str) -> list[float] :
+    """
+    Returns the percentiles (see 'LATENCY_PERCENTILES') of the latency at a
+    given stage, in milliseconds.
+    Returns an empty list if there is no measurement yet.
+    """
+
+    if not(self.samples[stage]) :
+      return []
+
+    values = np.percentile(np.asarray(self.samples[stage], dtype = np.int64), LATENCY_PERCENTILES)
+    return [float(x)/1e6 for x in values]
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LatencyMonitor.getSummary()
+  # ---------------------------------------------------------------------------
+  def getSummary(self) -> dict :
+    """
+    Returns the latency figures of the session as a dictionary (one entry per
+    stage, values in milliseconds), for the stats log.
+
+    EXAMPLE: {"input": {"count": 1520, "p50": 8.3, "p95": 16.1, "p99": 17.0}, ...}
+    """
+
+    summary = {}
+    for stage in LATENCY_STAGES :
+      summary[stage] = {"count": len(self.samples[stage])}
+      for (p, value) in zip(LATENCY_PERCENTILES, self.getPercentiles(stage)) :
+        summary[stage][f"p{p}"] = round(value, 2)
+
+    return summary
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LatencyMonitor.toggleOverlay()
+  # ---------------------------------------------------------------------------
+  def toggleOverlay(self) -> None :
+    """
+    Shows/hides the latency overlay.
+    """
+
+    self.overlayEnable = not(self.overlayEnable)
+    self.overlayTime = 0.0
+    self.overlayDirty = True
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LatencyMonitor.getUpdateDelay()
+  # ---------------------------------------------------------------------------
+  def getUpdateDelay(self) :
+    """
+    Returns the time (seconds) until the next refresh of the overlay figures, 
+    None if the overlay is hidden (see 'Widget.getUpdateDelay()')
+    """
+
+    if not(self.overlayEnable) :
+      return None
+
+    return max(self.overlayTime + LATENCY_OVERLAY_REFRESH_SEC - time.perf_counter(), 0)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LatencyMonitor.getDirtyRects()
+  # ---------------------------------------------------------------------------
+  def getDirtyRects(self) -> list :
+    """
+    Returns the area of the overlay if it has to be redrawn (shown, hidden or 
+    figures refreshed), as a list of pygame.Rect (see 'Widget.getDirtyRects()')
+    """
+
+    # Computing the percentiles takes a few ms on long sessions: the figures
+    # are only refreshed periodically.
+    if (self.overlayEnable and ((time.perf_counter() - self.overlayTime) > LATENCY_OVERLAY_REFRESH_SEC)) :
+      self.overlayLines = [f"{'LATENCY (MS)':<12}{'P50':>6}{'P95':>6}{'P99':>6}"]
+      for stage in LATENCY_STAGES :
+        values = self.getPercentiles(stage)
+        figures = "".join(f"{x:>6.1f}" for x in values) if values else f"{'-':>18}"
+        self.overlayLines.append(f"{stage.upper():<12}{figures}")
+      self.overlayTime = time.perf_counter()
+      self.overlayDirty = True
+
+    if self.overlayDirty :
+      self.overlayDirty = False
+      return [self.overlayRect]
+
+    return []
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LatencyMonitor.render()
+  # ---------------------------------------------------------------------------
+  def render(self, screen) -> None :
+    """
+    Draws the latency overlay (if enabled) in the top right corner.
+    The figures are those of the last call to 'LatencyMonitor.getDirtyRects()'
+    """
+
+    if not(self.overlayEnable) :
+      return
+
+    (x0, y0) = (1310, 40)
+    pygame.draw.rect(screen, GUI_BACKGROUND_COLOR, self.overlayRect)
+    for (n, line) in enumerate(self.overlayLines) :
+      text.render(screen, line, (x0, y0 + 18*n), 2, GUI_TEXT_COLOR, justify = text.RIGHT_JUSTIFY)
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'latency.py'")
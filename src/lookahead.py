@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : lookahead
+# File name     : lookahead.py
+# File type     : Python script (Python 3)
+# Purpose       : sliding window on the notes pressed after the current cursor
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# Lookahead feature: the notes pressed in the next few cursors are shown on 
+# the keyboard (with a lighter color) to help with the hand placement.
+#
+# The window holds the notes of the cursors (cursor+1) ... (cursor+distance)
+# in a ring (deque), one entry per cursor.
+# When the cursor moves by one step (the usual case while playing), only the 
+# cursor leaving the window and the one entering it are processed.
+# Any other move rebuilds the window.
+#
+# The notes are returned as lightweight views (see 'noteStore.UpcomingNoteView')
+# instead of copies of the notes.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.noteStore as noteStore
+
+# Standard libraries
+from collections import deque
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# None.
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class LookaheadWindow :
+
+  """
+  LOOKAHEAD_WINDOW object
+
+  Sliding window on the notes pressed after the current cursor.
+  """
+
+  def __init__(self) :
+
+    self.store        = None
+    self.pressed      = []        # Notes pressed at each cursor (see 'Score.notesByCursor_pressed')
+    self.cursor       = -1
+    self.distance     = 0
+    self.ring         = deque()   # Entries (cursor, list of UpcomingNoteView), by ascending cursor
+    self.notes        = []        # Output of the last call to 'LookaheadWindow.getNotes()'
+    self.notesKey     = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LookaheadWindow.load()
+  # ---------------------------------------------------------------------------
+  def load(self, store: noteStore.NoteStore, pressed: list) -> None :
+    """
+    Attaches the window to the notes of a score: the note database and the
+    list of the notes pressed at each cursor.
+    """
+
+    self.store    = store
+    self.pressed  = pressed
+    self.cursor   = -1
+    self.distance = 0
+    self.ring.clear()
+    self.notesKey = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LookaheadWindow.moveTo()
+  # ---------------------------------------------------------------------------
+  def moveTo(self, cursor: int, distance: int) -> None :
+    """
+    Moves the window so that it covers the cursors that come after 'cursor',
+    up to (cursor + distance).
+    """
+
+    if ((cursor == self.cursor) and (distance == self.distance)) :
+      return
+
+    # One step forward: the first cursor of the window leaves, a new one enters
+    if ((cursor == (self.cursor + 1)) and (distance == self.distance)) :
+      if (self.ring and (self.ring[0][0] <= cursor)) :
+        self.ring.popleft()
+      self.cursor = cursor
+      self._push(cursor + distance, last = True)
+
+    # One step backward: the previous cursor enters, the last one leaves
+    elif ((cursor == (self.cursor - 1)) and (distance == self.distance)) :
+      if (self.ring and (self.ring[-1][0] > (cursor + distance))) :
+        self.ring.pop()
+      self.cursor = cursor
+      self._push(cursor + 1, last = False)
+
+    else :
+      self.cursor   = cursor
+      self.distance = distance
+      self.ring.clear()
+      for c in range(cursor + 1, cursor + distance + 1) :
+        self._push(c, last = True)
+
+    self.notesKey = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LookaheadWindow.getNotes()
+  # ---------------------------------------------------------------------------
+  def getNotes(self, excludedPitches = []) -> list[noteStore.UpcomingNoteView] :
+    """
+    Returns the notes of the window, nearest cursors first.
+    
+    A pitch is only listed once (nearest occurrence), and the pitches in
+    'excludedPitches' (e.g. the notes to play at the current cursor) are not
+    listed.
+    """
+
+    key = (self.cursor, self.distance, tuple(excludedPitches))
+    if (key != self.notesKey) :
+      seen = set(excludedPitches)
+      self.notes = []
+      for (_, views) in self.ring :
+        for view in views :
+          if not(view.pitch in seen) :
+            seen.add(view.pitch)
+            self.notes.append(view)
+      self.notesKey = key
+
+    return self.notes.copy()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD LookaheadWindow._push()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _push(self, cursor: int, last = True) -> None :
+    """
+    Adds the notes pressed at 'cursor' at the end ('last' = True) or at the 
+    beginning of the window.
+    """
+
+    if ((cursor < 0) or (cursor >= len(self.pressed)) or (cursor <= self.cursor) or (cursor > (self.cursor + self.distance))) :
+      return
+
+    # Notes with a null duration are ignored (see 'Score._getTeacherEntries()')
+    entry = (cursor, [noteStore.UpcomingNoteView(self.store, N.id, cursor, self) for N in self.pressed[cursor] if (N.startTime != N.stopTime)])
+    if last :
+      self.ring.append(entry)
+    else :
+      self.ring.appendleft(entry)
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'lookahead.py'")
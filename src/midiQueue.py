@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : midiQueue
+# File name     : midiQueue.py
+# File type     : Python script (Python 3)
+# Purpose       : queue of the MIDI input events (MIDI thread -> main loop)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# The MIDI input callback runs in the thread of the MIDI backend (rtmidi).
+# Processing the events there means the widgets are modified while the main
+# loop reads them to render the frame.
+#
+# Instead, the callback only timestamps the event and pushes it in this queue.
+# The main loop pops the events at each frame ('MidiQueue.drain()') and
+# processes them in the order they arrived.
+#
+# The queue is a ring buffer with a single producer (MIDI thread) and a single
+# consumer (main loop): 
+# - the producer writes a slot, then moves the write index ('tail')
+# - the consumer reads the slots, then moves the read index ('head')
+# Each index is only written by one side, and the assignment of an attribute 
+# is atomic in Python: no lock is needed.
+#
+# When the queue is full (main loop stalled) the new events are dropped and
+# counted: a stuck key is preferable to a blocked MIDI thread.
+#
+# The queue keeps some counters to monitor the latency of the input 
+# processing (see 'MidiQueue.getCounters()')
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import time
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# None.
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class MidiQueue :
+
+  """
+  MIDI_QUEUE object
+
+  Single producer / single consumer queue of timestamped MIDI events.
+  'MidiQueue.push()' must be called from the MIDI thread only, 'MidiQueue.drain()' 
+  from the main loop only.
+  """
+
+  def __init__(self, capacity = MIDI_QUEUE_CAPACITY) :
+
+    self.capacity = capacity
+    self.slots    = [None for _ in range(capacity)]
+    self.head     = 0           # Number of events read (written by the consumer only)
+    self.tail     = 0           # Number of events written (written by the producer only)
+    
+    # Counters (producer side)
+    self.dropCount = 0
+
+    # Counters (consumer side)
+    self.drainCount   = 0       # Number of events read
+    self.depthLast    = 0       # Number of events read by the last drain
+    self.depthMax     = 0
+    self.latencyLast  = 0.0     # Time spent in the queue by the events (seconds)
+    self.latencyMax   = 0.0
+    self.latencySum   = 0.0
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD MidiQueue.push()
+  # ---------------------------------------------------------------------------
+  def push(self, midiMessage, timestamp = None) -> bool :
+    """
+    Adds a MIDI message to the queue, along with its time of arrival in
+    nanoseconds ('time.perf_counter_ns()' if not specified)
+    Returns False if the queue is full (the message is dropped)
+    """
+
+    if timestamp is None :
+      timestamp = time.perf_counter_ns()
+
+    tail = self.tail
+    if ((tail - self.head) >= self.capacity) :
+      self.dropCount += 1
+      return False
+
+    self.slots[tail % self.capacity] = (timestamp, midiMessage)
+    
+    # Publish the slot (must come last)
+    self.tail = tail + 1
+    
+    return True
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD MidiQueue.drain()
+  # ---------------------------------------------------------------------------
+  def drain(self) -> list[tuple] :
+    """
+    Pops all the events in the queue.
+    Returns a list of tuples (timestamp, message) in the order of arrival.
+
+    The events pushed during the call are left for the next one.
+    """
+
+    head = self.head
+    tail = self.tail
+    if (tail == head) :
+      self.depthLast = 0
+      return []
+
+    events = []
+    for n in range(head, tail) :
+      events.append(self.slots[n % self.capacity])
+      self.slots[n % self.capacity] = None
+
+    # Release the slots
+    self.head = tail
+
+    now = time.perf_counter_ns()
+    latencies = [(now - t)/1e9 for (t, _) in events]
+    self.drainCount   += len(events)
+    self.depthLast    = len(events)
+    self.depthMax     = max(self.depthMax, len(events))
+    self.latencyLast  = latencies[-1]
+    self.latencyMax   = max(self.latencyMax, max(latencies))
+    self.latencySum   += sum(latencies)
+
+    return events
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD MidiQueue.getDepth()
+  # ---------------------------------------------------------------------------
+  def getDepth(self) -> int :
+    """
+    Returns the number of events waiting in the queue.
+    """
+
+    return (self.tail - self.head)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD MidiQueue.getCounters()
+  # ---------------------------------------------------------------------------
+  def getCounters(self) -> dict :
+    """
+    Returns the counters of the queue as a dictionary:
+    - "events"      : number of events processed
+    - "dropped"     : number of events lost (queue full)
+    - "depthLast"   : number of events popped by the last drain
+    - "depthMax"    : maximum number of events popped at once
+    - "latencyLast" : time spent in the queue by the last event (seconds)
+    - "latencyMax"  : maximum time spent in the queue (seconds)
+    - "latencyMean" : average time spent in the queue (seconds)
+    """
+
+    return {
+      "events"      : self.drainCount,
+      "dropped"     : self.dropCount,
+      "depthLast"   : self.depthLast,
+      "depthMax"    : self.depthMax,
+      "latencyLast" : self.latencyLast,
+      "latencyMax"  : self.latencyMax,
+      "latencyMean" : (self.latencySum / self.drainCount) if (self.drainCount > 0) else 0.0
+    }
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'midiQueue.py'")
@@ -48,52 +48,25 @@ class finger_T(Enum) :
 # =============================================================================
 # CLASS DEFINITION
 # =============================================================================
-class Note :
+class NoteBase :
 
   """
-  NOTE object
-  
-  The Note object is a representation of a musical note with all the properties
-  necessary accross the different objects. 
+  NOTEBASE object
   
-  Do not change the pitch afterwards.
+  Common methods of the note representations:
+  - the Note object (standalone note, e.g. a note played on the keyboard)
+  - the NoteView object (note of the score database, see 'noteStore.py')
+
+  The derived classes provide the note attributes (pitch, hand, finger, etc.)
   """
 
-  def __init__(self, pitch) :
-    
-    # Note general attributes (fields preserved during file import/export)
-    self.pitch    = pitch
-    self.hand     = hand_T.UNDEFINED
-    self.finger   = finger_T.UNDEFINED
-    self.name     = getFriendlyName(pitch)
-    self.voice    = NOTE_VOICE_DEFAULT
-    self.velocity = 0
+  # No instance dictionary: the derived classes declare their own slots
+  __slots__ = ()
 
-    # Note database attributes (fields partially preserved during file import/export)
-    self.startTime  = 0                 # Timecode of the key press event
-    self.stopTime   = NOTE_END_UNKNOWN  # Timecode of the key release event
-    self.dbIndex    = -1                # Index of the note in the score database
-    self.id         = -1                # Note unique identifier in the score (might change from a session to the other)
-    
-    # Note display attributes (fields not preserved during file import/export)
-    self.color      = None
-    self.keyColor   = self._getKeyColor()   # White or Black note
-    self.sustained  = False                 # True if the note is held at a given time
-    self.highlight  = False                 # True if the note fingersatz is being edited
-    self.inactive   = False                 # True if the note shall be ignored by the arbiter (single hand practice)
-    self.upcoming   = False                 # True if the note is about to be played soon
-    self.upcomingDistance = 0               # The higher the value, the further the note in the score from the current location
-    self.fromKeyboardInput  = False         # True if it is a note played by the user from the MIDI input
-
-    # Not used anymore?
-    self.visible            = False
-    self.disabled           = False   # True if the note shall be ignored by the arbiter (unplayable note)
-    self.lookAheadDistance  = 0       # Define how far away this note is located relative to the current cursor
-    
 
 
   # ---------------------------------------------------------------------------
-  # METHOD: Note._getKeyColor()                                       [PRIVATE]
+  # METHOD: NoteBase._getKeyColor()                                   [PRIVATE]
   # ---------------------------------------------------------------------------
   def _getKeyColor(self) :
     """
@@ -108,7 +81,7 @@ class Note :
 
 
   # ---------------------------------------------------------------------------
-  # METHOD: Note.getNoteColor()
+  # METHOD: NoteBase.getNoteColor()
   # ---------------------------------------------------------------------------
   def getNoteColor(self) :
     """
@@ -211,55 +184,7 @@ class Note :
 
 
   # ---------------------------------------------------------------------------
-  # METHOD: Note.setPitch()
-  # ---------------------------------------------------------------------------
-  def setPitch(self, newPitch: int) -> None :
-    """
-    Changes the pitch of the note.
-    Do not try to modify the 'pitch' attribute manually as some side attributes
-    would not be up to date anymore.
-    """
-      
-    self.pitch    = newPitch
-    self.name     = getFriendlyName(newPitch)
-    self.keyColor = self._getKeyColor()
-
-
-
-  # ---------------------------------------------------------------------------
-  # METHOD: Note.start()
-  # ---------------------------------------------------------------------------
-  def start(self, startTime: int) -> None :
-    """
-    Sets the start time attribute of the note.
-    """
-      
-    self.startTime = startTime
-
-
-
-  # ---------------------------------------------------------------------------
-  # METHOD: Note.stop()
-  # ---------------------------------------------------------------------------
-  def stop(self, stopTime: int) -> None :
-    """
-    Sets the stop time attribute of the note.
-    Warning: unlike 'Note.stop()', this method does not overwrite the 'stopTime'
-    attribute but appends a stop time to the list.
-
-    MIDI notation causes inherent ambiguity on the stop time: more than 1 
-    'note on' event can occur on the same hand and pitch before it is even 
-    released. 
-    To let the user choose the proper note duration, all possible stoptime are
-    stored.
-    """
-    
-    self.stopTime = stopTime
-
-
-
-  # ---------------------------------------------------------------------------
-  # METHOD: Note.toDict()
+  # METHOD: NoteBase.toDict()
   # ---------------------------------------------------------------------------
   def toDict(self) :
     """
@@ -279,7 +204,7 @@ class Note :
 
 
   # ---------------------------------------------------------------------------
-  # METHOD: Note.__str__() (overloading of the standard 'print')
+  # METHOD: NoteBase.__str__() (overloading of the standard 'print')
   # ---------------------------------------------------------------------------
   def __str__(self) -> str :
     """
@@ -314,6 +239,109 @@ class Note :
 
 
 
+class Note(NoteBase) :
+
+  """
+  NOTE object
+  
+  The Note object is a representation of a musical note with all the properties
+  necessary accross the different objects. 
+  
+  Do not change the pitch afterwards.
+
+  NOTE: the notes of the score are not stored as Note objects but in a NoteStore
+  (see 'noteStore.py'). The Note object is used for standalone notes (MIDI 
+  import, notes played on the keyboard, etc.)
+  """
+
+  __slots__ = (
+    "pitch", "hand", "finger", "name", "voice", "velocity",
+    "startTime", "stopTime", "dbIndex", "id",
+    "color", "keyColor", "sustained", "highlight", "inactive", "upcoming", "upcomingDistance", "fromKeyboardInput",
+    "visible", "disabled", "lookAheadDistance"
+  )
+
+  def __init__(self, pitch) :
+    
+    # Note general attributes (fields preserved during file import/export)
+    self.pitch    = pitch
+    self.hand     = hand_T.UNDEFINED
+    self.finger   = finger_T.UNDEFINED
+    self.name     = getFriendlyName(pitch)
+    self.voice    = NOTE_VOICE_DEFAULT
+    self.velocity = 0
+
+    # Note database attributes (fields partially preserved during file import/export)
+    self.startTime  = 0                 # Timecode of the key press event
+    self.stopTime   = NOTE_END_UNKNOWN  # Timecode of the key release event
+    self.dbIndex    = -1                # Index of the note in the score database
+    self.id         = -1                # Note unique identifier in the score (might change from a session to the other)
+    
+    # Note display attributes (fields not preserved during file import/export)
+    self.color      = None
+    self.keyColor   = self._getKeyColor()   # White or Black note
+    self.sustained  = False                 # True if the note is held at a given time
+    self.highlight  = False                 # True if the note fingersatz is being edited
+    self.inactive   = False                 # True if the note shall be ignored by the arbiter (single hand practice)
+    self.upcoming   = False                 # True if the note is about to be played soon
+    self.upcomingDistance = 0               # The higher the value, the further the note in the score from the current location
+    self.fromKeyboardInput  = False         # True if it is a note played by the user from the MIDI input
+
+    # Not used anymore?
+    self.visible            = False
+    self.disabled           = False   # True if the note shall be ignored by the arbiter (unplayable note)
+    self.lookAheadDistance  = 0       # Define how far away this note is located relative to the current cursor
+    
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Note.setPitch()
+  # ---------------------------------------------------------------------------
+  def setPitch(self, newPitch: int) -> None :
+    """
+    Changes the pitch of the note.
+    Do not try to modify the 'pitch' attribute manually as some side attributes
+    would not be up to date anymore.
+    """
+      
+    self.pitch    = newPitch
+    self.name     = getFriendlyName(newPitch)
+    self.keyColor = self._getKeyColor()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Note.start()
+  # ---------------------------------------------------------------------------
+  def start(self, startTime: int) -> None :
+    """
+    Sets the start time attribute of the note.
+    """
+      
+    self.startTime = startTime
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Note.stop()
+  # ---------------------------------------------------------------------------
+  def stop(self, stopTime: int) -> None :
+    """
+    Sets the stop time attribute of the note.
+    Warning: unlike 'Note.stop()', this method does not overwrite the 'stopTime'
+    attribute but appends a stop time to the list.
+
+    MIDI notation causes inherent ambiguity on the stop time: more than 1 
+    'note on' event can occur on the same hand and pitch before it is even 
+    released. 
+    To let the user choose the proper note duration, all possible stoptime are
+    stored.
+    """
+    
+    self.stopTime = stopTime
+
+
+
 # ---------------------------------------------------------------------------
 # UTILITY: getFriendlyName()
 # ---------------------------------------------------------------------------
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : noteStore
+# File name     : noteStore.py
+# File type     : Python script (Python 3)
+# Purpose       : note database of the score (struct of arrays)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.note as note
+
+# Standard libraries
+import numpy as np
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# Columns of the store and their type
+NOTE_STORE_COLUMNS = {
+  "pitch"     : np.int16,
+  "hand"      : np.int8,
+  "finger"    : np.int8,
+  "voice"     : np.int8,
+  "velocity"  : np.int16,
+  "startTime" : np.int64,
+  "stopTime"  : np.int64
+}
+
+# Display attributes of the notes (not exported)
+NOTE_STORE_DISPLAY_COLUMNS = {
+  "sustained"         : np.bool_,
+  "highlight"         : np.bool_,
+  "inactive"          : np.bool_,
+  "upcoming"          : np.bool_,
+  "upcomingDistance"  : np.int8
+}
+
+# Lookup tables (column value -> enum)
+HAND_LUT   = {h.value: h for h in note.hand_T}
+FINGER_LUT = {f.value: f for f in note.finger_T}
+
+# Precomputed attributes derived from the pitch
+NAME_LUT      = [note.getFriendlyName(p) for p in range(128)]
+KEY_COLOR_LUT = [note.keyColor_T.WHITE_KEY if ((p % 12) in MIDI_CODE_WHITE_NOTES_MOD12) else note.keyColor_T.BLACK_KEY for p in range(128)]
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class NoteStore :
+
+  """
+  NOTESTORE object
+
+  The NoteStore is the note database of the Score.
+
+  Notes are stored as a 'struct of arrays': one NumPy array per attribute
+  (pitch, hand, finger, voice, velocity, startTime, stopTime) instead of one
+  object per note.
+  It makes the database much more compact, and sorting/grouping/exporting
+  can be done on the arrays directly.
+  The display attributes (sustained, highlight, etc.) are stored the same way,
+  they are reset on each load.
+
+  Notes are sorted by ascending start time (keypress).
+  The index of a note in the store is its identifier ('id').
+
+  The widgets access the notes through NoteView objects (see 'NoteStore.getViews()')
+  """
+
+  def __init__(self) :
+
+    for (name, dtype) in (NOTE_STORE_COLUMNS | NOTE_STORE_DISPLAY_COLUMNS).items() :
+      setattr(self, name, np.zeros(0, dtype = dtype))
+
+    # Function called on each edit of a note: onEdit(name, index, value)
+    self.onEdit = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD NoteStore.load()
+  # ---------------------------------------------------------------------------
+  def load(self, columns: dict) -> None :
+    """
+    Initialises the store from a dictionary of columns (one array or list per
+    attribute, see NOTE_STORE_COLUMNS).
+    Missing 'velocity' column defaults to 0.
+
+    Columns are copied and sorted by ascending start time.
+    The sort is stable: notes starting at the same time keep their order.
+    """
+
+    noteCount = len(columns["pitch"])
+    order = np.argsort(np.asarray(columns["startTime"], dtype = np.int64), kind = "stable")
+
+    for (name, dtype) in NOTE_STORE_COLUMNS.items() :
+      if name in columns :
+        setattr(self, name, np.asarray(columns[name], dtype = dtype)[order])
+      else :
+        setattr(self, name, np.zeros(noteCount, dtype = dtype))
+
+    for (name, dtype) in NOTE_STORE_DISPLAY_COLUMNS.items() :
+      setattr(self, name, np.zeros(noteCount, dtype = dtype))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD NoteStore.loadFromNotes()
+  # ---------------------------------------------------------------------------
+  def loadFromNotes(self, noteList: list[note.Note]) -> None :
+    """
+    Initialises the store from a list of Note objects (e.g. MIDI import).
+    """
+
+    columns = {
+      "pitch"     : [N.pitch for N in noteList],
+      "hand"      : [N.hand.value for N in noteList],
+      "finger"    : [N.finger.value for N in noteList],
+      "voice"     : [N.voice for N in noteList],
+      "velocity"  : [N.velocity for N in noteList],
+      "startTime" : [N.startTime for N in noteList],
+      "stopTime"  : [N.stopTime for N in noteList]
+    }
+
+    self.load(columns)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD NoteStore.edit()
+  # ---------------------------------------------------------------------------
+  def edit(self, name: str, index: int, value: int) -> None :
+    """
+    Sets an annotation of a note (hand, finger, voice) and notifies the edit
+    (see 'NoteStore.onEdit')
+    Does nothing if the value is unchanged.
+    """
+
+    column = getattr(self, name)
+    if (column[index] != value) :
+      column[index] = value
+      if self.onEdit is not None :
+        self.onEdit(name, index, value)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD NoteStore.getColumns()
+  # ---------------------------------------------------------------------------
+  def getColumns(self) -> dict :
+    """
+    Returns the columns of the store as a dictionary (no copy)
+    Display attributes are not included.
+    """
+
+    return {name: getattr(self, name) for name in NOTE_STORE_COLUMNS}
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD NoteStore.getViews()
+  # ---------------------------------------------------------------------------
+  def getViews(self) -> list["NoteView"] :
+    """
+    Returns a list of NoteView objects: one per note, in the order of the store.
+    """
+
+    return [NoteView(self, i) for i in range(len(self))]
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD NoteStore.__len__()
+  # ---------------------------------------------------------------------------
+  def __len__(self) -> int :
+    """
+    Returns the number of notes in the store.
+    """
+
+    return len(self.pitch)
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class NoteView(note.NoteBase) :
+
+  """
+  NOTEVIEW object
+
+  The NoteView is a lightweight object that gives access to a note of the
+  NoteStore with the same interface as the Note object.
+
+  All attributes (pitch, hand, finger, display attributes etc.) are read 
+  from/written to the arrays of the store: the view itself only holds a 
+  reference to the store and the index of the note.
+  Any view on the same note sees the same attributes.
+  """
+
+  __slots__ = ("_store", "_index")
+
+  # Attributes that are constant for the notes of the score
+  color             = None
+  fromKeyboardInput = False
+  visible           = False
+  disabled          = False
+  lookAheadDistance = 0
+
+  def __init__(self, store: NoteStore, index: int) :
+
+    self._store = store
+    self._index = index
+
+
+
+  # ---------------------------------------------------------------------------
+  # Attributes read from the store
+  # ---------------------------------------------------------------------------
+  @property
+  def pitch(self) -> int :
+    return int(self._store.pitch[self._index])
+
+  @property
+  def name(self) -> str :
+    return NAME_LUT[self.pitch]
+
+  @property
+  def keyColor(self) -> note.keyColor_T :
+    return KEY_COLOR_LUT[self.pitch]
+
+  @property
+  def hand(self) -> note.hand_T :
+    return HAND_LUT[int(self._store.hand[self._index])]
+
+  @hand.setter
+  def hand(self, value: note.hand_T) -> None :
+    self._store.edit("hand", self._index, value.value)
+
+  @property
+  def finger(self) -> note.finger_T :
+    return FINGER_LUT[int(self._store.finger[self._index])]
+
+  @finger.setter
+  def finger(self, value: note.finger_T) -> None :
+    self._store.edit("finger", self._index, value.value)
+
+  @property
+  def voice(self) -> int :
+    return int(self._store.voice[self._index])
+
+  @voice.setter
+  def voice(self, value: int) -> None :
+    self._store.edit("voice", self._index, value)
+
+  @property
+  def velocity(self) -> int :
+    return int(self._store.velocity[self._index])
+
+  @property
+  def startTime(self) -> int :
+    return int(self._store.startTime[self._index])
+
+  @property
+  def stopTime(self) -> int :
+    return int(self._store.stopTime[self._index])
+
+  @property
+  def sustained(self) -> bool :
+    return bool(self._store.sustained[self._index])
+
+  @sustained.setter
+  def sustained(self, value: bool) -> None :
+    self._store.sustained[self._index] = value
+
+  @property
+  def highlight(self) -> bool :
+    return bool(self._store.highlight[self._index])
+
+  @highlight.setter
+  def highlight(self, value: bool) -> None :
+    self._store.highlight[self._index] = value
+
+  @property
+  def inactive(self) -> bool :
+    return bool(self._store.inactive[self._index])
+
+  @inactive.setter
+  def inactive(self, value: bool) -> None :
+    self._store.inactive[self._index] = value
+
+  @property
+  def upcoming(self) -> bool :
+    return bool(self._store.upcoming[self._index])
+
+  @upcoming.setter
+  def upcoming(self, value: bool) -> None :
+    self._store.upcoming[self._index] = value
+
+  @property
+  def upcomingDistance(self) -> int :
+    return int(self._store.upcomingDistance[self._index])
+
+  @upcomingDistance.setter
+  def upcomingDistance(self, value: int) -> None :
+    self._store.upcomingDistance[self._index] = value
+
+  @property
+  def id(self) -> int :
+    return self._index
+
+  @property
+  def dbIndex(self) -> int :
+    return self._index
+
+
+
+
+class TeacherNoteView(NoteView) :
+
+  """
+  TEACHERNOTEVIEW object
+
+  View on a note of the NoteStore, as returned by 'Score.getTeacherNotes()'.
+
+  The 'sustained' and 'inactive' attributes depend on the cursor and the 
+  practice mode: they are held by the view instead of the store, so that 
+  the teacher notes of a cursor do not alter the other views on the same note.
+  """
+
+  __slots__ = ("_sustained", "_inactive")
+
+  def __init__(self, store: NoteStore, index: int, sustained: bool, inactive: bool) :
+
+    self._store     = store
+    self._index     = index
+    self._sustained = sustained
+    self._inactive  = inactive
+
+
+
+  # ---------------------------------------------------------------------------
+  # Attributes held by the view
+  # ---------------------------------------------------------------------------
+  @property
+  def sustained(self) -> bool :
+    return self._sustained
+
+  @sustained.setter
+  def sustained(self, value: bool) -> None :
+    self._sustained = value
+
+  @property
+  def inactive(self) -> bool :
+    return self._inactive
+
+  @inactive.setter
+  def inactive(self, value: bool) -> None :
+    self._inactive = value
+
+
+
+class UpcomingNoteView(NoteView) :
+
+  """
+  UPCOMINGNOTEVIEW object
+
+  View on a note of the NoteStore pressed after the current cursor, as 
+  returned by 'Score.getUpcomingNotes()' (lookahead feature)
+
+  'upcomingDistance' (number of cursors between the current cursor and the
+  keypress of the note) is derived from the lookahead window the view 
+  belongs to: the views don't need to be updated when the window moves.
+  """
+
+  __slots__ = ("_cursor", "_window")
+
+  def __init__(self, store: NoteStore, index: int, cursor: int, window) :
+
+    self._store   = store
+    self._index   = index
+    self._cursor  = cursor
+    self._window  = window
+
+
+
+  # ---------------------------------------------------------------------------
+  # Attributes derived from the lookahead window
+  # ---------------------------------------------------------------------------
+  @property
+  def upcoming(self) -> bool :
+    return True
+
+  @property
+  def upcomingDistance(self) -> int :
+    return self._cursor - self._window.cursor
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'noteStore.py'")
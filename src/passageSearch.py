@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : passageSearch
+# File name     : passageSearch.py
+# File type     : Python script (Python 3)
+# Purpose       : search engine for passages (sequences of chords) in the score
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# Finds the locations in the score where a short sequence of chords (the
+# 'query', usually played on the keyboard) appears.
+#
+# The search can be:
+# - fuzzy: a certain number of missing/extra notes is tolerated
+# - transposition invariant: the passage can be found in any key.
+#
+# INDEX
+# Each chord of the score is reduced to its pitch class set (12-bit mask,
+# octaves are folded) rotated so that its lowest note is on bit 0.
+# A 'fingerprint' is built from N consecutive chords (N-gram), all of them
+# expressed relatively to the lowest note of the first chord: it only
+# describes intervals, hence is the same in all keys.
+# The index lists the locations of each fingerprint in the score.
+#
+# SEARCH
+# - candidates: the fingerprints of the query are looked up in the index.
+#   A location with E errors still shares at least (Q-N+1) - E*N fingerprints
+#   with a query of Q chords ('q-gram lemma'): locations with less hits can be
+#   discarded without looking at them.
+# - verification: for each candidate, the notes (exact pitches) of the query
+#   are compared to the notes in the score.
+#   The cost is the number of missing and extra notes.
+#
+# Chords are handled as 128-bit masks (Python integers, bit 'p' is set when
+# pitch 'p' is in the chord): a transposition is a shift, and the cost is the
+# bit count of a XOR.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import numpy as np
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# Number of consecutive chords in a fingerprint
+PASSAGE_SEARCH_NGRAM_LENGTH = 2
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class PassageIndex :
+
+  """
+  PASSAGE_INDEX object
+
+  Fingerprint index of a sequence of chords (usually: the chords of a Score
+  at each cursor, for a given hand setting)
+
+  See the description of the module for the details.
+  """
+
+  def __init__(self, chordBits: list[int], cursors) :
+    """
+    'chordBits' is the list of the chords of the score as 128-bit masks.
+    'cursors' gives the cursor of each chord (same length as 'chordBits')
+    """
+
+    self.chordBits  = chordBits
+    self.cursors    = np.asarray(cursors, dtype = np.int32)
+    self.bass       = [getBass(x) for x in chordBits]
+    self.pcMasks    = [getPitchClassMask(x) for x in chordBits]
+    self.index      = {}
+
+    N = PASSAGE_SEARCH_NGRAM_LENGTH
+    for pos in range(len(chordBits) - N + 1) :
+      key = self._getFingerprint(self.pcMasks[pos:(pos+N)], self.bass[pos])
+      if key is not None :
+        self.index.setdefault(key, []).append(pos)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD PassageIndex.search()
+  # ---------------------------------------------------------------------------
+  def search(self, query: list[list[int]], transpose = False, tolerance = 0) -> list[tuple[int, int, int]] :
+    """
+    Finds the locations where the chords of the query ('query', list of
+    chords, each chord being a list of MIDI codes) are played one after the
+    other.
+
+    - 'transpose': the query can be found in any key
+    - 'tolerance': maximum number of missing/extra notes over the whole passage
+
+    Returns a list of tuples (cursor, cost, transposition) ranked by increasing
+    cost (exact matches first).
+    The cursor is the location of the first chord of the query.
+    The transposition is in semitones (score = query + transposition)
+    """
+
+    queryBits = [sum(1 << p for p in set(chord)) for chord in query if chord]
+    Q = len(queryBits)
+    if ((Q == 0) or (Q > len(self.chordBits))) :
+      return []
+
+    queryBass = [getBass(x) for x in queryBits]
+    queryPcMasks = [getPitchClassMask(x) for x in queryBits]
+
+    # STEP 1: candidate locations (start, transposition)
+    N = min(PASSAGE_SEARCH_NGRAM_LENGTH, Q)
+    gramCount = Q - N + 1
+    minHits = gramCount - (tolerance * N)
+    lastStart = len(self.chordBits) - Q
+
+    candidates = set()
+    if ((N == PASSAGE_SEARCH_NGRAM_LENGTH) and (minHits > 0)) :
+      hits = {}
+      for j in range(gramCount) :
+        key = self._getFingerprint(queryPcMasks[j:(j+N)], queryBass[j])
+        for pos in self.index.get(key, []) :
+          start = pos - j
+          if ((start < 0) or (start > lastStart)) :
+            continue
+
+          shift = self.bass[pos] - queryBass[j]
+          if not(transpose) :
+            if ((shift % 12) != 0) :
+              continue
+            shift = 0
+
+          hits[(start, shift)] = hits.get((start, shift), 0) + 1
+
+      candidates = {k for (k, v) in hits.items() if (v >= minHits)}
+
+    # Query too short or tolerance too high for the index to be selective:
+    # all locations are candidates.
+    # The transposition is taken from the lowest notes of the chords.
+    else :
+      for start in range(lastStart + 1) :
+        if transpose :
+          for i in range(Q) :
+            if (self.bass[start+i] >= 0) :
+              candidates.add((start, self.bass[start+i] - queryBass[i]))
+        else :
+          candidates.add((start, 0))
+
+    # STEP 2: verification (exact pitches)
+    best = {}
+    for (start, shift) in candidates :
+      cost = 0
+      for i in range(Q) :
+        shifted = (queryBits[i] << shift) if (shift >= 0) else (queryBits[i] >> -shift)
+        cost += (shifted ^ self.chordBits[start+i]).bit_count()
+        if (cost > tolerance) :
+          break
+
+      if (cost <= tolerance) :
+        if not(start in best) or ((cost, abs(shift)) < (best[start][0], abs(best[start][1]))) :
+          best[start] = (cost, shift)
+
+    # Ranking: cost, then the smallest transposition, then the location
+    ranking = sorted(best.items(), key = lambda x: (x[1][0], abs(x[1][1]), x[0]))
+    return [(int(self.cursors[start]), cost, shift) for (start, (cost, shift)) in ranking]
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD PassageIndex._getFingerprint()                             [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getFingerprint(self, pcMasks: list[int], bass: int) :
+    """
+    Returns the fingerprint of a sequence of chords (pitch class masks)
+    relatively to the lowest note of the first chord ('bass').
+    Returns None if one of the chords is empty.
+    """
+
+    if ((bass < 0) or (0 in pcMasks)) :
+      return None
+
+    r = bass % 12
+    return tuple(((m >> r) | (m << (12 - r))) & 0xFFF for m in pcMasks)
+
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# FUNCTION getBass()
+# -----------------------------------------------------------------------------
+def getBass(chordBits: int) -> int :
+  """
+  Returns the lowest note of a chord (128-bit mask), -1 if the chord is empty.
+  """
+
+  return (chordBits & -chordBits).bit_length() - 1
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION getPitchClassMask()
+# -----------------------------------------------------------------------------
+def getPitchClassMask(chordBits: int) -> int :
+  """
+  Returns the pitch class set (12-bit mask) of a chord (128-bit mask)
+  """
+
+  mask = 0
+  while chordBits :
+    mask |= chordBits & 0xFFF
+    chordBits >>= 12
+
+  return mask
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'passageSearch.py'")
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : saveWorker
+# File name     : saveWorker.py
+# File type     : Python script (Python 3)
+# Purpose       : writes the files in a background thread
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# Serializing a large score (JSON, 1-3 MB) takes a few hundred milliseconds:
+# done in the main loop, it freezes the display and delays the processing of
+# the MIDI events.
+#
+# The save worker runs the writes in a background thread, one after the other.
+# The caller must hand over a snapshot of the data (copies): the thread never
+# reads the live state of the app.
+#
+# The outcome of each write is collected in the main loop ('SaveWorker.poll()')
+# so that the app can react to it (update the journal, print a message etc.)
+#
+# Files are written under a temporary name then renamed: a file is never seen
+# half written, even if the app is killed during the write.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import json
+import os
+import queue
+import threading
+import time
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# None.
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class SaveWorker :
+
+  """
+  SAVE_WORKER object
+
+  Background thread running the writes submitted with 'SaveWorker.submit()'
+  The thread is started on the first submission.
+  """
+
+  def __init__(self) :
+
+    self.jobs     = queue.Queue()
+    self.results  = queue.Queue()
+    self.inFlight = 0         # Number of jobs submitted and not polled yet (main thread only)
+    self.thread   = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SaveWorker.submit()
+  # ---------------------------------------------------------------------------
+  def submit(self, function, *args, tag = None) -> None :
+    """
+    Queues the call 'function(*args)'. It runs in the background thread.
+
+    'tag' is any object identifying the job: it is returned along with the
+    outcome of the call by 'SaveWorker.poll()'
+    """
+
+    if self.thread is None :
+      self.thread = threading.Thread(target = self._run, name = "saveWorker", daemon = True)
+      self.thread.start()
+
+    self.inFlight += 1
+    self.jobs.put((function, args, tag))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SaveWorker.poll()
+  # ---------------------------------------------------------------------------
+  def poll(self) -> list[tuple] :
+    """
+    Returns the jobs completed since the last call (non blocking), as a list
+    of tuples (tag, output, error, duration)
+    'error' is None if the call succeeded, the exception raised otherwise.
+    """
+
+    done = []
+    while True :
+      try :
+        done.append(self.results.get_nowait())
+      except queue.Empty :
+        break
+
+    self.inFlight -= len(done)
+    return done
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SaveWorker.wait()
+  # ---------------------------------------------------------------------------
+  def wait(self) -> list[tuple] :
+    """
+    Blocks until all the submitted jobs are done.
+    Returns the completed jobs (see 'SaveWorker.poll()')
+    """
+
+    if (self.inFlight > 0) :
+      self.jobs.join()
+
+    return self.poll()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SaveWorker.isBusy()
+  # ---------------------------------------------------------------------------
+  def isBusy(self) -> bool :
+    """
+    Returns True if some jobs are not completed (or not polled) yet.
+    """
+
+    return (self.inFlight > 0)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SaveWorker._run()                                          [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _run(self) -> None :
+    """
+    Main loop of the background thread.
+    """
+
+    while True :
+      (function, args, tag) = self.jobs.get()
+
+      t0 = time.perf_counter()
+      (output, error) = (None, None)
+      try :
+        output = function(*args)
+      except Exception as err :
+        error = err
+
+      self.results.put((tag, output, error, time.perf_counter() - t0))
+      self.jobs.task_done()
+
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# FUNCTION writeJson()
+# -----------------------------------------------------------------------------
+def writeJson(exportFile: str, data: dict) -> None :
+  """
+  Writes 'data' in a JSON file.
+
+  The file is written under a temporary name first then renamed, so that
+  the previous version is kept if the write fails.
+  """
+
+  tmpFile = str(exportFile) + ".tmp"
+  try :
+    with open(tmpFile, "w") as fileHandler :
+      json.dump(data, fileHandler, indent = 2)
+      fileHandler.flush()
+      os.fsync(fileHandler.fileno())
+    os.replace(tmpFile, exportFile)
+
+  except :
+    if os.path.exists(tmpFile) :
+      os.remove(tmpFile)
+    raise
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'saveWorker.py'")
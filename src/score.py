@@ -17,16 +17,23 @@
 # Project libraries
 from src.commons import *
 import src.widgets.widget as widget
+import src.gq3Cache as gq3Cache
+import src.gq3Journal as gq3Journal
+import src.lookahead as lookahead
 import src.note as note
+import src.noteStore as noteStore
+import src.passageSearch as passageSearch
+import src.saveWorker as saveWorker
+import src.sectionIndex as sectionIndex
+import src.smfParser as smfParser
+import src.tempoMap as tempoMap
 import src.text as text
 
 # Standard libraries
 import copy                       # mostly used in deprecated functions
 import datetime
-import heapq
-from itertools import groupby     # for fast database manipulation
 import json                       # for .gq3 file database import/export
-import mido                       # for MIDI file manipulation
+import numpy as np                # for the binary cache columns
 import os                         # for filename manipulation
 from pathlib import Path          # for path/filename/extensions manipulation
 import pygame
@@ -38,7 +45,9 @@ import time
 # =============================================================================
 # CONSTANTS
 # =============================================================================
-# None.
+# Flags of the entries of the teacher notes table (see 'Score._buildTeacherTable()')
+TEACHER_FLAG_SUSTAINED  = 1
+TEACHER_FLAG_INACTIVE   = 2
 
 
 
@@ -87,8 +96,10 @@ class Score(widget.Widget) :
 
     # Pointer in the score
     self.cursor       = 0         # Range: 0 ... Score.cursorMax
-    self.cursorsLeft  = []
-    self.cursorsRight = []
+    self.cursorsLeft  = np.zeros(0, dtype = np.int32)
+    self.cursorsRight = np.zeros(0, dtype = np.int32)
+    self.cursorToIndexLeft  = np.zeros(0, dtype = np.int32)
+    self.cursorToIndexRight = np.zeros(0, dtype = np.int32)
     self.bookmarks    = []
     self.cursorMax    = 0
     self.length       = 0
@@ -97,20 +108,31 @@ class Score(widget.Widget) :
     self.fingeredNoteCount  = 0
 
     # Internal representation
-    self.noteList = []                  # Full list of all notes (no particular ordering)
+    self.noteStore = noteStore.NoteStore()  # Note database (see 'noteStore.py')
+    self.noteList = []                  # Full list of all notes (NoteView objects, sorted by ascending start time)
     self.notesByCursor_pressed = []     # List of notes pressed at a given cursor. Each entry is a cursor value.
-    self.notesByCursor_active = []      # List of notes active (i.e. pressed or sustained) at a given cursor. Each entry is a cursor value.
+    self.notesByCursor_activeIndices = np.zeros(0, dtype = np.int32)  # Notes active (i.e. pressed or sustained) at a given cursor (CSR table, see 'Score._buildNotesByCursor()')
+    self.notesByCursor_activeOffsets = np.zeros(1, dtype = np.int64)
+    self.chordMasks = {}                # Pitches pressed at a given cursor as 128-bit masks, per hand (see 'Score._buildChordIndex()')
+    self.cursorsByPitch_indices = np.zeros(0, dtype = np.int32)       # Cursors where a given pitch is pressed (CSR table, see 'Score._buildChordIndex()')
+    self.cursorsByPitch_offsets = np.zeros(129, dtype = np.int64)
+    self.passageIndex = {}              # Passage search index, per hand (built on demand, see 'Score.searchPassage()')
     self.noteOnTimecodes = {
       "L"       : [],   # Timecodes for the left hand keypresses
       "R"       : [],   # Timecodes for the right hand keypresses
       "LR"      : [],   # Timecodes for the left and right hand keypresses (merged, no duplicates)
       "LR_full" : []    # Timecodes for the left and right hand keypresses (merged, with duplicates)
     }
+    self.tempoMap = tempoMap.TempoMap() # Conversion of the timecodes to seconds (see 'tempoMap.py')
 
     # Options for Score.getTeacherNotes()
+    self.teacherTable = {}              # Teacher notes at a given cursor, per hand (see 'Score._buildTeacherTable()')
     self.teacherNotes = []
-    self.teacherNotesCursor = -1
-    self.lookAheadDistance = 0
+    self.teacherNotesKey = None         # (cursor, active hands) of the 'teacherNotes' list
+    self.teacherPitchIDs = (0, {})
+    self.teacherPitchIDsKey = None      # (cursor, active hands) of the 'teacherPitchIDs' table
+    self.lookAheadDistance = 0          # Number of cursors shown ahead of the current one (0: disabled)
+    self.lookahead = lookahead.LookaheadWindow()
     self.activeHands = "LR"
     
     # Sections in the score
@@ -118,6 +140,11 @@ class Score(widget.Widget) :
     self.sectionKey = []
     self.sectionArpeggio = []
     self.sectionTempo = []
+    self.sectionIndex = {           # Section of each cursor, per type of section (see 'Score._buildSectionIndex()')
+      "arpeggio"  : sectionIndex.SectionIndex([], 0),
+      "tempo"     : sectionIndex.SectionIndex([], 0),
+      "key"       : sectionIndex.SectionIndex([], 0)
+    }
     
     # Settings for the interaction with the cursor
     self.loopStart = -1
@@ -128,6 +155,23 @@ class Score(widget.Widget) :
     self.hasUnsavedChanges = False
     self.avgNoteDuration = 0
 
+    # Journal of the edits (see 'gq3Journal.py')
+    # Only available for the scores loaded from a '.gq3' file.
+    self.journal = None
+    self.lastEditTime = time.time()
+    self.editCount = 0            # Incremented at each edit (tells the widgets to redraw)
+    self.noteStore.onEdit = self._onNoteEdit
+
+    # Files are written in the background (see 'saveWorker.py')
+    self.saveWorker = saveWorker.SaveWorker()
+    self.lastAutosaveTime = time.time()
+
+    # Areas of the screen drawn by the widget: status lines (top and bottom)
+    self.renderRects = [
+      pygame.Rect(0, 18, GUI_SCREEN_WIDTH, 18),
+      pygame.Rect(0, 468, GUI_SCREEN_WIDTH, 18)
+    ]
+
 
 
   # ---------------------------------------------------------------------------
@@ -149,7 +193,7 @@ class Score(widget.Widget) :
       self.bookmarks.append(self.cursor)
       self.bookmarks.sort()
 
-    self.hasUnsavedChanges = True
+    self._onTableEdit("bookmarks")
 
 
 
@@ -171,6 +215,7 @@ class Score(widget.Widget) :
     """
 
     self.songFile = midiFile
+    self._journalDetach()
 
     print("[INFO] Importing MIDI file... ")
     
@@ -178,7 +223,11 @@ class Score(widget.Widget) :
     startTime = time.time()
 
     # Open MIDI file
-    midiData = mido.MidiFile(midiFile)
+    # NOTE: the track selection GUI has already parsed the file, the result is
+    # reused.
+    midiData = smfParser.load(midiFile)
+    self.tempoMap = tempoMap.fromSmf(midiData)
+    print(f"- tempo map: {len(self.tempoMap.ticks)} tempo changes ({midiData.ticksPerBeat} ticks per beat)")
 
     # Initialise attributes
     self.noteList = []
@@ -194,9 +243,6 @@ class Score(widget.Widget) :
     insertIndex = 0
     noteTracker = NoteTracker()
 
-    tmpNotesByTimecodeList = {}
-    tmpIndex = 0
-
     # Loop on the tracks
     for (i, track) in enumerate(midiData.tracks) :
       
@@ -205,24 +251,28 @@ class Score(widget.Widget) :
         if (midiTracks[i] == "R") : trackID = note.hand_T.RIGHT
         if (midiTracks[i] == "L") : trackID = note.hand_T.LEFT
       
-        # Loop on the notes within a track
-        currTime = 0
-        currTempo = 0
-        for msg in track :
+        # MIDI EVENT: time signature change
+        for (currTime, numerator, denominator) in track.timeSignatures :
+          print(f"- Track {i}, read time signature: {numerator}/{denominator} (timecode = {currTime})")
 
-          currTime += msg.time
+        # MIDI EVENT: key signature change
+        for (currTime, key) in track.keySignatures :
+          print(f"- Track {i}, read key signature: {key} (timecode = {currTime})")
+
+        # Loop on the notes within a track
+        # NOTE: control changes etc. are not used. Tempo changes are in the 
+        # tempo map.
+        noteEvents = zip(track.noteTime.tolist(), track.notePitch.tolist(), track.noteVelocity.tolist())
+        for (currTime, pitch, velocity) in noteEvents :
 
-          if (msg.type in ["note_on", "note_off"]) :
-            pitch = msg.note
-          
           # MIDI EVENT: keypress
-          if ((msg.type == "note_on") and (msg.velocity > 0)) :
+          if (velocity > 0) :
             
             # Create and edit the note             
             N = note.Note(pitch)
             N.hand      = trackID
             N.dbIndex   = insertIndex
-            N.velocity  = msg.velocity
+            N.velocity  = velocity
             N.id        = insertIndex
             
             # Register the note in the database
@@ -238,38 +288,9 @@ class Score(widget.Widget) :
             if (trackID == note.hand_T.LEFT)  : self.noteOnTimecodes["L"].append(currTime)
             if (trackID == note.hand_T.RIGHT) : self.noteOnTimecodes["R"].append(currTime)
 
-            # TEST CODE
-            if not(currTime in tmpNotesByTimecodeList.keys()) :
-              tmpNotesByTimecodeList[currTime] = [N]
-            else :
-              tmpNotesByTimecodeList[currTime].append(N)
-
-            
-          # MIDI EVENT: key release
-          elif ((msg.type == "note_off") or ((msg.type == "note_on") and (msg.velocity == 0))) : 
+          # MIDI EVENT: key release ('note off' or 'note on' with null velocity)
+          else : 
             noteTracker.keyRelease(pitch, trackID, currTime)
-
-          # MIDI EVENT: time signature change
-          elif (msg.type == 'time_signature') :
-            print(f"- Track {i}, read time signature: {msg.numerator}/{msg.denominator} (timecode = {currTime})")
-            #eventTime = mido.tick2second(current_time, ticks_per_beat, tempo) for a display in seconds
-
-          # MIDI EVENT: key signature change
-          elif (msg.type == 'key_signature') :
-            print(f"- Track {i}, read key signature: {msg.key} (timecode = {currTime})")
-
-          # MIDI EVENT: tempo change (IGNORED: too verbose)
-          elif (msg.type == 'set_tempo') :
-            #print(f"- read new tempo: {msg.tempo} (timecode = {currTime})")
-            currTempo = msg.tempo
-
-          # MIDI EVENT: control change (IGNORED: no use for it)
-          elif (msg.type == 'control_change') :
-            pass
-
-          # MIDI EVENT: program change (IGNORED: no use for it)
-          elif (msg.type == 'program_change') :
-            pass
       
       # The track is not assigned to any hand
       else :
@@ -278,6 +299,10 @@ class Score(widget.Widget) :
     # MIDI read done: inspect the note tracking before closing
     noteTracker.checkOnExit()
 
+    # Move the notes to the note database
+    self.noteStore.loadFromNotes(self.noteList)
+    self.noteList = self.noteStore.getViews()
+
     # Tidy up:
     # - sort the timecodes by ascending values
     # - remove duplicate entries
@@ -294,6 +319,15 @@ class Score(widget.Widget) :
     # Build the 'notesByCursor_XXX' attributes
     self._buildNotesByCursor()
 
+    # Build the teacher notes table
+    self._buildTeacherTable()
+
+    # Build the section lookup tables
+    self._buildSectionIndex()
+
+    # Build the index for the chord search
+    self._buildChordIndex()
+
     # Estimate average note duration (needed for the pianoroll display)
     #self.avgNoteDuration = noteDuration/noteCount
     self.avgNoteDuration = 100
@@ -332,6 +366,7 @@ class Score(widget.Widget) :
     """
     
     self.songFile = prFile
+    self._journalDetach()
 
     # For statistics
     startTime = time.time()
@@ -346,6 +381,9 @@ class Score(widget.Widget) :
     revMinor = int(rev[1])
     print(f"[WARNING] .PR FILES WILL BE DEPRECATED IN FUTURE RELEASES.")
     print(f"[INFO] Reading gangQin v{revMajor}.{revMinor} file...")
+
+    # .pr files do not store the tempo: it is read from the MIDI file
+    self.tempoMap = self._getTempoMap(prFile, None)
     
     # Fallback dictionary in case some fields do not exist.
     safeDict = {
@@ -418,8 +456,10 @@ class Score(widget.Widget) :
       if (N.hand == note.hand_T.LEFT)  : self.noteOnTimecodes["L"].append(N.startTime)
       if (N.hand == note.hand_T.RIGHT) : self.noteOnTimecodes["R"].append(N.startTime)
 
-    # Sort notes by ascending keypress timecode
-    self.noteList = sorted(noteListTmp, key = lambda noteObj: noteObj.startTime)
+    # Move the notes to the note database
+    # (the store sorts them by ascending keypress timecode)
+    self.noteStore.loadFromNotes(noteListTmp)
+    self.noteList = self.noteStore.getViews()
 
     # TODO: 
     # At the time, MIDI file import had a very different strategy
@@ -460,6 +500,15 @@ class Score(widget.Widget) :
     # Build the 'notesByCursor_XXX' attributes
     self._buildNotesByCursor()
 
+    # Build the teacher notes table
+    self._buildTeacherTable()
+
+    # Build the section lookup tables
+    self._buildSectionIndex()
+
+    # Build the index for the chord search
+    self._buildChordIndex()
+
     self.length = len(self.noteOnTimecodes["LR"])
     self.cursorMax = self.length-1
 
@@ -493,6 +542,96 @@ class Score(widget.Widget) :
     # For statistics
     startTime = time.time()
     
+    # Try the binary cache first (see 'gq3Cache.py')
+    # It is rebuilt from the JSON if missing or outdated.
+    cache = gq3Cache.load(gq3File)
+    if cache is not None :
+      (columns, meta) = cache
+      print("[INFO] Score loaded from the cache file.")
+    else :
+      (columns, meta) = self._readGq3Columns(gq3File)
+      gq3Cache.build(gq3File, columns, meta)
+
+    # Initialize the object
+    self.cursor           = int(meta["cursor"])
+    self.tempoMap         = self._getTempoMap(gq3File, meta.get("tempoMap"))
+    self.bookmarks        = np.asarray(columns["bookmarks"]).tolist()
+    self.sectionTempo     = np.asarray(columns["tempoSections"]).tolist()
+    self.sectionArpeggio  = np.asarray(columns["arpeggioSections"]).tolist()
+    
+    # Load the note database
+    self.noteStore.load(columns)
+    self.noteList = self.noteStore.getViews()
+    noteCount = len(self.noteStore)
+
+    # Replay the edits made since the last compaction
+    self._journalDetach()
+    self.journal = gq3Journal.Gq3Journal(gq3File)
+    self._journalReplay()
+
+    # Count the number of notes with a finger value attached (~ progress score)
+    fingeredNoteCount = int(np.count_nonzero(self.noteStore.finger != note.finger_T.UNDEFINED.value))
+
+    # Timecodes, sorted by ascending values
+    # "LR" is the same as "LR_full" without the duplicate entries.
+    startTimeArr = self.noteStore.startTime
+    handArr = self.noteStore.hand
+    self.noteOnTimecodes = {
+      "L"       : np.sort(startTimeArr[handArr == note.hand_T.LEFT.value]).tolist(),
+      "R"       : np.sort(startTimeArr[handArr == note.hand_T.RIGHT.value]).tolist(),
+      "LR"      : np.unique(startTimeArr).tolist(),
+      "LR_full" : np.sort(startTimeArr).tolist()
+    }
+
+    # Build "cursorsLeft" and "cursorsRight" arrays.
+    # Each one is a list of all cursors where something has to be played 
+    # either on the left (cursorsLeft) or right hand (cursorsRight)
+    self._buildCursorsLR()
+
+    # Build the 'notesByCursor_pressed' attributes
+    self._buildNotesByCursor()
+
+    # Build the teacher notes table
+    self._buildTeacherTable()
+
+    # Build the section lookup tables
+    self._buildSectionIndex()
+
+    # Build the index for the chord search
+    self._buildChordIndex()
+
+    self.length = len(self.noteOnTimecodes["LR"])
+    self.cursorMax = self.length-1
+
+    self.noteCount          = noteCount
+    self.fingeredNoteCount  = fingeredNoteCount
+
+    # TODO: 'checksum': compare the notecount values
+
+
+    stopTime = time.time()
+    print(f"[INFO] Loading time: {stopTime-startTime:.2f}s")
+    print(f"[INFO] {noteCount} notes read from .gq3 file.")
+    print(f"[INFO] Score length: {self.length} steps")
+    
+    print(f"[INFO] Progress: {fingeredNoteCount}/{noteCount} ({100*fingeredNoteCount/noteCount:.1f}%)")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._readGq3Columns()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _readGq3Columns(self, gq3File: str) -> tuple[dict, dict] :
+    """
+    Parses a '.gq3' file (JSON) and returns its content as a tuple (columns, meta)
+    - 'columns': dictionary of NumPy arrays (one entry per note) and tables 
+      (bookmarks, sections)
+    - 'meta': dictionary with the remaining fields (appVersion, cursor, 
+      tempoMap)
+    
+    This is the format expected by 'gq3Cache.build()'.
+    """
+
     # Open the file as a JSON (because that's what it is)
     with open(gq3File, "r") as fileHandler :
       importDict = json.load(fileHandler)
@@ -521,77 +660,31 @@ class Score(widget.Widget) :
       if currKey in importDict :
         safeDict[currKey] = importDict[currKey]
 
-    # Initialize the object
-    self.cursor           = safeDict["cursor"]
-    self.bookmarks        = safeDict["bookmarks"]
-    self.sectionTempo     = safeDict["tempoSections"]
-    self.sectionArpeggio  = safeDict["arpeggioSections"]
-    
     if (len(safeDict["noteList"]) != len(safeDict["timecodeList"])) :
       print("[ERROR] The list of notes and list of timecodes don't match (internal error or bad manual edition in .gq3 file)")
       exit()
-    
-    noteCount = 0
-    fingeredNoteCount = 0
-    self.noteOnTimecodes = {"L": [], "R": [], "LR": [], "LR_full": []}
-    self.noteList = []
-    for (i, noteAsDict) in enumerate(safeDict["noteList"]) :
-      N = note.Note(noteAsDict["pitch"])
-      N.hand      = note.hand_T(noteAsDict["hand"])
-      N.finger    = note.finger_T(noteAsDict["finger"])
-      N.voice     = noteAsDict["voice"]
-      N.startTime = safeDict["timecodeList"][i]["startTime"]
-      N.stopTime  = safeDict["timecodeList"][i]["stopTime"]
-      N.id        = i
-      self.noteList.append(N)
 
-      # Count the number of notes with a finger value attached (~ progress score)
-      if (N.finger != note.finger_T.UNDEFINED) : fingeredNoteCount += 1
-
-      if (N.hand == note.hand_T.LEFT) :
-        self.noteOnTimecodes["L"].append(N.startTime)
-      elif (N.hand == note.hand_T.RIGHT) :
-        self.noteOnTimecodes["R"].append(N.startTime)
-      else :
-        pass
-
-      self.noteOnTimecodes["LR_full"].append(N.startTime)
-
-      noteCount += 1
-
-    # Tidy up:
-    # - sort the timecodes by ascending values
-    # - remove duplicate entries
-    self.noteOnTimecodes["L"].sort(); self.noteOnTimecodes["R"].sort()
-    self.noteOnTimecodes["LR_full"].sort()
-
-    self.noteOnTimecodes["LR"] = set(self.noteOnTimecodes["LR_full"])
-    self.noteOnTimecodes["LR"] = list(self.noteOnTimecodes["LR"])
-    self.noteOnTimecodes["LR"].sort()
-
-    # Build "cursorsLeft" and "cursorsRight" arrays.
-    # Each one is a list of all cursors where something has to be played 
-    # either on the left (cursorsLeft) or right hand (cursorsRight)
-    self._buildCursorsLR()
-
-    # Build the 'notesByCursor_pressed' attributes
-    self._buildNotesByCursor()
-
-    self.length = len(self.noteOnTimecodes["LR"])
-    self.cursorMax = self.length-1
-
-    self.noteCount          = noteCount
-    self.fingeredNoteCount  = fingeredNoteCount
-
-    # TODO: 'checksum': compare the notecount values
+    noteList = safeDict["noteList"]
+    timecodeList = safeDict["timecodeList"]
+    columns = {
+      "pitch"             : np.array([x["pitch"] for x in noteList], dtype = np.int8),
+      "hand"              : np.array([x["hand"] for x in noteList], dtype = np.int8),
+      "finger"            : np.array([x["finger"] for x in noteList], dtype = np.int8),
+      "voice"             : np.array([x["voice"] for x in noteList], dtype = np.int8),
+      "startTime"         : np.array([x["startTime"] for x in timecodeList], dtype = np.int64),
+      "stopTime"          : np.array([x["stopTime"] for x in timecodeList], dtype = np.int64),
+      "bookmarks"         : safeDict["bookmarks"],
+      "tempoSections"     : safeDict["tempoSections"],
+      "arpeggioSections"  : safeDict["arpeggioSections"]
+    }
 
+    meta = {
+      "appVersion"  : safeDict["appVersion"],
+      "cursor"      : safeDict["cursor"],
+      "tempoMap"    : importDict.get("tempoMap")
+    }
 
-    stopTime = time.time()
-    print(f"[INFO] Loading time: {stopTime-startTime:.2f}s")
-    print(f"[INFO] {noteCount} notes read from .gq3 file.")
-    print(f"[INFO] Score length: {self.length} steps")
-    
-    print(f"[INFO] Progress: {fingeredNoteCount}/{noteCount} ({100*fingeredNoteCount/noteCount:.1f}%)")
+    return (columns, meta)
 
 
 
@@ -608,21 +701,27 @@ class Score(widget.Widget) :
     value being in the file.
     """
     
-    self.cursorsLeft  = []
-    self.cursorsRight = []
+    # EXPLANATION
+    # All timecode lists are sorted: the membership test of every 'LR' timecode 
+    # in the 'L' and 'R' lists is done in one go (sort-based, O(N.log(N))) 
+    # instead of scanning the lists for each timecode.
+    timecodesLR = np.asarray(self.noteOnTimecodes["LR"], dtype = np.int64)
+    isLeft  = np.isin(timecodesLR, np.asarray(self.noteOnTimecodes["L"], dtype = np.int64))
+    isRight = np.isin(timecodesLR, np.asarray(self.noteOnTimecodes["R"], dtype = np.int64))
 
-    for (index, timecode) in enumerate(self.noteOnTimecodes["LR"]) :
-      unassigned = True
-      if (timecode in self.noteOnTimecodes["L"]) :
-        self.cursorsLeft.append(index)
-        unassigned = False
+    # Cursors are stored as compact (sorted) integer arrays
+    self.cursorsLeft  = np.flatnonzero(isLeft).astype(np.int32)
+    self.cursorsRight = np.flatnonzero(isRight).astype(np.int32)
 
-      if (timecode in self.noteOnTimecodes["R"]) :
-        self.cursorsRight.append(index)
-        unassigned = False
-      
-      if unassigned :
-        print("[ERROR] Score._buildCursorsLR(): a note was found with an unlisted time code (INTERNAL ERROR)")
+    # Reverse lookup tables: cursor -> index in 'cursorsLeft'/'cursorsRight'
+    # (-1 if nothing is played on that hand at this cursor)
+    self.cursorToIndexLeft  = np.full(len(timecodesLR), -1, dtype = np.int32)
+    self.cursorToIndexRight = np.full(len(timecodesLR), -1, dtype = np.int32)
+    self.cursorToIndexLeft[self.cursorsLeft]   = np.arange(len(self.cursorsLeft), dtype = np.int32)
+    self.cursorToIndexRight[self.cursorsRight] = np.arange(len(self.cursorsRight), dtype = np.int32)
+
+    if not(np.all(isLeft | isRight)) :
+      print("[ERROR] Score._buildCursorsLR(): a note was found with an unlisted time code (INTERNAL ERROR)")
 
 
 
@@ -644,44 +743,342 @@ class Score(widget.Widget) :
     """
 
     print("[DEBUG] Generating the 'pressed notes' table...", end = " ")
-    noteListSorted = sorted(self.noteList, key = lambda x: x.startTime)
     
     # EXPLANATION
-    # > groupby(..., key = lambda x: x.startTime) 
-    #   Groups together the input elements that have a certain attribute (here: startTime) matching.
-    #   In order to be grouped together, elements with matching attribute MUST be consecutive.
-    #   Therefore the sorting prior to this command.
-    #   It outputs an iterator.
-    self.notesByCursor_pressed = [list(group) for (_, group) in groupby(noteListSorted, key = lambda x: x.startTime)]
+    # The note database is sorted by ascending start time: notes pressed at the 
+    # same time are consecutive. 
+    # 'np.unique' gives the index of the first note of each group.
+    startTimes = self.noteStore.startTime
+    stopTimes  = self.noteStore.stopTime
+    (uniqueTimes, groupStart) = np.unique(startTimes, return_index = True)
+    bounds = groupStart.tolist() + [len(self.noteList)]
+    self.notesByCursor_pressed = [self.noteList[a:b] for (a, b) in zip(bounds[:-1], bounds[1:])]
+    self.lookahead.load(self.noteStore, self.notesByCursor_pressed)
     print("Done")
 
 
 
     print("[DEBUG] Generating the 'active notes' table...", end = " ")
-    unique_times = sorted(set(n.startTime for n in noteListSorted))
+    
+    # EXPLANATION
+    # The table is stored in a 'compressed sparse row' fashion:
+    # - 'notesByCursor_activeIndices': indices (in 'Score.noteList') of the active
+    #   notes, all cursors concatenated
+    # - 'notesByCursor_activeOffsets': the active notes at cursor 'c' are
+    #   the entries from 'offsets[c]' to 'offsets[c+1]' (excluded)
+    # A note is active at all cursors between its keypress and its release.
+    # Sustained notes are not repeated in a list for each cursor anymore: 
+    # each entry only takes a single integer.
+
+    # Range of cursors [first, last] where each note is active
+    # (a note released before the next keypress is active at its own cursor only)
+    first = np.searchsorted(uniqueTimes, startTimes, side = "left")
+    last  = np.searchsorted(uniqueTimes, stopTimes, side = "right") - 1
+    span  = np.maximum(last - first + 1, 0)
+
+    # Expand the ranges to (note, cursor) pairs
+    entryCount  = int(span.sum())
+    entryStart  = np.cumsum(span) - span
+    noteIndex   = np.repeat(np.arange(len(span)), span)
+    cursorIndex = np.repeat(first, span) + (np.arange(entryCount) - np.repeat(entryStart, span))
+
+    # Group the pairs by cursor (the sort is stable: notes remain sorted by 
+    # keypress time within a cursor)
+    perm = np.argsort(cursorIndex, kind = "stable")
+    self.notesByCursor_activeIndices = noteIndex[perm].astype(np.int32)
+    self.notesByCursor_activeOffsets = np.zeros(len(uniqueTimes) + 1, dtype = np.int64)
+    np.cumsum(np.bincount(cursorIndex, minlength = len(uniqueTimes)), out = self.notesByCursor_activeOffsets[1:])
+    
+    # The table is shared as views to the clients: make it read-only
+    self.notesByCursor_activeIndices.flags.writeable = False
+    self.notesByCursor_activeOffsets.flags.writeable = False
+    print("Done")
+    print()
 
-    self.notesByCursor_active = []
-    heap    = []   # min-heap of (stopTime, counter, note)
-    counter = 0    # tiebreaker (avoids comparing Note objects directly)
-    ptr     = 0    # rolling index into notes_sorted
 
-    for T in unique_times :
 
-      # Step 1: Admit all notes whose startTime <= T into the active heap
-      while (ptr < len(noteListSorted) and noteListSorted[ptr].startTime <= T) :
-        n = noteListSorted[ptr]
-        heapq.heappush(heap, (n.stopTime, counter, n))
-        counter += 1
-        ptr += 1
+  # ---------------------------------------------------------------------------
+  # METHOD Score._buildTeacherTable()                                 [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _buildTeacherTable(self) -> None :
+    """
+    Builds the table of the teacher notes (notes to play at a given cursor)
+    for each active hands setting (L, R, LR).
 
-      # Step 2: Evict notes that finished strictly before T
-      while heap and heap[0][0] < T:
-        heapq.heappop(heap)
+    Each table ('Score.teacherTable[hands]') is a dictionary of arrays:
+    - 'indices', 'offsets': indices of the teacher notes of each cursor
+      (CSR layout, see 'Score._buildNotesByCursor()')
+    - 'flags': attributes of each entry (TEACHER_FLAG_SUSTAINED, TEACHER_FLAG_INACTIVE)
+    - 'pitchMask': for each cursor, the pitches to play as a 128-bit mask 
+      (2 words of 64 bits). Sustained and inactive notes are excluded.
 
-      # Step 3: Everything remaining in the heap is active at T
-      self.notesByCursor_active.append([n for (_, _, n) in heap])
-    print("Done")
-    print()
+    The table is updated incrementally when the hand of a note changes 
+    (see 'Score._updateTeacherTable()')
+    """
+
+    cursorCount = len(self.notesByCursor_activeOffsets) - 1
+    
+    self.teacherTable = {}
+    for hands in [SCORE_ACTIVE_HANDS_BOTH, SCORE_ACTIVE_HANDS_LEFT, SCORE_ACTIVE_HANDS_RIGHT] :
+      (cursorIndex, indices, flags) = self._getTeacherEntries(0, cursorCount, hands)
+      
+      offsets = np.zeros(cursorCount + 1, dtype = np.int64)
+      np.cumsum(np.bincount(cursorIndex, minlength = cursorCount), out = offsets[1:])
+      
+      self.teacherTable[hands] = {
+        "indices"   : indices,
+        "offsets"   : offsets,
+        "flags"     : flags,
+        "pitchMask" : self._getTeacherPitchMask(cursorIndex, indices, flags, cursorCount)
+      }
+
+    self.teacherNotesKey = None
+    self.teacherPitchIDsKey = None
+
+    # Detect cursors without teacher notes.
+    # This is not supposed to happen.
+    emptyCount = int(np.count_nonzero(np.diff(self.teacherTable[SCORE_ACTIVE_HANDS_BOTH]["offsets"]) == 0))
+    if (emptyCount > 0) :
+      print(f"[WARNING] Score._buildTeacherTable(): {emptyCount} cursors without teacher notes, possible internal error.")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._updateTeacherTable()                                [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _updateTeacherTable(self, noteIndex: int) -> None :
+    """
+    Updates the teacher notes table after the hand of a note has changed.
+    Only the cursors where the note is active are processed.
+
+    NOTE: the number of teacher notes at a cursor does not depend on the hands:
+    the entries are rewritten in place.
+    """
+
+    timecodesLR = np.asarray(self.noteOnTimecodes["LR"], dtype = np.int64)
+    cursorBegin = int(np.searchsorted(timecodesLR, self.noteStore.startTime[noteIndex], side = "left"))
+    cursorEnd   = int(np.searchsorted(timecodesLR, self.noteStore.stopTime[noteIndex], side = "right"))
+
+    # The hands only matter in single hand practice
+    for hands in [SCORE_ACTIVE_HANDS_LEFT, SCORE_ACTIVE_HANDS_RIGHT] :
+      table = self.teacherTable[hands]
+      (cursorIndex, indices, flags) = self._getTeacherEntries(cursorBegin, cursorEnd, hands)
+      
+      a = table["offsets"][cursorBegin]
+      b = table["offsets"][cursorEnd]
+      table["indices"][a:b] = indices
+      table["flags"][a:b]   = flags
+      table["pitchMask"][cursorBegin:cursorEnd] = self._getTeacherPitchMask(cursorIndex - cursorBegin, indices, flags, cursorEnd - cursorBegin)
+
+    self.teacherNotesKey = None
+    self.teacherPitchIDsKey = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._getTeacherEntries()                                 [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getTeacherEntries(self, cursorBegin: int, cursorEnd: int, hands: str) -> tuple :
+    """
+    Returns the teacher notes of the cursors in [cursorBegin, cursorEnd) for
+    an active hands setting, as 3 arrays: cursor, note index and flags of 
+    each entry (sorted by cursor)
+
+    At a given cursor, the teacher notes are:
+    - the notes pressed at this cursor. In single hand practice, the notes of
+      the other hand are flagged 'inactive'.
+    - then, the notes pressed before and still held ('sustained')
+    Notes with a null duration are ignored (see https://github.com/evernost/gangQin/issues/22)
+    When several notes of the same pitch are pressed at the same cursor, only
+    one is kept: the one on an active hand, then the longest one.
+    """
+
+    a = self.notesByCursor_activeOffsets[cursorBegin]
+    b = self.notesByCursor_activeOffsets[cursorEnd]
+    indices     = self.notesByCursor_activeIndices[a:b].astype(np.int64)
+    cursorIndex = np.repeat(np.arange(cursorBegin, cursorEnd), np.diff(self.notesByCursor_activeOffsets[cursorBegin:(cursorEnd+1)]))
+
+    timecodes = np.asarray(self.noteOnTimecodes["LR"], dtype = np.int64)[cursorIndex]
+    startTime = self.noteStore.startTime[indices]
+    stopTime  = self.noteStore.stopTime[indices]
+    pitch     = self.noteStore.pitch[indices]
+    
+    pressed = (startTime == timecodes)
+    keep    = (startTime != stopTime) & (pressed | ((startTime < timecodes) & (stopTime >= timecodes)))
+
+    if (hands == SCORE_ACTIVE_HANDS_LEFT) :
+      inactive = (self.noteStore.hand[indices] != note.hand_T.LEFT.value)
+    elif (hands == SCORE_ACTIVE_HANDS_RIGHT) :
+      inactive = (self.noteStore.hand[indices] != note.hand_T.RIGHT.value)
+    else :
+      inactive = np.zeros(len(indices), dtype = bool)
+
+    # Competing notes (same pitch pressed at the same cursor): keep the first 
+    # one of each group after sorting
+    position = np.arange(len(indices))
+    order = np.lexsort((position, -stopTime, inactive, pitch, cursorIndex))
+    order = order[(keep & pressed)[order]]
+    isFirst = np.ones(len(order), dtype = bool)
+    isFirst[1:] = (cursorIndex[order][1:] != cursorIndex[order][:-1]) | (pitch[order][1:] != pitch[order][:-1])
+    
+    select = keep & ~pressed
+    select[order[isFirst]] = True
+
+    # Pressed notes first, then the sustained notes
+    out = np.flatnonzero(select)
+    out = out[np.lexsort((out, ~pressed[out], cursorIndex[out]))]
+
+    flags = np.where(pressed[out], 0, TEACHER_FLAG_SUSTAINED) | np.where(inactive[out], TEACHER_FLAG_INACTIVE, 0)
+    return (cursorIndex[out], indices[out].astype(np.int32), flags.astype(np.uint8))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._getTeacherPitchMask()                               [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getTeacherPitchMask(self, cursorIndex, indices, flags, cursorCount: int) :
+    """
+    Returns the 128-bit masks of the pitches to play (teacher notes not 
+    sustained, not inactive) for each cursor.
+    'cursorIndex' must start at 0.
+    """
+
+    masks = np.zeros((cursorCount, 2), dtype = np.uint64)
+    sel = (flags == 0)
+    pitch = self.noteStore.pitch[indices[sel]].astype(np.int64)
+    np.bitwise_or.at(masks, (cursorIndex[sel], pitch >> 6), np.left_shift(np.uint64(1), (pitch & 63).astype(np.uint64)))
+    
+    return masks
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._buildSectionIndex()                                 [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _buildSectionIndex(self) -> None :
+    """
+    Builds the lookup tables giving the section (arpeggio, tempo, key) of 
+    each cursor (see 'sectionIndex.py')
+
+    The sections must then be edited through these tables so that they stay
+    in sync (e.g. 'Score.sectionIndex["arpeggio"].add([start, end])')
+    """
+
+    cursorCount = len(self.noteOnTimecodes["LR"])
+    self.sectionIndex = {
+      "arpeggio"  : sectionIndex.SectionIndex(self.sectionArpeggio, cursorCount),
+      "tempo"     : sectionIndex.SectionIndex(self.sectionTempo, cursorCount),
+      "key"       : sectionIndex.SectionIndex(self.sectionKey, cursorCount)
+    }
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._buildChordIndex()                                   [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _buildChordIndex(self) -> None :
+    """
+    Builds the tables used by the chord search ('Score.search()', 'Score.searchAll()'):
+    - 'chordMasks': for each cursor, the pitches pressed at this cursor as a 
+      128-bit mask (2 words of 64 bits, bit 'p' is set if pitch 'p' is pressed). 
+      There is one table for each active hands setting (L, R, LR).
+    - 'cursorsByPitch_indices' and 'cursorsByPitch_offsets': for each pitch, 
+      the list of cursors where it is pressed (CSR layout, sorted by ascending
+      cursor)
+
+    The hand of a note changing only affects the masks of its cursor (see 
+    'Score._updateChordMasks()')
+    """
+
+    timecodesLR = np.asarray(self.noteOnTimecodes["LR"], dtype = np.int64)
+    cursorCount = len(timecodesLR)
+    pitch       = self.noteStore.pitch.astype(np.int64)
+    hand        = self.noteStore.hand
+    cursorIndex = np.searchsorted(timecodesLR, self.noteStore.startTime)
+
+    # Masks: bit (pitch % 64) of word (pitch // 64)
+    word = pitch >> 6
+    bit  = np.left_shift(np.uint64(1), (pitch & 63).astype(np.uint64))
+    handSelect = {
+      SCORE_ACTIVE_HANDS_BOTH   : np.ones(len(pitch), dtype = bool),
+      SCORE_ACTIVE_HANDS_LEFT   : (hand == note.hand_T.LEFT.value),
+      SCORE_ACTIVE_HANDS_RIGHT  : (hand == note.hand_T.RIGHT.value)
+    }
+    self.chordMasks = {}
+    for (hands, sel) in handSelect.items() :
+      masks = np.zeros((cursorCount, 2), dtype = np.uint64)
+      np.bitwise_or.at(masks, (cursorIndex[sel], word[sel]), bit[sel])
+      self.chordMasks[hands] = masks
+
+    # Inverted index: (pitch, cursor) pairs without duplicates, grouped by pitch
+    keys = np.unique(pitch * max(cursorCount, 1) + cursorIndex)
+    self.cursorsByPitch_indices = (keys % max(cursorCount, 1)).astype(np.int32)
+    self.cursorsByPitch_offsets = np.zeros(129, dtype = np.int64)
+    np.cumsum(np.bincount(keys // max(cursorCount, 1), minlength = 128), out = self.cursorsByPitch_offsets[1:])
+
+    # The passage search index depends on these tables: it will be rebuilt on 
+    # the next search.
+    self.passageIndex = {}
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._updateChordMasks()                                  [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _updateChordMasks(self, index: int) -> None :
+    """
+    Updates the single hand masks of the chord search (see 'Score._buildChordIndex()')
+    after the hand of a note changed.
+    Only the cursor of the note is recomputed: another note of the same pitch
+    might be pressed by the same hand at this cursor.
+    """
+
+    timecodesLR = np.asarray(self.noteOnTimecodes["LR"], dtype = np.int64)
+    cursor = int(np.searchsorted(timecodesLR, self.noteStore.startTime[index]))
+    if (cursor >= len(timecodesLR)) :
+      return
+
+    sel = (np.searchsorted(timecodesLR, self.noteStore.startTime) == cursor)
+    pitch = self.noteStore.pitch[sel].astype(np.int64)
+    hand  = self.noteStore.hand[sel]
+    word  = pitch >> 6
+    bit   = np.left_shift(np.uint64(1), (pitch & 63).astype(np.uint64))
+
+    for (hands, handValue) in [(SCORE_ACTIVE_HANDS_LEFT, note.hand_T.LEFT.value), (SCORE_ACTIVE_HANDS_RIGHT, note.hand_T.RIGHT.value)] :
+      row = np.zeros(2, dtype = np.uint64)
+      np.bitwise_or.at(row, word[hand == handValue], bit[hand == handValue])
+      self.chordMasks[hands][cursor] = row
+
+    # The passage search index depends on the masks: it will be rebuilt on
+    # the next search.
+    self.passageIndex = {}
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._getTempoMap()                                       [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getTempoMap(self, songFile: str, tempoMapDict) -> tempoMap.TempoMap :
+    """
+    Returns the tempo map of the score from its dictionary (as stored in the 
+    '.gq3' file, see 'TempoMap.toDict()')
+
+    Files written before the tempo map was introduced do not have it: it is 
+    then read from the MIDI file of the same name (if any, the timecodes of 
+    the score are the ones of the MIDI file), otherwise the default tempo 
+    is used.
+    """
+
+    if tempoMapDict is not None :
+      return tempoMap.fromDict(tempoMapDict)
+
+    midiFile = os.path.splitext(songFile)[0] + ".mid"
+    if os.path.exists(midiFile) :
+      print(f"[INFO] No tempo map in the file, it is read from '{os.path.basename(midiFile)}'")
+      return tempoMap.fromSmf(smfParser.load(midiFile))
+
+    print("[WARNING] No tempo map in the file and no MIDI file to read it from: default tempo is used.")
+    return tempoMap.TempoMap()
 
 
 
@@ -698,14 +1095,13 @@ class Score(widget.Widget) :
     
     # NOTE: there is a good chance that noteObj.id contains that piece of information
     # we're looking for here...
-    noteIndex = -1
-    matchCount = 0
-    for (index, N) in enumerate(self.noteList) :
-      if ((N.pitch == noteObj.pitch) and
-          (N.startTime == noteObj.startTime) and 
-          (N.stopTime == noteObj.stopTime)) :
-        matchCount += 1
-        noteIndex = index
+    matches = np.flatnonzero(
+      (self.noteStore.pitch == noteObj.pitch) &
+      (self.noteStore.startTime == noteObj.startTime) & 
+      (self.noteStore.stopTime == noteObj.stopTime)
+    )
+    matchCount = len(matches)
+    noteIndex = int(matches[-1]) if (matchCount > 0) else -1
 
     output = {}
 
@@ -754,99 +1150,405 @@ class Score(widget.Widget) :
           if (depth == 0) :
             targetLineSection = False
 
-        # Exited noteList array
-        if lineStr.startswith("]") and (depth == 0) :
-          break
+        # Exited noteList array
+        if lineStr.startswith("]") and (depth == 0) :
+          break
+
+    print("[INFO] Location in .gq3 file:")
+    print(f"...")
+    for (i,s) in enumerate(output["content"]) :
+      lineNumber = output['line'] + i
+      print(f"- {lineNumber}: {s}")
+    print(f"...")
+      
+    print(noteObj)
+
+    return output
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score.save()
+  # ---------------------------------------------------------------------------
+  def save(self, gq3File: str = "", backup = False) -> None :
+    """
+    Saves the annotated score and all metadata (finger, hand, comments etc.)
+
+    If the score was loaded from this '.gq3' file, only the edits made since 
+    the last save are written: they are appended to the journal of the file 
+    (see 'gq3Journal.py'). It only takes a few microseconds.
+    Otherwise, the whole score is exported in a '.gq3' file (see 'Score.compact()')
+
+    By default, the song is saved in the same folder, unless a non-empty 
+    directory specified.
+    'gq3File' must be the full path to the file + file name.
+
+    Call the function with 'backup = True' to save under the './backup' folder 
+    instead so that the original file is not overwritten.
+    """
+
+    # By default, save under the same directory
+    if (gq3File == "") :
+      gq3File = self.songFile
+    
+    if backup :
+      timestamp = datetime.datetime.now().strftime('%d_%B_%HH%MM%SS')
+      self._backup(f"{Path(gq3File).stem}___{timestamp}")
+
+    elif self._isJournaled(gq3File) :
+      
+      # The journal must not be written while the '.gq3' is being rewritten
+      if self.saveWorker.isBusy() :
+        self._savePoll(wait = True)
+
+      self.journal.record("cursor", value = self.getCursor())
+      recordCount = self.journal.flush()
+      self.hasUnsavedChanges = False
+      currTime = datetime.datetime.now()
+      print(f"[INFO] Saved to '{self.journal.journalFile}' ({recordCount-1} edits) at {currTime.strftime('%H:%M:%S')}")
+
+    else :
+      self.compact(gq3File)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score.compact()
+  # ---------------------------------------------------------------------------
+  def compact(self, gq3File: str = "", wait = False) -> None :
+    """
+    Exports the annotated score and all metadata (finger, hand, comments etc.) in 
+    a '.gq3' file (JSON) that can be imported later to restore the session.
+
+    The edits of the journal are merged in the file and the journal is 
+    deleted.
+
+    By default, the song is saved in the same folder, unless a non-empty 
+    directory specified.
+    'gq3File' must be the full path to the file + file name.
+
+    The file is written in the background (see 'saveWorker.py'): the function
+    returns immediately, unless 'wait' is True.
+    """
+
+    # By default, save under the same directory
+    if (gq3File == "") :
+      gq3File = self.songFile
+    
+    (root, _) = os.path.splitext(gq3File)
+    exportFile = root + ".gq3"
+
+    # Edits made during the write are recorded in the journal of the new file
+    if not(self._isJournaled(exportFile)) :
+      self._journalDetach()
+      self.journal = gq3Journal.Gq3Journal(exportFile)
+
+    tag = ("compact", exportFile, self.journal, self.journal.getMark())
+    self.saveWorker.submit(self._writeGq3File, exportFile, self._getSnapshot(), True, tag = tag)
+    self.hasUnsavedChanges = False
+
+    if wait :
+      self._savePoll(wait = True)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score.autosave()
+  # ---------------------------------------------------------------------------
+  def autosave(self) -> None :
+    """
+    Saves the current state under the backup folder (AUTOSAVE_BACKUP_PATH).
+    There is one autosave file per song: it is overwritten each time.
+
+    Called periodically when there are unsaved changes (see AUTOSAVE_INTERVAL_SEC)
+    """
+
+    self.lastAutosaveTime = time.time()
+    self._backup(f"{Path(self.songFile).stem}___autosave")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score.close()
+  # ---------------------------------------------------------------------------
+  def close(self) -> None :
+    """
+    Waits for the files being written in the background, then merges the 
+    saved edits of the journal in the '.gq3' file: the song file holds all 
+    the edits once the app is closed.
+    Must be called before leaving the app.
+
+    NOTE: the merge writes the current state of the score. It is skipped if
+    some edits are not saved: the journal is kept and replayed at the next 
+    loading, the unsaved edits are in the backup only (like without journal).
+    """
+
+    if self.saveWorker.isBusy() :
+      print("[INFO] Waiting for the files to be written...")
+      self._savePoll(wait = True)
+
+    if ((self.journal is not None) and (self.journal.recordCount > 0)) :
+      if self.hasUnsavedChanges :
+        print(f"[INFO] Unsaved changes: the saved edits are kept in '{self.journal.journalFile}'")
+      else :
+        print("[INFO] Merging the journal in the .gq3 file...")
+        self.compact(wait = True)
+
+    self._journalDetach()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._backup()                                            [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _backup(self, backupName: str) -> None :
+    """
+    Saves the current state under the backup folder as 'backupName' (the 
+    extension is added)
+
+    The backup is a full copy of the score ('.bak'), even if the edits are
+    journaled: it does not depend on the '.gq3' file, which can be rewritten
+    by a compaction or edited by hand in the meantime. It also works while 
+    the '.gq3' is being written for the first time.
+    """
+
+    Path(AUTOSAVE_BACKUP_PATH).mkdir(parents = True, exist_ok = True)
+    
+    exportFile = Path(AUTOSAVE_BACKUP_PATH) / (backupName + ".bak")
+    self.saveWorker.submit(self._writeGq3File, exportFile, self._getSnapshot(), False, tag = ("backup", exportFile))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._getSnapshot()                                       [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getSnapshot(self) -> dict :
+    """
+    Returns a copy of the annotated score (note columns, tables and metadata)
+    that can be written in the background while the score is being edited.
+    """
+
+    snapshot = {name: np.copy(column) for (name, column) in self.noteStore.getColumns().items()}
+    snapshot["bookmarks"]         = copy.deepcopy(self.bookmarks)
+    snapshot["tempoSections"]     = copy.deepcopy(self.sectionTempo)
+    snapshot["arpeggioSections"]  = copy.deepcopy(self.sectionArpeggio)
+    snapshot["appVersion"]        = f"v{REV_MAJOR}.{REV_MINOR}"
+    snapshot["cursor"]            = self.getCursor()
+    snapshot["tempoMap"]          = self.tempoMap.toDict()
+
+    return snapshot
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._writeGq3File()                                      [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _writeGq3File(self, exportFile: str, snapshot: dict, buildCache = False) -> int :
+    """
+    Writes a snapshot of the score (see 'Score._getSnapshot()') in a '.gq3' 
+    file (JSON) and optionally its binary cache.
+    Returns the number of notes written.
+
+    NOTE: runs in the background thread. It must only read the snapshot.
+    """
+
+    output = {}
+    output["appVersion"]    = snapshot["appVersion"]
+    output["cursor"]        = snapshot["cursor"]
+    output["bookmarks"]     = snapshot["bookmarks"]
+    
+    # The note database is sorted by increasing timecodes so that the notes 
+    # are transcribed linearly in the .gq3 file and therefore easier track changes.
+    output["noteList"] = [
+      {"pitch": p, "hand": h, "finger": f, "voice": v, "name": noteStore.NAME_LUT[p]}
+      for (p, h, f, v) in zip(snapshot["pitch"].tolist(), snapshot["hand"].tolist(), snapshot["finger"].tolist(), snapshot["voice"].tolist())
+    ]
+    output["timecodeList"] = [
+      {"startTime": t0, "stopTime": t1}
+      for (t0, t1) in zip(snapshot["startTime"].tolist(), snapshot["stopTime"].tolist())
+    ]
+
+    # Written at the end of the JSON to simplify diff/merges
+    output["tempoSections"]     = snapshot["tempoSections"]
+    output["arpeggioSections"]  = snapshot["arpeggioSections"]
+    output["tempoMap"]          = snapshot["tempoMap"]
+
+    saveWorker.writeJson(exportFile, output)
+
+    # Refresh the binary cache so that the next loading does not need the JSON
+    if buildCache :
+      gq3Cache.build(exportFile, snapshot, {"appVersion": output["appVersion"], "cursor": output["cursor"], "tempoMap": output["tempoMap"]})
+
+    return len(output["noteList"])
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._savePoll()                                          [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _savePoll(self, wait = False) -> None :
+    """
+    Processes the writes completed by the save worker.
+    With 'wait = True', waits for the writes in progress.
+    """
+
+    done = self.saveWorker.wait() if wait else self.saveWorker.poll()
+    for ((op, exportFile, *args), noteCount, error, duration) in done :
+      if error is not None :
+        print(f"[ERROR] Failed to write '{exportFile}': {error}")
+        if (op == "compact") :
+          self.hasUnsavedChanges = True
+          if ((args[0] is self.journal) and not(os.path.exists(exportFile))) :
+            self._journalDetach()
+      
+      elif (op == "compact") :
+        
+        # The edits up to the snapshot are in the file now: start a new journal
+        (journal, mark) = args
+        if (journal is self.journal) :
+          journal.rebase(mark)
+
+        currTime = datetime.datetime.now()
+        print(f"[DEBUG] {noteCount} notes written in .gq3 file ({1000*duration:.0f} ms).")
+        print(f"[INFO] Saved to '{exportFile}' at {currTime.strftime('%H:%M:%S')}")
+
+      else :
+        print(f"[INFO] A backup of the current state was saved under '{exportFile}'")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._isJournaled()                                       [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _isJournaled(self, gq3File: str) -> bool :
+    """
+    Returns True if the edits are recorded in the journal of this file.
+    """
+
+    if self.journal is None :
+      return False
+    
+    (root, _) = os.path.splitext(gq3File)
+    return (os.path.abspath(self.journal.gq3File) == os.path.abspath(root + ".gq3"))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._journalReplay()                                     [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _journalReplay(self) -> None :
+    """
+    Applies the edits of the journal to the score that has just been loaded.
+    The derived tables (cursors, notes by cursor etc.) are built afterwards.
+    """
+
+    records = self.journal.read()
+    tables = {
+      "bookmarks"         : "bookmarks",
+      "tempoSections"     : "sectionTempo",
+      "arpeggioSections"  : "sectionArpeggio"
+    }
 
-    print("[INFO] Location in .gq3 file:")
-    print(f"...")
-    for (i,s) in enumerate(output["content"]) :
-      lineNumber = output['line'] + i
-      print(f"- {lineNumber}: {s}")
-    print(f"...")
+    for r in records :
+      if (r["op"] in gq3Journal.GQ3_JOURNAL_NOTE_OPS) :
+        if (0 <= r["note"] < len(self.noteStore)) :
+          getattr(self.noteStore, r["op"])[r["note"]] = r["value"]
+        else :
+          print(f"[WARNING] Journal: note index {r['note']} is out of range (record ignored)")
       
-    print(noteObj)
+      elif (r["op"] in gq3Journal.GQ3_JOURNAL_TABLE_OPS) :
+        setattr(self, tables[r["op"]], r["value"])
 
-    return output
+      elif (r["op"] == "cursor") :
+        self.cursor = int(r["value"])
+
+    if records :
+      print(f"[INFO] {len(records)} records replayed from the journal.")
 
 
 
   # ---------------------------------------------------------------------------
-  # METHOD Score.save()
+  # METHOD Score._journalDetach()                                     [PRIVATE]
   # ---------------------------------------------------------------------------
-  def save(self, gq3File: str = "", backup = False) -> None :
+  def _journalDetach(self) -> None :
+    """
+    Closes the journal of the current score (if any).
     """
-    Exports the annotated score and all metadata (finger, hand, comments etc.) in 
-    a '.gq3' file (JSON) that can be imported later to restore the session.
 
-    By default, the song is saved in the same folder, unless a non-empty 
-    directory specified.
-    'gq3File' must be the full path to the file + file name.
+    if self.journal is not None :
+      self.journal.close()
+      self.journal = None
 
-    Call the function with 'backup = True' to save under a '.bak' extension instead
-    so that the original file is not overwritten (used e.g. for autosave)
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._onNoteEdit()                                        [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _onNoteEdit(self, name: str, index: int, value: int) -> None :
+    """
+    Called by the note database on each edit of a note (hand, finger, voice)
     """
 
-    output = {}
-    output["appVersion"]    = f"v{REV_MAJOR}.{REV_MINOR}"
-    output["cursor"]        = self.getCursor()
-    output["bookmarks"]     = self.bookmarks
-    output["noteList"]      = []
-    output["timecodeList"]  = []
-    
-    # Sort all notes by increasing timecodes so that they are
-    # transcribed linearly in the .gq3 file and therefore easier track changes.
-    # Sorting is done on a copy to avoid any issue.
-    L = self.noteList.copy()
-    L.sort(key = lambda obj: obj.startTime)
+    if self.journal is not None :
+      self.journal.record(name, note = int(index), value = int(value))
 
-    noteCount = 0
-    for noteObj in L :
-      noteAsDict = {
-        "pitch"   : noteObj.pitch,
-        "hand"    : noteObj.hand.value,
-        "finger"  : noteObj.finger.value,
-        "voice"   : noteObj.voice,
-        "name"    : noteObj.name
-      }
-      output["noteList"].append(noteAsDict)
-      
-      timecodeAsDict = {
-        "startTime" : noteObj.startTime,
-        "stopTime"  : noteObj.stopTime
-      }
-      output["timecodeList"].append(timecodeAsDict)
+    if ((name == "hand") and self.teacherTable) :
+      self._updateTeacherTable(index)
 
-      noteCount += 1
+    if ((name == "hand") and self.chordMasks) :
+      self._updateChordMasks(index)
+    
+    self.hasUnsavedChanges = True
+    self.lastEditTime = time.time()
+    self.editCount += 1
 
-    # Written at the end of the JSON to simplify diff/merges
-    output["tempoSections"]     = self.sectionTempo
-    output["arpeggioSections"]  = self.sectionArpeggio
 
-    # By default, save under the same directory
-    if (gq3File == "") :
-      gq3File = self.songFile
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._onTableEdit()                                       [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _onTableEdit(self, name: str) -> None :
+    """
+    Must be called after each edit of the bookmarks or the sections 
+    ('name' = "bookmarks", "tempoSections", "arpeggioSections")
+    """
+
+    if self.journal is not None :
+      table = {
+        "bookmarks"         : self.bookmarks,
+        "tempoSections"     : self.sectionTempo,
+        "arpeggioSections"  : self.sectionArpeggio
+      }[name]
+      self.journal.record(name, value = table)
     
-    if backup :
-      p = Path(gq3File)
-      timestamp = datetime.datetime.now().strftime('%d_%B_%HH%MM%SS')
-      exportFile = Path('./backup') / (f"{p.stem}___{timestamp}" + '.bak')
-      exportFile.parent.mkdir(parents = True, exist_ok = True)
-    else :
-      (root, _) = os.path.splitext(gq3File)
-      exportFile = root + ".gq3"
+    self.hasUnsavedChanges = True
+    self.lastEditTime = time.time()
+    self.editCount += 1
 
-    # Write to the file
-    with open(exportFile, "w") as fileHandler :
-      json.dump(output, fileHandler, indent = 2)
 
-    currTime = datetime.datetime.now()
-    if backup :
-      print(f"[INFO] A backup of the current state was saved under '{exportFile}'")
-    else :
-      currTime = datetime.datetime.now()
-      print(f"[DEBUG] {noteCount} notes written in .gq3 file.")
-      print(f"[INFO] Saved to '{exportFile}' at {currTime.strftime('%H:%M:%S')}")
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._isCompactionDue()                                   [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _isCompactionDue(self) -> bool :
+    """
+    Returns True when the journal should be merged into the '.gq3' file:
+    - the journal holds enough records
+    - all edits are saved (the compaction must not save them on behalf of the user)
+    - the app is idle (no edit and no MIDI activity for a while)
+    """
+
+    if ((self.journal is None) or self.journal.pending or self.hasUnsavedChanges or self.saveWorker.isBusy()) :
+      return False
+
+    if (self.journal.recordCount < GQ3_JOURNAL_COMPACTION_RECORDS) :
+      return False
+
+    idleTime = time.time() - self.lastEditTime
+    if (WIDGET_ID_STATS in self.top.widgets) :
+      idleTime = min(idleTime, time.perf_counter() - self.top.widgets[WIDGET_ID_STATS].lastActivity)
+
+    return (idleTime > GQ3_JOURNAL_COMPACTION_IDLE_SEC)
 
 
 
@@ -884,10 +1586,10 @@ class Score(widget.Widget) :
         self.cursor = cursorNew
       elif (self.activeHands == SCORE_ACTIVE_HANDS_LEFT) :
         i = self._getIndexInCursorsLeft(cursorNew)
-        self.cursor = self.cursorsLeft[i]
+        self.cursor = int(self.cursorsLeft[i])
       elif (self.activeHands == SCORE_ACTIVE_HANDS_RIGHT) :
         p = self._getIndexInCursorsRight(cursorNew, force = True)
-        self.cursor = self.cursorsRight[p]
+        self.cursor = int(self.cursorsRight[p])
       else :
         print("[ERROR] Score.cursorGoto(): unknown active hand specification (possible internal error)")
 
@@ -967,7 +1669,7 @@ class Score(widget.Widget) :
           print("[INTERNAL ERROR] Left hand practice is active, but there is no event on the left hand at this cursor. Cannot browse from here!")
           
         if ((index + delta) <= (len(self.cursorsLeft)-1)) :
-          self.cursor = self.cursorsLeft[index + delta]
+          self.cursor = int(self.cursorsLeft[index + delta])
 
       # SINGLE HAND PRACTICE (RIGHT)
       elif (self.activeHands == SCORE_ACTIVE_HANDS_RIGHT) :
@@ -977,7 +1679,7 @@ class Score(widget.Widget) :
           print("[INTERNAL ERROR] Right hand practice is active, but there is no event on the right hand at this cursor. Cannot browse from here!")
           
         if ((index + delta) <= (len(self.cursorsRight)-1)) :
-          self.cursor = self.cursorsRight[index + delta]
+          self.cursor = int(self.cursorsRight[index + delta])
 
       else :
         print("[INTERNAL ERROR] Score.cursorGoto: unknown active hand specification!")
@@ -998,7 +1700,7 @@ class Score(widget.Widget) :
           print("[INTERNAL ERROR] Left hand practice is active, but there is no event on the left hand at this cursor. Cannot browse from here!")
           
         if ((index + delta) >= 0) :
-          self.cursor = self.cursorsLeft[index + delta]
+          self.cursor = int(self.cursorsLeft[index + delta])
 
       # SINGLE HAND PRACTICE (RIGHT)
       elif (self.activeHands == SCORE_ACTIVE_HANDS_RIGHT) :
@@ -1008,7 +1710,7 @@ class Score(widget.Widget) :
           print("[INTERNAL ERROR] Right hand practice is active, but there is no event on the right hand at this cursor. Cannot browse from here!")
           
         if (index + delta >= 0) :
-          self.cursor = self.cursorsRight[index + delta]
+          self.cursor = int(self.cursorsRight[index + delta])
 
       else :
         print("[INTERNAL ERROR] Score.cursorStep: unknown active hand specification!")
@@ -1348,25 +2050,8 @@ class Score(widget.Widget) :
     of giving the nearest solution.
     """
     
-    # An exact solution exists
-    if (cursorReq in self.cursorsLeft) :
-      return self.cursorsLeft.index(cursorReq)
-    
-    # No exact solution
-    else :
-      if force :
-        return -1
-      else :
-        minDist = abs(cursorReq - self.cursorsLeft[0])
-        minIndex = 0
-        for (i, cursorLeft) in enumerate(self.cursorsLeft) :
-          if (abs(cursorReq - cursorLeft) < minDist) :
-            minDist = abs(cursorReq - cursorLeft)
-            minIndex = i
+    return self._getIndexInCursors(self.cursorsLeft, self.cursorToIndexLeft, cursorReq, force)
 
-        print(f"[DEBUG] Requested cursor: {cursorReq}, closest: {minIndex}")
-        return minIndex
-    
 
 
   # ---------------------------------------------------------------------------
@@ -1386,24 +2071,47 @@ class Score(widget.Widget) :
     of giving the nearest solution.
     """
     
+    return self._getIndexInCursors(self.cursorsRight, self.cursorToIndexRight, cursorReq, force)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score._getIndexInCursors()                                 [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getIndexInCursors(self, cursors, cursorToIndex, cursorReq, force = False) -> int :
+    """
+    Common function for 'Score._getIndexInCursorsLeft()' and 
+    'Score._getIndexInCursorsRight()'.
+
+    'cursors' is the list of cursors of the hand, 'cursorToIndex' the associated
+    reverse lookup table (see 'Score._buildCursorsLR()').
+
+    The exact solution is read directly from the table.
+    The closest solution is found with a binary search in the (sorted) list 
+    of cursors. In case of a tie, the lowest index is returned.
+    """
+
     # An exact solution exists
-    if (cursorReq in self.cursorsRight) :
-      return self.cursorsRight.index(cursorReq)
+    if ((0 <= cursorReq < len(cursorToIndex)) and (cursorToIndex[cursorReq] != -1)) :
+      return int(cursorToIndex[cursorReq])
     
     # No exact solution
+    if (force or (len(cursors) == 0)) :
+      return -1
+
+    # 'cursors[i-1] < cursorReq < cursors[i]': the closest is one of them.
+    i = int(np.searchsorted(cursors, cursorReq))
+    if (i == 0) :
+      minIndex = 0
+    elif (i == len(cursors)) :
+      minIndex = i-1
+    elif ((cursorReq - cursors[i-1]) <= (cursors[i] - cursorReq)) :
+      minIndex = i-1
     else :
-      if force :
-        return -1
-      else :
-        minDist = abs(cursorReq - self.cursorsRight[0])
-        minIndex = 0
-        for (i, cursorRight) in enumerate(self.cursorsRight) :
-          if (abs(cursorReq - cursorRight) < minDist) :
-            minDist = abs(cursorReq - cursorRight)
-            minIndex = i
+      minIndex = i
 
-        print(f"[DEBUG] Requested cursor: {cursorReq}, closest: {minIndex}")
-        return minIndex
+    print(f"[DEBUG] Requested cursor: {cursorReq}, closest: {minIndex}")
+    return minIndex
 
 
 
@@ -1456,6 +2164,41 @@ class Score(widget.Widget) :
 
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD Score.getActiveNotesIndex()
+  # ---------------------------------------------------------------------------
+  def getActiveNotesIndex(self, cursor = -1) :
+    """
+    Returns the indices (in 'Score.noteList') of the notes active (pressed or
+    sustained) at a given cursor.
+
+    If 'cursor' is not specified the function defaults to the current cursor.
+
+    The output is a read-only view on the table, not a copy.
+    """
+
+    if (cursor == -1) : cursor = self.getCursor()
+
+    a = self.notesByCursor_activeOffsets[cursor]
+    b = self.notesByCursor_activeOffsets[cursor+1]
+    return self.notesByCursor_activeIndices[a:b]
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score.getActiveNotes()
+  # ---------------------------------------------------------------------------
+  def getActiveNotes(self, cursor = -1) -> list[note.Note] :
+    """
+    Returns the notes active (pressed or sustained) at a given cursor.
+    
+    If 'cursor' is not specified the function defaults to the current cursor.
+    """
+
+    return [self.noteList[i] for i in self.getActiveNotesIndex(cursor).tolist()]
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD Score.getScoreLength()
   # ---------------------------------------------------------------------------
@@ -1506,115 +2249,88 @@ class Score(widget.Widget) :
     Returns a list with all the notes that must be pressed at the current 
     position in the score.
     
-    Only notes pressed at this cursor are returned.
-    Sustained notes (notes that were pressed before and held up to the current 
-    cursor) are not included in the list.
+    The notes pressed at this cursor come first, then the sustained notes 
+    (notes that were pressed before and held up to the current cursor).
+    In single hand practice, the notes of the other hand are flagged 'inactive'.
+
+    The list is read from the teacher notes table (see 'Score._buildTeacherTable()').
+    The 'sustained' and 'inactive' attributes are held by the returned objects:
+    the notes of the score are not modified.
     """
 
-    # Cursor hasn't changed since last request: return the cache
-    if (self.getCursor() == self.teacherNotesCursor) :
-      pass
-    
-    # Otherwise: regenerate the cache
-    else :
-      self._calculateTeacherNotes()
-      self.teacherNotesCursor = self.getCursor()
+    if not(self.teacherTable) :
+      return []
+
+    key = (self.getCursor(), self.activeHands)
+    if (key != self.teacherNotesKey) :
+      table = self.teacherTable[self.activeHands]
+      a = table["offsets"][key[0]]
+      b = table["offsets"][key[0]+1]
+      self.teacherNotes = [
+        noteStore.TeacherNoteView(self.noteStore, i, bool(f & TEACHER_FLAG_SUSTAINED), bool(f & TEACHER_FLAG_INACTIVE))
+        for (i, f) in zip(table["indices"][a:b].tolist(), table["flags"][a:b].tolist())
+      ]
+      self.teacherNotesKey = key
 
-    # Return a copy of the elaborated list.
+    # Return a copy of the list.
     # We do not want the clients to mess with it
     return self.teacherNotes.copy()
 
 
 
   # ---------------------------------------------------------------------------
-  # METHOD Score._calculateTeacherNotes()                             [PRIVATE]
+  # METHOD Score.getTeacherPitchMask()
   # ---------------------------------------------------------------------------
-  def _calculateTeacherNotes(self) -> None :
+  def getTeacherPitchMask(self, cursor = -1) :
     """
-    Builds the 'teacherNotes' attribute i.e. the list of notes that must be 
-    played at the current location in the score.
+    Returns the pitches to play at a given cursor (teacher notes, sustained 
+    and inactive notes excluded) as a 128-bit mask: 2 words of 64 bits, 
+    bit 'p' is set if pitch 'p' must be played.
+    
+    If 'cursor' is not specified the function defaults to the current cursor.
+    """
+
+    if (cursor == -1) : cursor = self.getCursor()
 
-    'Score.teacherNotes' contains a list of Note objects with appropriate
-    properties for the rendering and arbitration.
+    return self.teacherTable[self.activeHands]["pitchMask"][cursor]
 
-    The function does not return anything. It updates the 'teacherNotes' 
-    attribute.
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score.getTeacherPitchIDs()
+  # ---------------------------------------------------------------------------
+  def getTeacherPitchIDs(self) -> tuple[int, dict] :
     """
-    
-    # Reset the attributes of the previous teacher notes before deleting them.
-    for N in self.teacherNotes :
-      N.sustained = False
+    Returns the pitches to play at the current cursor (teacher notes, sustained 
+    and inactive notes excluded) as a tuple:
+    - a 128-bit mask (Python integer): bit 'p' is set if pitch 'p' must be played
+    - a dictionary giving the ID of the note to play for each of these pitches.
 
-    # Reset the cache
-    self.teacherNotes = []
-    
-    # Request the active notes (pressed + sustained) at this cursor
-    activeNotes = self.notesByCursor_active[self.getCursor()]
-    
-    # Loop over the active notes
-    for N in activeNotes :
+    There is at most one note per pitch (see 'Score._getTeacherEntries()').
+    The table is computed once per cursor: this is the form used by the arbiter.
+    """
+
+    if not(self.teacherTable) :
+      return (0, {})
+
+    key = (self.getCursor(), self.activeHands)
+    if (key != self.teacherPitchIDsKey) :
+      table = self.teacherTable[self.activeHands]
+      a = table["offsets"][key[0]]
+      b = table["offsets"][key[0]+1]
+      indices = table["indices"][a:b][table["flags"][a:b] == 0]
+      pitchIDs = dict(zip(self.noteStore.pitch[indices].tolist(), indices.tolist()))
+      
+      mask = 0
+      for pitch in pitchIDs :
+        mask |= (1 << pitch)
+      
+      self.teacherPitchIDs = (mask, pitchIDs)
+      self.teacherPitchIDsKey = key
+
+    return self.teacherPitchIDs
 
-      # CASE 1: a note is pressed at this timecode
-      if (N.startTime == self.getTimecode()) :
-        
-        # SINGLE HAND PRACTICE
-        # Adds the notes with their "inactive" property to "True" 
-        # so that it is displayed with the appropriate color.
-        if (self.activeHands == SCORE_ACTIVE_HANDS_BOTH) :
-          N.inactive = False
-          self.teacherNotes.append(N)
-        
-        elif (self.activeHands == SCORE_ACTIVE_HANDS_LEFT) :
-          if (N.hand != note.hand_T.LEFT) : 
-            N.inactive = True
-            self.teacherNotes.append(N)
-
-        elif (self.activeHands == SCORE_ACTIVE_HANDS_RIGHT) :
-          if (N.hand != note.hand_T.RIGHT) :
-            N.inactive = True
-            self.teacherNotes.append(N)
-
-      # CASE 2: the note is held at this timecode
-      elif ((N.startTime < self.getTimecode()) and (N.stopTime >= self.getTimecode())) :
-        N.sustained = True
-        self.teacherNotes.append(N)
-
-
-    # Detect void list of teacher notes
-    # This is not supposed to happen
-    if (len(self.teacherNotes) == 0) :
-      print(f"[WARNING] Score._calculateTeacherNotes(): empty list of teacher notes (t = {self.getTimecode()}), possible internal error.")
-
-    # TODO: filter out notes with 0 duration.
-    # Still not sure why it happens.
-    # See https://github.com/evernost/gangQin/issues/22
-    filteredList = []
-    for N in self.teacherNotes :
-      if not(N.fromKeyboardInput) :
-        if (N.startTime != N.stopTime) :
-          filteredList.append(N)
-        # else :
-        #   print(f"[DEBUG] Score._calculateTeacherNotes(): null duration note detected (cursor = {self.getCursor()})")
-      else :
-        filteredList.append(N)
-    self.teacherNotes = filteredList
-
-    # Filter out competing notes (same pitch at the same time)
-    filteredList = {}
-    sustainedList = []
-    for N in self.teacherNotes :
-      if N.sustained :
-        sustainedList.append(N)
-      else :
-        if (N.pitch not in filteredList) : 
-          filteredList[N.pitch] = N
-        elif (N.stopTime > filteredList[N.pitch].stopTime) :
-          #print(f"[DEBUG] Score._calculateTeacherNotes(): redundant keypress eliminated (cursor = {self.getCursor()})")
-          filteredList[N.pitch] = N
-        
-    self.teacherNotes = list(filteredList.values()) + sustainedList
 
-    
 
   # ---------------------------------------------------------------------------
   # METHOD Score._resetCache()                                        [PRIVATE]
@@ -1635,51 +2351,39 @@ class Score(widget.Widget) :
   # ---------------------------------------------------------------------------
   def getUpcomingNotes(self) -> list[note.Note] :
     """
-    Builds the list of the notes about to come after the current cursor.
+    Builds the list of the notes about to come after the current cursor 
+    (lookahead feature), up to 'Score.lookAheadDistance' cursors ahead.
+
+    The notes to play at the current cursor are not listed again, and a pitch 
+    is only listed once (nearest occurrence).
 
     NOTES
-    The list contains a copy of the notes.
-    Feel free to edit their properties. It will not affect the actual notes of 
-    the score.
+    The list contains views on the notes (see 'noteStore.UpcomingNoteView') with
+    their 'upcoming' and 'upcomingDistance' attributes set.
+    The window slides along with the cursor (see 'lookahead.py')
     """
     
-    upcomingNotes = []
+    if (self.lookAheadDistance == 0) :
+      return []
 
-    # Lookahead feature: show also the upcoming notes 
-    # to help with the hand placement.
-    
-    # STEP 1: get the N notes that will be triggered 
-    # after the current cursor
-    # These notes shall be taken within a certain timecode 
-    # limit from the current location.
+    self.lookahead.moveTo(self.getCursor(), self.lookAheadDistance)
     
-    # Don't show the same pitch twice
-    activePitches = [x.pitch for x in self.cachedTeacherNotes]
-    
-    for n in range(1, (self.lookAheadDistance+1)) :
-      if ((self.getCursor() + n) < self.cursorMax) :
-        for pitch in MIDI_CODE_GRAND_PIANO_RANGE :
-          for (staffIndex, _) in enumerate(self.pianoRoll) :
-            for noteObj in self.pianoRoll[staffIndex][pitch] :
-
-              # Detect a note pressed at this timecode
-              if (noteObj.startTime == (self.noteOnTimecodes["LR"][self.cursor + n])) :
-                if not(noteObj.pitch in activePitches) :
-                  noteCopy = copy.deepcopy(noteObj)
-                  noteCopy.upcoming = True
-                  noteCopy.upcomingDistance = n
-                  upcomingNotes.append(noteCopy)
-                  activePitches.append(noteCopy.pitch)
+    return self.lookahead.getNotes([N.pitch for N in self.getTeacherNotes()])
 
 
-    return upcomingNotes
 
-    # STEP 2: edit their lookahead property to tell Keyboard
-    # that they should be displayed in a certain way.
+  # ---------------------------------------------------------------------------
+  # METHOD Score.setLookaheadDistance()
+  # ---------------------------------------------------------------------------
+  def setLookaheadDistance(self, distance: int) -> None :
+    """
+    Sets the number of cursors shown ahead of the current one (lookahead 
+    feature). The value is clamped to [0, LOOKAHEAD_DISTANCE_MAX]
+    0 disables the lookahead.
+    """
 
-    # TODO: instead of showing the notes ahead in a certain window,
-    # maybe a sort of "slur" function should be added so that 
-    # only the notes in the slur are shown in the lookahead.
+    self.lookAheadDistance = min(max(distance, 0), LOOKAHEAD_DISTANCE_MAX)
+    print(f"[INFO] Lookahead distance: {self.lookAheadDistance}")
 
 
 
@@ -1695,6 +2399,88 @@ class Score(widget.Widget) :
 
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD Score.searchAll()
+  # ---------------------------------------------------------------------------
+  def searchAll(self, pitchList: list[int], hands = "") -> np.ndarray :
+    """
+    Returns all the cursors (sorted by ascending values) where all the query 
+    notes ('pitchList', list of MIDI codes) are pressed simultaneously.
+
+    Only the notes of the active hands are considered, unless the hands are
+    specified ('hands' = SCORE_ACTIVE_HANDS_LEFT, SCORE_ACTIVE_HANDS_RIGHT, 
+    SCORE_ACTIVE_HANDS_BOTH)
+    
+    Sustained notes are not considered.
+    """
+
+    if (hands == "") :
+      hands = self.activeHands
+
+    if ((len(pitchList) == 0) or not(hands in self.chordMasks)) :
+      return np.zeros(0, dtype = np.int32)
+
+    # Query as a 128-bit mask
+    query = np.zeros(2, dtype = np.uint64)
+    for pitch in pitchList :
+      query[pitch >> 6] |= np.uint64(1) << np.uint64(pitch & 63)
+
+    # EXPLANATION
+    # Candidates are the cursors where the least frequent pitch of the query 
+    # is pressed. The query must be a subset of the chord at these cursors.
+    offsets = self.cursorsByPitch_offsets
+    rarest = min(pitchList, key = lambda p: offsets[p+1] - offsets[p])
+    candidates = self.cursorsByPitch_indices[offsets[rarest]:offsets[rarest+1]]
+    
+    masks = self.chordMasks[hands][candidates]
+    isMatch = np.all((masks & query) == query, axis = 1)
+
+    return candidates[isMatch]
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Score.searchPassage()
+  # ---------------------------------------------------------------------------
+  def searchPassage(self, chordList: list[list[int]], transpose = False, tolerance = 0, hands = "") -> list[tuple[int, int, int]] :
+    """
+    Finds the locations in the score where the chords of 'chordList' (list of
+    chords, each chord being a list of MIDI codes) are played one after the
+    other.
+
+    - 'transpose': the passage can be found in any key
+    - 'tolerance': maximum number of missing/extra notes over the whole passage
+
+    Only the notes of the active hands are considered, unless the hands are
+    specified.
+
+    Returns a list of tuples (cursor, cost, transposition) ranked by relevance
+    (see 'passageSearch.py')
+    """
+
+    if (hands == "") :
+      hands = self.activeHands
+
+    if not(hands in self.chordMasks) :
+      return []
+
+    # The index is built on the first search with these hands.
+    # In single hand mode, the passage is searched over the cursors where that 
+    # hand plays something. They are read from the chord masks (not from 
+    # 'cursorsLeft'/'cursorsRight') so that the hand edits are taken into account.
+    if not(hands in self.passageIndex) :
+      if (hands in (SCORE_ACTIVE_HANDS_LEFT, SCORE_ACTIVE_HANDS_RIGHT)) :
+        cursors = np.flatnonzero(self.chordMasks[hands].any(axis = 1)).astype(np.int32)
+      else :
+        cursors = np.arange(self.length, dtype = np.int32)
+
+      chordBits = [lo | (hi << 64) for (lo, hi) in self.chordMasks[hands][cursors].tolist()]
+      self.passageIndex[hands] = passageSearch.PassageIndex(chordBits, cursors)
+
+    return self.passageIndex[hands].search(chordList, transpose, tolerance)
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD Score.search(noteList, direction)
   # ---------------------------------------------------------------------------
@@ -1704,66 +2490,30 @@ class Score(widget.Widget) :
     simultaneously.
     Sets the cursor to the first matching location.
     
+    'noteList' is an array of 128 entries (one per MIDI code) set to 1 for the
+    query notes (e.g. 'Arbiter.getMidiCurr()')
+
     Direction of search (before or after the current location) can be specified.
-    
-    TODO: does it include sustained notes?
+    Only the notes of the active hands are considered (see 'Score.searchAll()')
     """
 
-    if (direction >= 0) :
-      if (self.activeHands == SCORE_ACTIVE_HANDS_RIGHT) :
-        timecodeSearchField = [x > self.cursor for x in self.cursorsRight]
-      elif (self.activeHands == SCORE_ACTIVE_HANDS_LEFT) :
-        timecodeSearchField = [x > self.cursor for x in self.cursorsRight]
-      else :
-        # TODO: check the boundaries
-        timecodeSearchField = [x for x in range(self.cursor+1, self.length)]
+    pitchList = [index for (index, element) in enumerate(noteList) if element == 1]
     
+    matches = self.searchAll(pitchList)
+    if (direction >= 0) :
+      matches = matches[matches > self.cursor]
+      foundCursor = int(matches[0]) if (len(matches) > 0) else -1
     else :
-      if (self.activeHands == SCORE_ACTIVE_HANDS_RIGHT) :
-        timecodeSearchField = [x < self.cursor for x in self.cursorsRight]
-      elif (self.activeHands == SCORE_ACTIVE_HANDS_LEFT) :
-        timecodeSearchField = [x < self.cursor for x in self.cursorsRight]
-      else :
-        timecodeSearchField = [x for x in range(0, self.cursor)]
-
-      timecodeSearchField.sort(reverse = True)
-
-
-    pitchList = [index for (index, element) in enumerate(noteList) if element == 1]
-    found = False
-
-    # Loop on the notes of the score
-    for cursorTry in timecodeSearchField :
-      
-      foundPitch = []
-      
-      for pitch in pitchList :
-        for (staffIndex, _) in enumerate(self.pianoRoll) :
-          for noteObj in self.pianoRoll[staffIndex][pitch] :
-            
-            # Detect a note pressed at this timecode
-            if (noteObj.startTime == self.noteOnTimecodes["LR"][cursorTry]) :
-              foundPitch.append(noteObj.pitch)
+      matches = matches[matches < self.cursor]
+      foundCursor = int(matches[-1]) if (len(matches) > 0) else -1
 
-      if (len(foundPitch) > 0) :
-        isInList = True
-        
-        for x in pitchList :
-          if not(x in foundPitch) :
-            isInList = False
-            break
-        
-        if isInList :
-          print(f"[INFO] Find: current input was found at cursor = {cursorTry}")
-          found = True
-          foundCursor = cursorTry
-          break
+    if (foundCursor >= 0) :
+      print(f"[INFO] Find: current input was found at cursor = {foundCursor} ({len(matches)} matches in this direction)")
       
-    if found :
       # We must prevent the arbiter from taking this as a valid input
       # and move on to the next cursor
       # All notes must be released to exit the 'search' mode.
-      self.cursor = foundCursor
+      self.cursorGoto(foundCursor)
       arbiterSuspendReq = True
       arbiterPitchListHold = pitchList.copy()
       return (arbiterSuspendReq, arbiterPitchListHold)
@@ -1774,6 +2524,30 @@ class Score(widget.Widget) :
 
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD Score._searchKeyboardInput()                               [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _searchKeyboardInput(self, direction = 1) -> None :
+    """
+    Searches the notes currently pressed on the MIDI keyboard in the score
+    and moves the cursor to the next match (see 'Score.search()').
+    The arbiter is suspended until the query notes are released.
+    """
+
+    if not(WIDGET_ID_ARBITER in self.top.widgets) :
+      return
+
+    arbiterObj = self.top.widgets[WIDGET_ID_ARBITER]
+    if not(arbiterObj.hasActiveMidiInput()) :
+      print("[INFO] Find: press the notes to search on the keyboard first.")
+      return
+
+    (arbiterSuspendReq, arbiterPitchListHold) = self.search(arbiterObj.getMidiCurr(), direction)
+    if arbiterSuspendReq :
+      arbiterObj.suspendReq(arbiterPitchListHold)
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD Score.noteHandSwap()
   # ---------------------------------------------------------------------------
@@ -1837,6 +2611,7 @@ class Score(widget.Widget) :
 
     # Rebuild the lists of cursors
     self._buildCursorsLR()
+    self._buildChordIndex()
 
     lengthLR = len(self.noteOnTimecodes["LR_full"])
     lengthL = len(self.noteOnTimecodes["L"]); lengthR = len(self.noteOnTimecodes["R"])
@@ -1890,7 +2665,7 @@ class Score(widget.Widget) :
     # There's nothing to start; so we assume that a hit on 'w' means
     # you want to erase this section.
     if self.isArpeggioSection() :
-      self.sectionArpeggio = [x for x in self.sectionArpeggio if ((self.getCursor() < x[0]) or (self.getCursor() > x[1]))]
+      self.sectionIndex["arpeggio"].remove(self.getCursor())
       print("[INFO] Arpeggio section was removed.")
 
     # The section has no arpeggio indication: the user wants to start
@@ -1899,9 +2674,11 @@ class Score(widget.Widget) :
     # If the user wants to make it longer, he has to extend it by pressing 'ctrl + w'
     # at the end location.
     else :
-      self.sectionArpeggio.append([self.getCursor(), self.getCursor()])
+      self.sectionIndex["arpeggio"].add([self.getCursor(), self.getCursor()])
       print(f"[INFO] New arpeggio section; start point = {self.getCursor()}")
 
+    self._onTableEdit("arpeggioSections")
+
 
 
   # ---------------------------------------------------------------------------
@@ -1928,8 +2705,9 @@ class Score(widget.Widget) :
         (index, lastSection) = arpeggioBeforeCursor[-1]
 
         if (lastSection[0] == lastSection[1]) :
-          self.sectionArpeggio[index][1] = self.getCursor()
+          self.sectionIndex["arpeggio"].setEnd(index, self.getCursor())
           print(f"[INFO] Arpeggio section starting at cursor = {lastSection[0]} extended up to cursor = {self.getCursor()}")
+          self._onTableEdit("arpeggioSections")
 
       else :
         print(f"[INFO] Arpeggio section: there is no section to extend.")
@@ -1951,17 +2729,16 @@ class Score(widget.Widget) :
 
 
   # ---------------------------------------------------------------------------
-  # METHOD: Score.arpeggioGetNotesInSection()
+  # METHOD: Score.arpeggioGetSectionBound()
   # ---------------------------------------------------------------------------
   def arpeggioGetSectionBound(self) -> tuple[int, int] :
     """
     Returns the boundaries of the current arpeggio section.
     """
 
-    for I in self.sectionArpeggio :
-      (a,b) = I
-      if ((self.getCursor() >= a) and (self.getCursor() <= b)) :
-        return (a,b)
+    section = self.sectionIndex["arpeggio"].getSection(self.getCursor())
+    if section is not None :
+      return (section[0], section[1])
     
 
 
@@ -1979,12 +2756,7 @@ class Score(widget.Widget) :
     If no cursor is given it defaults to the current cursor.
     """
 
-    if (cursor == -1) : cursor = self.getCursor()
-
-    for (index, I) in enumerate(self.sectionArpeggio) :
-      (a,b) = I
-      if ((self.getCursor() >= a) and (self.getCursor() <= b)) :
-        return index
+    return self.getSectionID("arpeggio", cursor)
 
 
 
@@ -1996,12 +2768,26 @@ class Score(widget.Widget) :
     Indicate if the current cursor belongs to an arpeggio section.
     """
 
-    for I in self.sectionArpeggio :
-      (a,b) = I
-      if ((self.getCursor() >= a) and (self.getCursor() <= b)) :
-        return True
-        
-    return False
+    return self.sectionIndex["arpeggio"].contains(self.getCursor())
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Score.getSectionID()
+  # ---------------------------------------------------------------------------
+  def getSectionID(self, sectionType: str, cursor = -1) -> int :
+    """
+    Returns the identifier (index in the list of sections) of the section of 
+    type 'sectionType' ("arpeggio", "tempo", "key") the given cursor belongs to.
+
+    If the cursor doesn't belong to a section, the function returns -1.
+
+    If no cursor is given it defaults to the current cursor.
+    """
+
+    if (cursor == -1) : cursor = self.getCursor()
+
+    return self.sectionIndex[sectionType].getID(cursor)
 
 
 
@@ -2011,9 +2797,12 @@ class Score(widget.Widget) :
   def render(self) -> None :
     """
     Renders the widget on screen.
-    This function is called at every frame of the top level application.
+    This function is called every time the widget needs to be redrawn.
     """
 
+    if self.saveWorker.isBusy() :
+      text.render(self.top.screen, "SAVING...", (1200, 20), 2, GUI_TEXT_COLOR)
+
     # Display the cursor value
     text.render(self.top.screen, f"CURSOR: {self.getCursor()+1} / {self.length}", (12, 20), 2, GUI_TEXT_COLOR)
 
@@ -2032,6 +2821,74 @@ class Score(widget.Widget) :
       
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD: Score.update()
+  # ---------------------------------------------------------------------------
+  def update(self) -> None :
+    """
+    Runs the file operations in the background of the app (save, autosave, 
+    journal merge)
+    This function is called at every frame of the top level application.
+    """
+
+    # Outcome of the background writes
+    if self.saveWorker.isBusy() :
+      self._savePoll()
+
+    # Autosave
+    if ((AUTOSAVE_INTERVAL_SEC > 0) and self.hasUnsavedChanges and (self.lastEditTime > self.lastAutosaveTime)) :
+      if ((time.time() - self.lastAutosaveTime) > AUTOSAVE_INTERVAL_SEC) :
+        self.autosave()
+
+    # Merge the journal in the .gq3 file while the app is idle
+    if self._isCompactionDue() :
+      print("[INFO] Idle: merging the journal in the .gq3 file...")
+      self.compact()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Score.getUpdateDelay()
+  # ---------------------------------------------------------------------------
+  def getUpdateDelay(self) :
+    """
+    Returns the time (seconds) after which the widget needs the next frame 
+    (see 'Widget.getUpdateDelay()'): full rate while a file is being written, 
+    time left before the autosave otherwise.
+    """
+
+    if self.saveWorker.isBusy() :
+      return 0
+
+    if ((AUTOSAVE_INTERVAL_SEC > 0) and self.hasUnsavedChanges and (self.lastEditTime > self.lastAutosaveTime)) :
+      return max(self.lastAutosaveTime + AUTOSAVE_INTERVAL_SEC - time.time(), 0)
+
+    return None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Score.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
+    """
+
+    arpeggioProgress = None
+    if self.isArpeggioSection() :
+      arpeggioProgress = self.top.widgets[WIDGET_ID_ARBITER].evalArpeggioProgress()
+
+    return (
+      self.getCursor(), 
+      self.length, 
+      self.saveWorker.isBusy(), 
+      self.getBookmarkIndex(), 
+      self.activeHands, 
+      arpeggioProgress
+    )
+
+
 
   # ---------------------------------------------------------------------------
   # METHOD Score._onKeyEvent()                                      [INHERITED]
@@ -2070,11 +2927,27 @@ class Score(widget.Widget) :
         if (key == pygame.K_w) :
           self.arpeggioSectionSet()
 
+        # F: find the notes currently pressed on the keyboard (forward)
+        if (key == pygame.K_f) :
+          self._searchKeyboardInput(direction = 1)
+
+        # U, F2: show the upcoming notes one cursor further
+        if (key in (pygame.K_u, pygame.K_F2)) :
+          self.setLookaheadDistance(self.lookAheadDistance + 1)
+
       elif (modifier == "ctrl") :
         
+        # CTRL + F: find the notes currently pressed on the keyboard (backward)
+        if (key == pygame.K_f) :
+          self._searchKeyboardInput(direction = -1)
+        
         # CTRL + W: extend a region under weak arbitration
         if (key == pygame.K_w) :
           self.arpeggioSectionExtend()
+
+        # CTRL + U: show the upcoming notes one cursor less further
+        if (key == pygame.K_u) :
+          self.setLookaheadDistance(self.lookAheadDistance - 1)
         
 
 
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : sectionIndex
+# File name     : sectionIndex.py
+# File type     : Python script (Python 3)
+# Purpose       : lookup table for the sections of the score (arpeggio, tempo etc.)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# The sections of the score (arpeggio, tempo, key...) are stored as lists of
+# cursor intervals: [start, end] (both included), possibly followed by some
+# parameters (e.g. a tempo value).
+#
+# The arbiter and the rendering need to know in which section the cursor is
+# several times per frame: scanning the list each time is avoided with a
+# table giving the section of each cursor ('SectionIndex.cursorToID').
+# The identifier of a section is its index in the list.
+#
+# When sections overlap, a cursor belongs to the section that comes first in
+# the list.
+#
+# The table is updated incrementally when a section is added, removed or
+# extended: only the cursors of this section are processed.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import numpy as np
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# Identifier of the cursors outside of any section
+SECTION_INDEX_NONE = -1
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class SectionIndex :
+
+  """
+  SECTION_INDEX object
+
+  Lookup table for a list of sections.
+
+  The index works on the list given at initialisation (no copy): sections
+  must be added/removed/extended through the methods of the index so that
+  the table stays in sync with the list.
+  """
+
+  def __init__(self, sections: list, cursorCount: int) :
+
+    self.sections     = sections
+    self.cursorCount  = cursorCount
+    self.cursorToID   = np.full(cursorCount, SECTION_INDEX_NONE, dtype = np.int32)
+
+    # Process the sections backwards: the first one in the list wins
+    for index in reversed(range(len(sections))) :
+      (a, b) = self._getRange(index)
+      self.cursorToID[a:b] = index
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SectionIndex.getID()
+  # ---------------------------------------------------------------------------
+  def getID(self, cursor: int) -> int :
+    """
+    Returns the identifier (index in the list) of the section the cursor
+    belongs to, SECTION_INDEX_NONE (-1) if it does not belong to a section.
+    """
+
+    if (0 <= cursor < self.cursorCount) :
+      return int(self.cursorToID[cursor])
+    else :
+      return SECTION_INDEX_NONE
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SectionIndex.getSection()
+  # ---------------------------------------------------------------------------
+  def getSection(self, cursor: int) :
+    """
+    Returns the section the cursor belongs to (entry of the list), None if it
+    does not belong to a section.
+    """
+
+    index = self.getID(cursor)
+    return self.sections[index] if (index != SECTION_INDEX_NONE) else None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SectionIndex.contains()
+  # ---------------------------------------------------------------------------
+  def contains(self, cursor: int) -> bool :
+    """
+    Returns True if the cursor belongs to a section.
+    """
+
+    return (self.getID(cursor) != SECTION_INDEX_NONE)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SectionIndex.add()
+  # ---------------------------------------------------------------------------
+  def add(self, section: list) -> int :
+    """
+    Appends a section ([start, end, ...]) to the list.
+    Returns its identifier.
+    """
+
+    self.sections.append(section)
+    index = len(self.sections) - 1
+
+    (a, b) = self._getRange(index)
+    span = self.cursorToID[a:b]
+    span[span == SECTION_INDEX_NONE] = index
+
+    return index
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SectionIndex.remove()
+  # ---------------------------------------------------------------------------
+  def remove(self, cursor: int) -> int :
+    """
+    Removes all the sections the cursor belongs to.
+    Returns the number of sections removed.
+    """
+
+    removed = [i for (i, _) in enumerate(self.sections) if (self._getRange(i)[0] <= cursor < self._getRange(i)[1])]
+    for index in reversed(removed) :
+      (a, b) = self._getRange(index)
+      del self.sections[index]
+
+      # Identifiers after the removed section are shifted
+      self.cursorToID[self.cursorToID == index] = SECTION_INDEX_NONE
+      self.cursorToID[self.cursorToID > index] -= 1
+
+      # Cursors of the removed section might belong to another section
+      for other in reversed(range(len(self.sections))) :
+        (c, d) = self._getRange(other)
+        if ((c < b) and (d > a)) :
+          span = self.cursorToID[max(a, c):min(b, d)]
+          span[(span == SECTION_INDEX_NONE) | (span > other)] = other
+
+    return len(removed)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SectionIndex.setEnd()
+  # ---------------------------------------------------------------------------
+  def setEnd(self, index: int, end: int) -> None :
+    """
+    Moves the end of a section further in the score.
+    """
+
+    (_, b) = self._getRange(index)
+    self.sections[index][1] = end
+    (_, d) = self._getRange(index)
+
+    span = self.cursorToID[b:d]
+    span[(span == SECTION_INDEX_NONE) | (span > index)] = index
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SectionIndex._getRange()                                   [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getRange(self, index: int) -> tuple[int, int] :
+    """
+    Returns the cursors covered by a section as a slice (start, end excluded)
+    of the table.
+    """
+
+    a = min(max(int(self.sections[index][0]), 0), self.cursorCount)
+    b = min(max(int(self.sections[index][1]) + 1, a), self.cursorCount)
+    return (a, b)
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'sectionIndex.py'")
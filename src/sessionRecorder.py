@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : sessionRecorder
+# File name     : sessionRecorder.py
+# File type     : Python script (Python 3)
+# Purpose       : records the MIDI input of a practice session
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# The stats only keep counters: what was actually played is lost.
+#
+# The session recorder writes every MIDI input event to a binary file, along
+# with the cursor in the score when the event was received. 
+# The events are recorded as they come from the keyboard, before the input 
+# transpose is undone: the transpose is stored in each record. 
+# The note in the score is 'note - transpose' for the note on/off events.
+# One file is created per session in SESSION_RECORDER_PATH:
+#   ./logs/sessions/<song name>___<date>.gqrec
+#
+# FILE LAYOUT
+# - magic word (4 bytes) + revision (uint32) + header length (uint32)
+# - header: JSON dictionary (song, date, time origin...), padded so that the 
+#   records start on a 64 bytes boundary
+# - records: 16 bytes each (see SESSION_RECORD_DTYPE), little endian.
+#
+# The records are appended as the session goes: a recording interrupted by a 
+# crash is still readable (an incomplete last record is ignored).
+#
+# The events are buffered and written by a background thread: the main loop 
+# never waits for the disk.
+#
+# The recordings are read with 'sessionRecorder.load()': the records are 
+# memory-mapped and exposed as NumPy arrays.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.saveWorker as saveWorker
+
+# Standard libraries
+import datetime
+import json
+import numpy as np
+import os
+import struct
+import time
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+SESSION_RECORDER_MAGIC      = b"GQRS"
+SESSION_RECORDER_REVISION   = 1
+SESSION_RECORDER_ALIGNMENT  = 64
+
+# Layout of a record
+SESSION_RECORD_DTYPE = np.dtype([
+  ("timestamp", "<i8"),     # Time of arrival ('time.perf_counter_ns()')
+  ("status",    "u1"),      # MIDI status byte (e.g. 0x90: note on, channel 1)
+  ("note",      "u1"),      # 1st data byte (note, controller...)
+  ("velocity",  "u1"),      # 2nd data byte (velocity, controller value...)
+  ("transpose", "i1"),      # Input transpose in semitones ('GangQin.midiTranspose')
+  ("cursor",    "<i4")      # Cursor in the score when the event was received
+])
+
+# Number of events buffered before they are handed to the writer thread
+SESSION_RECORDER_BATCH_SIZE = 256
+
+# Maximum time the events stay in the buffer
+SESSION_RECORDER_FLUSH_SEC = 2.0
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class SessionRecorder :
+
+  """
+  SESSION_RECORDER object
+
+  Records the MIDI input events of a session.
+
+  Mode of operation:
+  - 'SessionRecorder.start()' once the song is loaded
+  - 'SessionRecorder.record()' for each MIDI input event
+  - 'SessionRecorder.update()' at each frame
+  - 'SessionRecorder.close()' when leaving the app
+  """
+
+  def __init__(self) :
+
+    self.recordFile   = ""
+    self.pending      = []          # Events not handed to the writer yet
+    self.recordCount  = 0
+    self.flushTime    = 0.0
+    self.fileHandler  = None        # Used by the writer thread only
+    self.worker       = saveWorker.SaveWorker()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SessionRecorder.start()
+  # ---------------------------------------------------------------------------
+  def start(self, songFile: str) -> None :
+    """
+    Starts the recording of a new session for the song 'songFile'.
+    """
+
+    if not(SESSION_RECORDER_ENABLE) :
+      return
+
+    (songName, _) = os.path.splitext(os.path.basename(songFile))
+    startTime = datetime.datetime.now()
+    self.recordFile = os.path.join(SESSION_RECORDER_PATH, f"{songName}___{startTime.strftime('%Y%m%d_%H%M%S')}{SESSION_RECORDER_EXTENSION}")
+    
+    header = {
+      "song"            : os.path.basename(songFile),
+      "date"            : startTime.isoformat(timespec = "seconds"),
+      "timestampOrigin" : time.perf_counter_ns(),
+      "appVersion"      : f"v{REV_MAJOR}.{REV_MINOR}",
+      "dtype"           : SESSION_RECORD_DTYPE.descr
+    }
+
+    self.pending = []
+    self.recordCount = 0
+    self.flushTime = time.perf_counter()
+    self.worker.submit(self._open, self.recordFile, header, tag = "open")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SessionRecorder.record()
+  # ---------------------------------------------------------------------------
+  def record(self, timestamp: int, midiMessage, cursor: int, transpose = 0) -> None :
+    """
+    Adds a MIDI message to the recording.
+    'timestamp' is its time of arrival ('time.perf_counter_ns()')
+    'transpose' is the input transpose active when it was received.
+    """
+
+    if not(self.recordFile) :
+      return
+
+    data = midiMessage.bytes() + [0, 0]
+    self.pending.append((timestamp, data[0], data[1], data[2], transpose, cursor))
+    self.recordCount += 1
+
+    if ((len(self.pending) >= SESSION_RECORDER_BATCH_SIZE) or ((time.perf_counter() - self.flushTime) > SESSION_RECORDER_FLUSH_SEC)) :
+      self.flush()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SessionRecorder.update()
+  # ---------------------------------------------------------------------------
+  def update(self) -> None :
+    """
+    Hands the buffered events to the writer thread once they are older than
+    SESSION_RECORDER_FLUSH_SEC, even if nothing is played anymore.
+    Called at each frame of the main loop.
+    """
+
+    if (self.pending and ((time.perf_counter() - self.flushTime) > SESSION_RECORDER_FLUSH_SEC)) :
+      self.flush()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SessionRecorder.flush()
+  # ---------------------------------------------------------------------------
+  def flush(self) -> None :
+    """
+    Hands the buffered events to the writer thread.
+    """
+
+    for (tag, _, error, _) in self.worker.poll() :
+      if error is not None :
+        print(f"[WARNING] Session recorder: could not write '{self.recordFile}' ({error})")
+
+    if self.pending :
+      self.worker.submit(self._write, np.array(self.pending, dtype = SESSION_RECORD_DTYPE).tobytes(), tag = "write")
+      self.pending = []
+    
+    self.flushTime = time.perf_counter()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SessionRecorder.close()
+  # ---------------------------------------------------------------------------
+  def close(self) -> None :
+    """
+    Writes the remaining events and closes the recording.
+    Empty recordings are deleted.
+    """
+
+    if not(self.recordFile) :
+      return
+
+    self.flush()
+    self.worker.submit(self._close, (self.recordCount == 0), tag = "close")
+    for (tag, _, error, _) in self.worker.wait() :
+      if error is not None :
+        print(f"[WARNING] Session recorder: could not write '{self.recordFile}' ({error})")
+
+    if (self.recordCount > 0) :
+      print(f"[INFO] Session recorded to '{self.recordFile}' ({self.recordCount} events)")
+    
+    self.recordFile = ""
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SessionRecorder._open()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _open(self, recordFile: str, header: dict) -> None :
+    """
+    Creates the recording file and writes its header.
+    NOTE: runs in the writer thread.
+    """
+
+    os.makedirs(os.path.dirname(recordFile), exist_ok = True)
+
+    headerBytes = json.dumps(header).encode("utf-8")
+    dataStart = -(-(12 + len(headerBytes)) // SESSION_RECORDER_ALIGNMENT) * SESSION_RECORDER_ALIGNMENT
+    headerBytes += b" " * (dataStart - 12 - len(headerBytes))
+
+    self.fileHandler = open(recordFile, "wb")
+    self.fileHandler.write(struct.pack("<4sII", SESSION_RECORDER_MAGIC, SESSION_RECORDER_REVISION, len(headerBytes)))
+    self.fileHandler.write(headerBytes)
+    self.fileHandler.flush()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SessionRecorder._write()                                   [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _write(self, data: bytes) -> None :
+    """
+    Appends records to the recording file.
+    NOTE: runs in the writer thread.
+    """
+
+    if self.fileHandler is not None :
+      self.fileHandler.write(data)
+      self.fileHandler.flush()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD SessionRecorder._close()                                   [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _close(self, delete: bool) -> None :
+    """
+    Closes the recording file (deletes it if 'delete' is True).
+    NOTE: runs in the writer thread.
+    """
+
+    if self.fileHandler is not None :
+      fileName = self.fileHandler.name
+      self.fileHandler.close()
+      self.fileHandler = None
+      
+      if delete :
+        os.remove(fileName)
+
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# FUNCTION load()
+# -----------------------------------------------------------------------------
+def load(recordFile: str) :
+  """
+  Reads a session recording.
+  Returns a (header, columns) tuple:
+  - 'header': dictionary (song, date, timestampOrigin...)
+  - 'columns': dictionary of arrays, one per field of SESSION_RECORD_DTYPE 
+    (timestamp, status, note, velocity, transpose, cursor)
+
+  The records are memory-mapped (read only).
+  Returns None if the file is not a valid recording.
+  """
+
+  try :
+    with open(recordFile, "rb") as f :
+      preamble = f.read(12)
+      if (len(preamble) != 12) :
+        return None
+
+      (magic, revision, headerLength) = struct.unpack("<4sII", preamble)
+      if ((magic != SESSION_RECORDER_MAGIC) or (revision != SESSION_RECORDER_REVISION)) :
+        print(f"[WARNING] '{recordFile}' is not a session recording (or has an unknown revision)")
+        return None
+
+      header = json.loads(f.read(headerLength).decode("utf-8"))
+
+    dataStart = 12 + headerLength
+    recordCount = (os.path.getsize(recordFile) - dataStart) // SESSION_RECORD_DTYPE.itemsize
+    if (recordCount > 0) :
+      records = np.memmap(recordFile, dtype = SESSION_RECORD_DTYPE, mode = "r", offset = dataStart, shape = (recordCount,))
+    else :
+      records = np.zeros(0, dtype = SESSION_RECORD_DTYPE)
+
+  except (OSError, ValueError, TypeError) as err :
+    print(f"[WARNING] Could not read the session recording '{recordFile}' ({err})")
+    return None
+
+  columns = {name: records[name] for name in SESSION_RECORD_DTYPE.names}
+  return (header, columns)
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'sessionRecorder.py'")
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : smfParser
+# File name     : smfParser.py
+# File type     : Python script (Python 3)
+# Purpose       : fast reader for Standard MIDI Files (.mid)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# Reading a MIDI file with 'mido' creates a Message object for each event of
+# the file, which is slow on large files.
+# gangQin only needs a few types of events: the parser decodes the chunks of
+# the file in a single pass and stores these events in arrays:
+# - note on/note off
+# - tempo changes
+# - time signatures
+# - key signatures
+# - track names
+# All other events are skipped.
+#
+# The result of the last parsings is kept in memory: the track selection GUI
+# and the Score import share the same output.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+from functools import lru_cache
+import numpy as np
+import os
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# Number of parsed files kept in memory
+SMF_PARSER_CACHE_SIZE = 4
+
+# Number of data bytes following a status byte (channel and system common messages)
+# Sysex (0xF0, 0xF7) and meta events (0xFF) have a variable length.
+SMF_DATA_LENGTH = [0]*128 + [2]*64 + [1]*32 + [2]*16 + [0, 1, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+
+# Key signature names (index: number of sharps (> 0) or flats (< 0) + 7)
+SMF_KEYS_MAJOR = ["Cb", "Gb", "Db", "Ab", "Eb", "Bb", "F", "C", "G", "D", "A", "E", "B", "F#", "C#"]
+SMF_KEYS_MINOR = ["Ab", "Eb", "Bb", "F", "C", "G", "D", "A", "E", "B", "F#", "C#", "G#", "D#", "A#"]
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class SmfTrack :
+
+  """
+  SMF_TRACK object
+
+  Content of a track of a MIDI file.
+
+  Note events are stored in arrays (one entry per event, in the order of the file):
+  - 'noteTime'    : absolute time of the event (ticks)
+  - 'notePitch'   : MIDI code of the note
+  - 'noteVelocity': velocity of the event. 0 for a release ('note off' or
+                    'note on' with a null velocity)
+  - 'noteChannel' : MIDI channel
+
+  Other events are stored as lists of tuples:
+  - 'tempos'          : (time, tempo in microseconds per quarter note)
+  - 'timeSignatures'  : (time, numerator, denominator)
+  - 'keySignatures'   : (time, key name) e.g. (0, "Ebm")
+  """
+
+  def __init__(self) :
+    self.name           = ""
+    self.noteCount      = 0
+    self.noteTime       = np.zeros(0, dtype = np.int64)
+    self.notePitch      = np.zeros(0, dtype = np.uint8)
+    self.noteVelocity   = np.zeros(0, dtype = np.uint8)
+    self.noteChannel    = np.zeros(0, dtype = np.uint8)
+    self.tempos         = []
+    self.timeSignatures = []
+    self.keySignatures  = []
+
+
+
+class SmfFile :
+
+  """
+  SMF_FILE object
+
+  Content of a MIDI file: header information and list of SmfTrack objects.
+  """
+
+  def __init__(self) :
+    self.midiFile     = ""
+    self.format       = 0
+    self.ticksPerBeat = 0
+    self.tracks       = []
+
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# FUNCTION load()
+# -----------------------------------------------------------------------------
+def load(midiFile: str) -> SmfFile :
+  """
+  Returns the content of a MIDI file (SmfFile object).
+
+  The file is parsed once: the next calls return the same object as long as
+  the file is not modified.
+  Do not modify the returned object.
+  """
+
+  stat = os.stat(midiFile)
+  return _loadCached(os.path.abspath(midiFile), stat.st_mtime_ns, stat.st_size)
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION _loadCached()                                            [PRIVATE]
+# -----------------------------------------------------------------------------
+@lru_cache(maxsize = SMF_PARSER_CACHE_SIZE)
+def _loadCached(midiFile: str, mtime: int, size: int) -> SmfFile :
+  """
+  Memoized version of 'parse()'.
+  Modification time and size are part of the key so that a modified file
+  is parsed again.
+  """
+
+  return parse(midiFile)
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION parse()
+# -----------------------------------------------------------------------------
+def parse(midiFile: str) -> SmfFile :
+  """
+  Parses a MIDI file and returns its content (SmfFile object).
+  Raises an OSError if the file is not a valid MIDI file.
+  """
+
+  with open(midiFile, "rb") as f :
+    data = f.read()
+
+  out = SmfFile()
+  out.midiFile = midiFile
+
+  if (data[0:4] != b"MThd") :
+    raise OSError(f"'{midiFile}' is not a MIDI file (no MThd header)")
+
+  headerLength    = int.from_bytes(data[4:8], "big")
+  out.format      = int.from_bytes(data[8:10], "big")
+  trackCount      = int.from_bytes(data[10:12], "big")
+  out.ticksPerBeat = int.from_bytes(data[12:14], "big")
+
+  # Loop on the chunks
+  pos = 8 + headerLength
+  while ((pos + 8) <= len(data)) and (len(out.tracks) < trackCount) :
+    chunkType   = data[pos:(pos+4)]
+    chunkLength = int.from_bytes(data[(pos+4):(pos+8)], "big")
+    pos += 8
+
+    # Unknown chunks must be ignored
+    if (chunkType == b"MTrk") :
+      out.tracks.append(_parseTrack(data, pos, min(pos + chunkLength, len(data))))
+
+    pos += chunkLength
+
+  return out
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION _parseTrack()                                            [PRIVATE]
+# -----------------------------------------------------------------------------
+def _parseTrack(data: bytes, pos: int, end: int) -> SmfTrack :
+  """
+  Decodes the events of a track chunk ('data[pos:end]')
+  """
+
+  track = SmfTrack()
+  trackNameRead = False
+
+  times     = []
+  pitches   = []
+  velocities = []
+  channels  = []
+
+  currTime = 0
+  lastStatus = -1
+  while (pos < end) :
+
+    # Delta time (variable length quantity)
+    byte = data[pos]; pos += 1
+    delta = byte & 0x7F
+    while (byte & 0x80) :
+      byte = data[pos]; pos += 1
+      delta = (delta << 7) | (byte & 0x7F)
+    currTime += delta
+
+    # Status byte (or running status)
+    status = data[pos]
+    if (status & 0x80) :
+      pos += 1
+
+      # Meta messages don't set running status
+      if (status != 0xFF) :
+        lastStatus = status
+    else :
+      if (lastStatus == -1) :
+        raise OSError("running status without a previous status byte")
+      status = lastStatus
+
+    # EVENT: note on/note off
+    if (0x80 <= status <= 0x9F) :
+      pitch     = data[pos]
+      velocity  = data[pos+1]
+      pos += 2
+
+      # Note off: velocity forced to 0
+      if (status < 0x90) :
+        velocity = 0
+      elif (velocity > 0) :
+        track.noteCount += 1
+
+      times.append(currTime)
+      pitches.append(pitch)
+      velocities.append(velocity)
+      channels.append(status & 0x0F)
+
+    # EVENT: meta message
+    elif (status == 0xFF) :
+      metaType = data[pos]; pos += 1
+      byte = data[pos]; pos += 1
+      length = byte & 0x7F
+      while (byte & 0x80) :
+        byte = data[pos]; pos += 1
+        length = (length << 7) | (byte & 0x7F)
+      metaData = data[pos:(pos+length)]
+      pos += length
+
+      # Track name (the first one is kept)
+      if ((metaType == 0x03) and not(trackNameRead)) :
+        track.name = metaData.decode("latin1")
+        trackNameRead = True
+
+      # Tempo
+      elif ((metaType == 0x51) and (length == 3)) :
+        track.tempos.append((currTime, int.from_bytes(metaData, "big")))
+
+      # Time signature
+      elif ((metaType == 0x58) and (length >= 2)) :
+        track.timeSignatures.append((currTime, metaData[0], 2**metaData[1]))
+
+      # Key signature
+      elif ((metaType == 0x59) and (length == 2)) :
+        sf = metaData[0] - 256 if (metaData[0] > 127) else metaData[0]
+        if (-7 <= sf <= 7) :
+          keyName = SMF_KEYS_MINOR[sf+7] + "m" if (metaData[1] == 1) else SMF_KEYS_MAJOR[sf+7]
+          track.keySignatures.append((currTime, keyName))
+
+      # End of track
+      elif (metaType == 0x2F) :
+        break
+
+    # EVENT: sysex
+    elif ((status == 0xF0) or (status == 0xF7)) :
+      byte = data[pos]; pos += 1
+      length = byte & 0x7F
+      while (byte & 0x80) :
+        byte = data[pos]; pos += 1
+        length = (length << 7) | (byte & 0x7F)
+      pos += length
+
+    # EVENT: any other message (ignored)
+    else :
+      pos += SMF_DATA_LENGTH[status]
+
+  track.noteTime      = np.array(times, dtype = np.int64)
+  track.notePitch     = np.array(pitches, dtype = np.uint8)
+  track.noteVelocity  = np.array(velocities, dtype = np.uint8)
+  track.noteChannel   = np.array(channels, dtype = np.uint8)
+
+  return track
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'smfParser.py'")
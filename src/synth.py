@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : synth
+# File name     : synth.py
+# File type     : Python script (Python 3)
+# Purpose       : software synthesizer for the playback (no MIDI output port)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# When no MIDI output port can be opened (no hardware synth), the playback
+# goes through this software synthesizer instead.
+# The Synth object behaves like a mido output port ('Synth.send()',
+# 'Synth.close()') so that the rest of the app does not need to know.
+#
+# SOUND
+# Each pitch has a wavetable: a few harmonics with an exponential decay (a
+# rough piano-like tone). The wavetables are computed with NumPy the first
+# time the pitch is played, then cached.
+#
+# MIXING
+# The audio device calls 'Synth._callback()' each time it needs a block of
+# samples (SYNTH_BLOCK_SIZE). The callback runs in the audio thread:
+# - it applies the note on/off queued by 'Synth.send()' since the last block
+# - it adds the next block of the wavetable of each active voice (array
+#   slices, no loop on the samples)
+# - notes released fade out with a precomputed release curve
+#
+# A voice is freed at the end of its wavetable or of its release. When all
+# the voices are busy (SYNTH_MAX_VOICES), the oldest one is replaced.
+#
+# The wavetables are built in the thread calling 'Synth.send()', never in
+# the audio thread: the callback only does light work and cannot underrun.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import collections
+import numpy as np
+import pygame
+from pygame._sdl2 import audio as sdlAudio
+import time
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# Number of harmonics of the wavetables
+SYNTH_HARMONICS = 8
+
+# Attack of the wavetables (seconds)
+SYNTH_ATTACK_SEC = 0.003
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class Synth :
+
+  """
+  SYNTH object
+
+  Software synthesizer. Can be used in place of a mido output port.
+
+  Mode of operation:
+  - 'Synth.open()' opens the audio device (returns False if it fails)
+  - 'Synth.send()' with the MIDI messages (note on/off, other messages are
+    ignored)
+  - 'Synth.close()' when done
+  """
+
+  def __init__(self, sampleRate = SYNTH_SAMPLE_RATE, maxVoices = SYNTH_MAX_VOICES) :
+
+    self.sampleRate = sampleRate
+    self.maxVoices  = maxVoices
+    self.device     = None
+
+    self.wavetables = {}                    # Wavetable of each pitch (built on first use)
+    self.events     = collections.deque()   # Note on/off waiting for the next block
+
+    # Release curve (common to all the voices)
+    releaseLength = int(SYNTH_RELEASE_SEC*sampleRate)
+    self.releaseCurve = np.exp(-5.0*np.arange(releaseLength)/releaseLength).astype(np.float32)
+
+    # Voices (accessed by the audio thread only)
+    self.voicePitch   = [-1 for _ in range(maxVoices)]   # -1: voice is free
+    self.voicePos     = [0 for _ in range(maxVoices)]    # Position in the wavetable
+    self.voiceGain    = [0.0 for _ in range(maxVoices)]
+    self.voiceRelease = [-1 for _ in range(maxVoices)]   # Position in the release curve (-1: note held)
+    self.voiceStart   = [0 for _ in range(maxVoices)]    # Order of the note on (to find the oldest voice)
+    self.noteOnCount  = 0
+
+    # Counters
+    self.blockCount = 0
+    self.mixTime    = 0
+    self.mixTimeMax = 0
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Synth.open()
+  # ---------------------------------------------------------------------------
+  def open(self) -> bool :
+    """
+    Opens the default audio output and starts the synthesizer.
+    Returns False if no audio output is available.
+    """
+
+    try :
+      deviceNames = sdlAudio.get_audio_device_names(False)
+      if not(deviceNames) :
+        print("[WARNING] Synth: no audio output found.")
+        return False
+
+      self.device = sdlAudio.AudioDevice(
+        devicename      = deviceNames[0],
+        iscapture       = False,
+        frequency       = self.sampleRate,
+        audioformat     = sdlAudio.AUDIO_F32,
+        numchannels     = 1,
+        chunksize       = SYNTH_BLOCK_SIZE,
+        allowed_changes = 0,
+        callback        = self._callback
+      )
+
+    except pygame.error as err :
+      print(f"[WARNING] Synth: could not open the audio output ({err})")
+      self.device = None
+      return False
+
+    self.device.pause(0)
+    return True
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Synth.send()
+  # ---------------------------------------------------------------------------
+  def send(self, midiMessage) -> None :
+    """
+    Plays a MIDI message (same interface as a mido output port).
+    """
+
+    if ((midiMessage.type == "note_on") and (midiMessage.velocity > 0)) :
+      if not(midiMessage.note in self.wavetables) :
+        self.wavetables[midiMessage.note] = self._buildWavetable(midiMessage.note)
+      self.events.append((midiMessage.note, midiMessage.velocity))
+
+    elif (midiMessage.type in ["note_on", "note_off"]) :
+      self.events.append((midiMessage.note, 0))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Synth.close()
+  # ---------------------------------------------------------------------------
+  def close(self) -> None :
+    """
+    Stops the synthesizer and closes the audio output.
+    """
+
+    if self.device is None :
+      return
+
+    self.device.close()
+    self.device = None
+
+    if (self.blockCount > 0) :
+      print(f"[INFO] Synth: {self.blockCount} blocks, mixing time {1e-3*self.mixTime/self.blockCount:.0f} us (average), {1e-3*self.mixTimeMax:.0f} us (max) per block of {1e6*SYNTH_BLOCK_SIZE/self.sampleRate:.0f} us")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Synth._buildWavetable()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _buildWavetable(self, pitch: int) -> np.ndarray :
+    """
+    Returns the wavetable of a pitch: the whole note (attack and decay),
+    normalised to 1.
+    Higher notes decay faster (and their wavetable is shorter)
+    """
+
+    f0 = 440.0*2.0**((pitch - 69)/12)
+    decay = min(max(1.2*(261.63/f0)**0.5, 0.15), SYNTH_NOTE_LENGTH_SEC/4)
+    length = int(min(4*decay, SYNTH_NOTE_LENGTH_SEC)*self.sampleRate)
+    t = np.arange(length)/self.sampleRate
+
+    wave = np.zeros(length)
+    for k in range(1, SYNTH_HARMONICS + 1) :
+      if ((k*f0) > 0.45*self.sampleRate) :
+        break
+      wave += np.sin(2*np.pi*k*f0*t)*np.exp(-t*(k**0.7)/decay)/(k**1.5)
+
+    attack = int(SYNTH_ATTACK_SEC*self.sampleRate)
+    wave[:attack] *= np.linspace(0.0, 1.0, attack)
+    wave /= np.max(np.abs(wave))
+
+    return wave.astype(np.float32)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Synth._noteOn()                                            [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _noteOn(self, pitch: int, velocity: int) -> None :
+    """
+    Starts a note on a free voice (or on the oldest one)
+    A note already playing on the same pitch is released.
+
+    NOTE: runs in the audio thread.
+    """
+
+    self._noteOff(pitch)
+
+    free = [v for v in range(self.maxVoices) if (self.voicePitch[v] < 0)]
+    if free :
+      v = free[0]
+    else :
+      v = min(range(self.maxVoices), key = lambda x: self.voiceStart[x])
+
+    self.noteOnCount += 1
+    self.voicePitch[v]    = pitch
+    self.voicePos[v]      = 0
+    self.voiceGain[v]     = velocity/127
+    self.voiceRelease[v]  = -1
+    self.voiceStart[v]    = self.noteOnCount
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Synth._noteOff()                                           [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _noteOff(self, pitch: int) -> None :
+    """
+    Releases the note held on a pitch.
+
+    NOTE: runs in the audio thread.
+    """
+
+    for v in range(self.maxVoices) :
+      if ((self.voicePitch[v] == pitch) and (self.voiceRelease[v] < 0)) :
+        self.voiceRelease[v] = 0
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Synth._callback()                                          [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _callback(self, audioDevice, stream) -> None :
+    """
+    Fills a block of samples (called by the audio device).
+
+    NOTE: runs in the audio thread.
+    """
+
+    t0 = time.perf_counter_ns()
+
+    while self.events :
+      (pitch, velocity) = self.events.popleft()
+      if (velocity > 0) :
+        self._noteOn(pitch, velocity)
+      else :
+        self._noteOff(pitch)
+
+    out = np.frombuffer(stream, dtype = np.float32)
+    n = len(out)
+    mix = np.zeros(n, dtype = np.float32)
+    releaseLength = len(self.releaseCurve)
+
+    for v in range(self.maxVoices) :
+      pitch = self.voicePitch[v]
+      if (pitch < 0) :
+        continue
+
+      pos = self.voicePos[v]
+      wave = self.wavetables[pitch][pos:pos + n]
+      m = len(wave)
+
+      rel = self.voiceRelease[v]
+      if (rel < 0) :
+        mix[:m] += self.voiceGain[v]*wave
+      else :
+        curve = self.releaseCurve[rel:rel + m]
+        m = len(curve)
+        mix[:m] += self.voiceGain[v]*wave[:m]*curve
+        self.voiceRelease[v] = rel + n
+
+      self.voicePos[v] = pos + n
+      if ((m < n) or (self.voiceRelease[v] >= releaseLength)) :
+        self.voicePitch[v] = -1
+
+    # Soft clipping when many notes are played together
+    out[:] = np.tanh(SYNTH_GAIN*mix)
+
+    duration = time.perf_counter_ns() - t0
+    self.blockCount += 1
+    self.mixTime += duration
+    self.mixTimeMax = max(self.mixTimeMax, duration)
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'synth.py'")
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : tempoMap
+# File name     : tempoMap.py
+# File type     : Python script (Python 3)
+# Purpose       : conversion of the score timecodes (MIDI ticks) to seconds
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# The timecodes of the score are MIDI ticks: their duration depends on the
+# resolution of the file (ticks per quarter note) and on the tempo, which can
+# change anywhere in the song ('set_tempo' meta events).
+#
+# The tempo map is the list of the tempo changes: (tick, tempo in microseconds
+# per quarter note).
+# The time (in seconds) at which each change occurs is precomputed (prefix
+# sum of the durations of the segments between changes) so that any tick can
+# be converted with a binary search and a multiplication.
+# Conversions are vectorised: a whole column of timecodes can be converted
+# at once.
+#
+# The tempo map is built when importing a MIDI file and stored in the '.gq3'.
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import numpy as np
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# Default values of the MIDI standard (120 BPM) and most common resolution
+TEMPO_MAP_DEFAULT_TEMPO = 500000
+TEMPO_MAP_DEFAULT_TICKS_PER_BEAT = 480
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class TempoMap :
+
+  """
+  TEMPO_MAP object
+
+  Converts the timecodes of the score (MIDI ticks) to seconds.
+
+  'changes' is a list of (tick, tempo in microseconds per quarter note).
+  The default tempo applies until the first change.
+  """
+
+  def __init__(self, ticksPerBeat = TEMPO_MAP_DEFAULT_TICKS_PER_BEAT, changes = ()) :
+
+    self.ticksPerBeat = int(ticksPerBeat) if (ticksPerBeat > 0) else TEMPO_MAP_DEFAULT_TICKS_PER_BEAT
+
+    # Sort the changes by tick: the last one wins when several changes
+    # share the same tick. Changes that keep the same tempo are dropped.
+    table = {0: TEMPO_MAP_DEFAULT_TEMPO}
+    for (tick, tempo) in sorted(changes, key = lambda x: x[0]) :
+      if (tempo > 0) :
+        table[max(int(tick), 0)] = int(tempo)
+
+    ticks = []; tempos = []
+    for (tick, tempo) in sorted(table.items()) :
+      if not(tempos) or (tempo != tempos[-1]) :
+        ticks.append(tick)
+        tempos.append(tempo)
+
+    self.ticks    = np.array(ticks, dtype = np.int64)
+    self.tempos   = np.array(tempos, dtype = np.int64)
+
+    # Duration of a tick after each change, time of each change (seconds)
+    self.secPerTick = self.tempos/(1e6*self.ticksPerBeat)
+    self.seconds    = np.zeros(len(ticks), dtype = np.float64)
+    self.seconds[1:] = np.cumsum(np.diff(self.ticks)*self.secPerTick[:-1])
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD TempoMap.toSeconds()
+  # ---------------------------------------------------------------------------
+  def toSeconds(self, ticks) :
+    """
+    Converts timecodes (MIDI ticks) to seconds.
+    'ticks' can be a single value or an array (the output has the same shape).
+    """
+
+    t = np.asarray(ticks, dtype = np.int64)
+    i = np.searchsorted(self.ticks, t, side = "right") - 1
+    i = np.maximum(i, 0)
+    seconds = self.seconds[i] + (t - self.ticks[i])*self.secPerTick[i]
+
+    return float(seconds) if (seconds.ndim == 0) else seconds
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD TempoMap.getBpm()
+  # ---------------------------------------------------------------------------
+  def getBpm(self, tick: int) -> float :
+    """
+    Returns the tempo (beats per minute) at a given timecode.
+    """
+
+    i = max(int(np.searchsorted(self.ticks, tick, side = "right")) - 1, 0)
+    return 60e6/float(self.tempos[i])
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD TempoMap.toDict()
+  # ---------------------------------------------------------------------------
+  def toDict(self) -> dict :
+    """
+    Returns the tempo map as a dictionary (as stored in the '.gq3' file)
+
+    EXAMPLE: {"ticksPerBeat": 480, "changes": [[0, 833333], [17760, 416667]]}
+    """
+
+    return {
+      "ticksPerBeat"  : self.ticksPerBeat,
+      "changes"       : [[tick, tempo] for (tick, tempo) in zip(self.ticks.tolist(), self.tempos.tolist())]
+    }
+
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# FUNCTION fromDict()
+# -----------------------------------------------------------------------------
+def fromDict(tempoMapDict: dict) -> TempoMap :
+  """
+  Creates a tempo map from its dictionary (see 'TempoMap.toDict()')
+  """
+
+  return TempoMap(tempoMapDict["ticksPerBeat"], [(int(tick), int(tempo)) for (tick, tempo) in tempoMapDict["changes"]])
+
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION fromSmf()
+# -----------------------------------------------------------------------------
+def fromSmf(midiData) -> TempoMap :
+  """
+  Creates the tempo map of a MIDI file (SmfFile object, see 'smfParser.py')
+  The tempo changes of all the tracks are merged: they are usually found in
+  the first track only, which is not necessarily assigned to a hand.
+  """
+
+  changes = []
+  for track in midiData.tracks :
+    changes += track.tempos
+
+  return TempoMap(midiData.ticksPerBeat, changes)
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'tempoMap.py'")
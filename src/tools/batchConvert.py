@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : batchConvert
+# File name     : batchConvert.py
+# Purpose       : converts the whole song library to .gq3 (headless)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# Description
+# =============================================================================
+# Converts all the '.mid' and '.pr' files of the library to the '.gq3' format
+# without going through the GUI.
+# The files are processed in parallel (one process per core).
+#
+# For each song:
+# - the source file is loaded with 'Score.loadMidiFile()' or 'Score.loadPrFile()'
+# - the '.gq3' is written with 'Score.compact()' (the binary cache is written
+#   along with it)
+# - the '.gq3' and its cache are read back and compared to the score in memory
+#   (notes, bookmarks, sections)
+#
+# When a '.pr' and a '.mid' file share the same name, the '.pr' is used: it
+# holds the annotations (fingers, hands, bookmarks etc.)
+# Songs that already have a '.gq3' are skipped (see '--overwrite')
+#
+# With '--rebuild-cache', the existing '.gq3' files are not converted: only
+# their binary cache is rebuilt and checked.
+#
+# HOW TO USE IT
+# Run this script from the root of the project:
+# > python -m src.tools.batchConvert
+# > python -m src.tools.batchConvert --overwrite --jobs 4
+# > python -m src.tools.batchConvert --rebuild-cache
+# > python -m src.tools.batchConvert ./songs/Beethoven_Fuer_Elise.mid
+#
+# NOTES
+# - '.mid' files are imported with the first track containing notes assigned
+#   to the right hand and the next one to the left hand.
+# - '--overwrite' replaces the existing '.gq3' files: the annotations they
+#   contain are lost.
+
+
+
+# =============================================================================
+# External libs
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.gq3Cache as gq3Cache
+import src.score as score
+import src.smfParser as smfParser
+
+# Standard libraries
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import io
+import numpy as np
+import os
+import time
+
+
+
+# =============================================================================
+# Constants pool
+# =============================================================================
+# Source formats, by order of preference
+SOURCE_EXTENSIONS = [".pr", ".mid"]
+
+# Columns compared after the round trip
+NOTE_COLUMNS = ["pitch", "hand", "finger", "voice", "startTime", "stopTime"]
+TABLES = ["bookmarks", "tempoSections", "arpeggioSections"]
+
+
+
+# =============================================================================
+# Functions
+# =============================================================================
+def getDefaultMidiTracks(midiFile) :
+  """
+  Returns a track assignment for a MIDI file: the first 2 tracks containing
+  notes are assigned to the right and left hand respectively.
+  """
+
+  midiTracks = []
+  hands = ["R", "L"]
+  for track in smfParser.load(midiFile).tracks :
+    if ((track.noteCount > 0) and hands) :
+      midiTracks.append(hands.pop(0))
+    else :
+      midiTracks.append("")
+
+  return midiTracks
+
+
+
+def listJobs(files, overwrite, rebuildCache) :
+  """
+  Returns the list of files to process and the list of skipped files.
+  'files' is the list of files given in the command line (the whole library
+  if empty)
+  """
+
+  if not(files) :
+    files = [os.path.join(SONG_PATH, f) for f in sorted(os.listdir(SONG_PATH))]
+
+  # Group the files by song
+  songs = {}
+  for f in files :
+    (root, ext) = os.path.splitext(f)
+    songs.setdefault(root, []).append(ext.lower())
+
+  jobs = []
+  skipped = []
+  for (root, extList) in songs.items() :
+    if rebuildCache :
+      if (".gq3" in extList) or os.path.exists(root + ".gq3") :
+        jobs.append(root + ".gq3")
+      continue
+
+    sourceExt = [e for e in SOURCE_EXTENSIONS if e in extList]
+    if not(sourceExt) :
+      continue
+
+    if (os.path.exists(root + ".gq3") and not(overwrite)) :
+      skipped.append(root + sourceExt[0])
+    else :
+      jobs.append(root + sourceExt[0])
+
+  return (jobs, skipped)
+
+
+
+def compareColumns(S, columns) :
+  """
+  Compares the content of a Score with a dictionary of columns (as returned
+  by 'Score._readGq3Columns()' or 'gq3Cache.load()')
+  Returns the list of fields that differ.
+  """
+
+  refColumns = S.noteStore.getColumns()
+  refColumns["bookmarks"]         = S.bookmarks
+  refColumns["tempoSections"]     = S.sectionTempo
+  refColumns["arpeggioSections"]  = S.sectionArpeggio
+
+  errors = []
+  for name in NOTE_COLUMNS :
+    if not(np.array_equal(np.asarray(refColumns[name], dtype = np.int64), np.asarray(columns[name], dtype = np.int64))) :
+      errors.append(name)
+
+  for name in TABLES :
+    if (np.asarray(refColumns[name]).tolist() != np.asarray(columns[name]).tolist()) :
+      errors.append(name)
+
+  return errors
+
+
+
+def processFile(songFile) :
+  """
+  Converts a file to .gq3 (or rebuilds the cache of a .gq3 file) and checks
+  the round trip.
+  Returns a dictionary with the status and the timings.
+
+  NOTE: runs in a worker process. The console output of the Score is muted.
+  """
+
+  report = {"file": songFile, "status": "OK", "message": "", "notes": 0, "load": 0.0, "save": 0.0, "verify": 0.0}
+  (root, ext) = os.path.splitext(songFile)
+  gq3File = root + ".gq3"
+  log = io.StringIO()
+
+  try :
+    with contextlib.redirect_stdout(log) :
+      S = score.Score(None)
+
+      # Load
+      t0 = time.perf_counter()
+      if (ext == ".gq3") :
+        cacheFile = gq3Cache.getCacheFile(gq3File)
+        if os.path.exists(cacheFile) :
+          os.remove(cacheFile)
+        S.loadGq3File(gq3File)
+      elif (ext == ".pr") :
+        S.loadPrFile(songFile)
+      else :
+        S.loadMidiFile(songFile, getDefaultMidiTracks(songFile))
+      t1 = time.perf_counter()
+
+      # Save
+      if (ext != ".gq3") :
+        S.compact(gq3File, wait = True)
+      t2 = time.perf_counter()
+
+      # Verify the round trip: JSON and binary cache
+      errors = []
+      (columns, _) = score.Score(None)._readGq3Columns(gq3File)
+      errors += [f"gq3:{x}" for x in compareColumns(S, columns)]
+
+      cache = gq3Cache.load(gq3File)
+      if cache is None :
+        errors.append("cache:missing")
+      else :
+        errors += [f"cache:{x}" for x in compareColumns(S, cache[0])]
+      t3 = time.perf_counter()
+
+  # NOTE: the loaders call 'exit()' on unsupported files
+  except (Exception, SystemExit) as err :
+    # The reason is usually given in the last lines of the log
+    logLines = [l for l in log.getvalue().splitlines() if l.startswith("[")]
+    errorLines = [l for l in logLines if l.startswith("[ERROR]")]
+    report["status"] = "FAILED"
+    if errorLines :
+      report["message"] = errorLines[-1]
+    elif (isinstance(err, SystemExit) and logLines) :
+      report["message"] = logLines[-1]
+    else :
+      report["message"] = f"{type(err).__name__} {err}"
+    return report
+
+  report["notes"]   = len(S.noteStore)
+  report["load"]    = t1 - t0
+  report["save"]    = t2 - t1
+  report["verify"]  = t3 - t2
+  if errors :
+    report["status"] = "MISMATCH"
+    report["message"] = ", ".join(errors)
+
+  return report
+
+
+
+# =============================================================================
+# Main code
+# =============================================================================
+if (__name__ == "__main__") :
+
+  parser = argparse.ArgumentParser(description = "Converts the song library (.mid, .pr) to .gq3")
+  parser.add_argument("files", nargs = "*", help = "files to convert (default: all the songs in the library)")
+  parser.add_argument("--overwrite", action = "store_true", help = "replace the existing .gq3 files")
+  parser.add_argument("--rebuild-cache", action = "store_true", help = "only rebuild the binary cache of the existing .gq3 files")
+  parser.add_argument("--jobs", type = int, default = os.cpu_count(), help = "number of worker processes (default: number of cores)")
+  args = parser.parse_args()
+
+  (jobs, skipped) = listJobs(args.files, args.overwrite, args.rebuild_cache)
+  for f in skipped :
+    print(f"[INFO] Skipped '{os.path.basename(f)}' (.gq3 exists, use --overwrite to replace it)")
+
+  print(f"[INFO] Processing {len(jobs)} files with {args.jobs} workers...")
+  print(f"{'Song':<70} {'Status':>8} {'Notes':>7} {'Load (ms)':>10} {'Save (ms)':>10} {'Check (ms)':>11}")
+  print("-"*121)
+
+  wallStart = time.perf_counter()
+  reports = []
+  with ProcessPoolExecutor(max_workers = args.jobs) as executor :
+    futures = [executor.submit(processFile, f) for f in jobs]
+    for future in as_completed(futures) :
+      r = future.result()
+      reports.append(r)
+      print(f"{os.path.basename(r['file']):<70} {r['status']:>8} {r['notes']:>7} {1000*r['load']:>10.1f} {1000*r['save']:>10.1f} {1000*r['verify']:>11.1f}")
+      if r["message"] :
+        print(f"  -> {r['message']}")
+
+  wallTime = time.perf_counter() - wallStart
+  cpuTime = sum(r["load"] + r["save"] + r["verify"] for r in reports)
+  failed = [r for r in reports if (r["status"] != "OK")]
+
+  print("-"*121)
+  print(f"[INFO] {len(reports)-len(failed)}/{len(reports)} files processed successfully ({len(skipped)} skipped)")
+  print(f"[INFO] Total time: {wallTime:.2f}s (sum of the file times: {cpuTime:.2f}s)")
+  if failed :
+    print(f"[WARNING] {len(failed)} files failed or did not pass the round trip check:")
+    for r in failed :
+      print(f"- {os.path.basename(r['file'])}: {r['status']} ({r['message']})")
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : benchActiveNotesMemory
+# File name     : benchActiveNotesMemory.py
+# Purpose       : memory report of the 'active notes' table of the Score
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# Description
+# =============================================================================
+# Compares the memory footprint of the 'active notes' table (notes pressed or
+# sustained at each cursor) in its former layout (one Python list per cursor)
+# and in its current layout (compressed sparse rows, see
+# 'Score._buildNotesByCursor()') on all the songs of the library.
+#
+# Only the table itself is accounted for: the Note objects are shared by both
+# layouts.
+#
+# HOW TO USE IT
+# Run this script from the root of the project:
+# > python -m src.tools.benchActiveNotesMemory
+
+
+
+# =============================================================================
+# External libs
+# =============================================================================
+# Project libraries
+from src.commons import *
+from src.tools.benchCursorsLR import loadScore
+
+# Standard libraries
+import heapq
+import os
+import sys
+
+
+
+# =============================================================================
+# Functions
+# =============================================================================
+def buildActiveNotes_legacy(noteList) :
+  """
+  Former implementation of the 'active notes' table (reference)
+  """
+
+  noteListSorted = sorted(noteList, key = lambda x: x.startTime)
+  uniqueTimes = sorted(set(n.startTime for n in noteListSorted))
+
+  notesByCursor_active = []
+  heap    = []
+  counter = 0
+  ptr     = 0
+  for T in uniqueTimes :
+    while (ptr < len(noteListSorted) and noteListSorted[ptr].startTime <= T) :
+      n = noteListSorted[ptr]
+      heapq.heappush(heap, (n.stopTime, counter, n))
+      counter += 1
+      ptr += 1
+
+    while heap and heap[0][0] < T:
+      heapq.heappop(heap)
+
+    notesByCursor_active.append([n for (_, _, n) in heap])
+
+  return notesByCursor_active
+
+
+
+def getListOfListsSize(L) :
+  """
+  Returns the size in bytes of a list of lists (containers only)
+  """
+
+  return sys.getsizeof(L) + sum(sys.getsizeof(x) for x in L)
+
+
+
+# =============================================================================
+# Main code
+# =============================================================================
+if (__name__ == "__main__") :
+
+  songFiles = sorted(os.listdir(SONG_PATH))
+
+  print(f"{'Song':<70} {'Steps':>6} {'Entries':>8} {'Legacy (kB)':>12} {'CSR (kB)':>9} {'Ratio':>6}")
+  print("-"*116)
+
+  totalLegacy = 0
+  totalCSR = 0
+  for songFile in songFiles :
+    try :
+      S = loadScore(os.path.join(SONG_PATH, songFile))
+
+    # NOTE: the loaders call 'exit()' on unsupported files
+    except (Exception, SystemExit) as err :
+      print(f"{songFile:<70} [SKIPPED] {type(err).__name__} {err}")
+      continue
+
+    if S is None :
+      continue
+
+    legacySize = getListOfListsSize(buildActiveNotes_legacy(S.noteList))
+    csrSize = S.notesByCursor_activeIndices.nbytes + S.notesByCursor_activeOffsets.nbytes
+
+    totalLegacy += legacySize
+    totalCSR += csrSize
+    print(f"{songFile:<70} {S.length:>6} {len(S.notesByCursor_activeIndices):>8} {legacySize/1024:>12.1f} {csrSize/1024:>9.1f} {legacySize/csrSize:>5.1f}x")
+
+  print("-"*116)
+  print(f"{'TOTAL':<70} {'':>6} {'':>8} {totalLegacy/1024:>12.1f} {totalCSR/1024:>9.1f} {totalLegacy/totalCSR:>5.1f}x")
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : benchArbiter
+# File name     : benchArbiter.py
+# Purpose       : benchmark of the 'Arbiter' evaluation (cost per MIDI event)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# Description
+# =============================================================================
+# Compares the former implementation of the arbiter (states as lists of 128
+# entries, loop on all the pitches) with the current one (states as bitmasks)
+# on the '.gq3' songs of the library.
+#
+# A simulated player goes through each song: it presses the expected notes,
+# holds some of them longer than needed, misses or adds notes from time to
+# time. Both arbiters receive the same MIDI events and evaluate the input
+# after each of them (just like the MIDI callback of the app does).
+# The decisions are checked for equality.
+#
+# The reported cost is the time spent per MIDI event (state update +
+# evaluation).
+#
+# HOW TO USE IT
+# Run this script from the root of the project:
+# > python -m src.tools.benchArbiter
+# > python -m src.tools.benchArbiter ./songs/Beethoven_Fuer_Elise.gq3
+#
+# NOTES
+# - only the standard arbitration is measured (arpeggio sections are
+#   evaluated like the other sections)
+# - the player is pseudo-random with a fixed seed: runs are reproducible.
+
+
+
+# =============================================================================
+# External libs
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.arbiter as arbiter
+import src.score as score
+
+# Standard libraries
+import argparse
+import contextlib
+import io
+import mido
+import os
+import random
+import time
+import types
+
+
+
+# =============================================================================
+# Constants pool
+# =============================================================================
+# Maximum number of cursors played per song
+MAX_CURSORS = 2000
+
+# Maximum number of MIDI events per cursor (the player gives up after that)
+MAX_EVENTS_PER_CURSOR = 50
+
+# Behaviour of the simulated player
+PROBA_HOLD    = 0.2     # A note is held after the cursor it was expected on
+PROBA_EXCESS  = 0.05    # A wrong note is pressed
+
+SEED = 1234
+
+
+
+# =============================================================================
+# Functions
+# =============================================================================
+class ArbiterLegacy(arbiter.Arbiter) :
+  """
+  Former implementation of the standard arbitration (reference)
+  """
+
+  def __init__(self, top) :
+    super().__init__(top)
+    self.midiCurr         = [0 for _ in range(128)]
+    self.midiSustained    = [0 for _ in range(128)]
+    self.midiSuperfluous  = [0 for _ in range(128)]
+    self.midiAssociatedID = [-1 for _ in range(128)]
+
+
+
+  def onExternalMidiEvent(self, midiMessage) :
+    if (midiMessage.type == "note_on") :
+      self.midiCurr[midiMessage.note] = 1
+
+    elif (midiMessage.type == "note_off") :
+      self.midiCurr[midiMessage.note] = 0
+      self.midiSustained[midiMessage.note] = 0
+      self.midiSuperfluous[midiMessage.note] = 0
+      self.midiAssociatedID[midiMessage.note] = -1
+
+
+
+  def _evalStandard(self) :
+    teacherNotes = self.top.widgets[WIDGET_ID_SCORE].getTeacherNotes()
+
+    teacherNotesAsMidiArray = [0 for _ in range(128)]
+    for noteObj in teacherNotes :
+      if ((noteObj.sustained == False) and (noteObj.inactive == False)) :
+        teacherNotesAsMidiArray[noteObj.pitch] = 1
+
+    allowProgress = True
+    ret = []; step = 0
+
+    for pitch in MIDI_CODE_GRAND_PIANO_RANGE :
+      if ((teacherNotesAsMidiArray[pitch] == 1) and (self.midiCurr[pitch] == 0) and (self.midiSuperfluous[pitch] == 0)) :
+        allowProgress = False
+        if not(arbiter.arbiterStatus.INCOMPLETE_INPUT in ret) : ret.append(arbiter.arbiterStatus.INCOMPLETE_INPUT)
+
+      if ((teacherNotesAsMidiArray[pitch] == 1) and (self.midiCurr[pitch] == 1) and (self.midiSuperfluous[pitch] == 1)) :
+        allowProgress = False
+        if not(arbiter.arbiterStatus.STALE_EXCESS_NOTE in ret) : ret.append(arbiter.arbiterStatus.STALE_EXCESS_NOTE)
+
+      if ((teacherNotesAsMidiArray[pitch] == 1) and (self.midiCurr[pitch] == 1) and (self.midiSustained[pitch] == 1)) :
+        expectedIDs = [x.id for x in teacherNotes if ((x.pitch == pitch) and (x.sustained == False) and (x.inactive == False))]
+        if not(self.midiAssociatedID[pitch] in expectedIDs) :
+          allowProgress = False
+          if not(arbiter.arbiterStatus.STALE_VALID_NOTE in ret) : ret.append(arbiter.arbiterStatus.STALE_VALID_NOTE)
+
+      if ((teacherNotesAsMidiArray[pitch] == 0) and (self.midiCurr[pitch] == 1) and (self.midiSustained[pitch] == 0)) :
+        if not(arbiter.arbiterStatus.EXCESS_NOTE in ret) : ret.append(arbiter.arbiterStatus.EXCESS_NOTE)
+
+    if (self.suspended) :
+      allDown = True
+      for x in self.queryNotesPitch :
+        if (self.midiCurr[x] == 1) :
+          allDown = False
+
+      if allDown :
+        self.suspended = False
+      else :
+        allowProgress = False
+
+    if allowProgress :
+      for pitch in MIDI_CODE_GRAND_PIANO_RANGE :
+        if ((teacherNotesAsMidiArray[pitch] == 0) and (self.midiCurr[pitch] == 1)) :
+          self.midiSuperfluous[pitch] = 1
+
+        if ((teacherNotesAsMidiArray[pitch] == 1) and (self.midiCurr[pitch] == 1)) :
+          self.midiSustained[pitch] = 1
+          q = [x for x in teacherNotes if (x.pitch == pitch)]
+          self.midiAssociatedID[pitch] = q[0].id
+
+      if not(arbiter.arbiterStatus.VALID_INPUT in ret) : ret.append(arbiter.arbiterStatus.VALID_INPUT)
+
+    if arbiter.arbiterStatus.VALID_INPUT in ret :
+      step = 1
+
+    return (ret, step)
+
+
+
+def benchSong(gq3File) :
+  """
+  Plays a song with the simulated player and feeds both arbiters.
+  Returns (event count, legacy time, current time, mismatch count)
+  """
+
+  S = score.Score(None)
+  with contextlib.redirect_stdout(io.StringIO()) :
+    S.loadGq3File(gq3File)
+
+  top = types.SimpleNamespace(widgets = {WIDGET_ID_SCORE: S})
+  arbiters = [ArbiterLegacy(top), arbiter.Arbiter(top)]
+  timings = [0.0, 0.0]
+
+  rng = random.Random(SEED)
+  held = set()
+  eventCount = 0
+  mismatchCount = 0
+
+  def send(msgType, pitch) :
+    nonlocal eventCount, mismatchCount
+    msg = mido.Message(msgType, note = pitch, velocity = 64 if (msgType == "note_on") else 0)
+    decisions = []
+    for (n, A) in enumerate(arbiters) :
+      t0 = time.perf_counter()
+      A.onExternalMidiEvent(msg)
+      decisions.append(A._evalStandard())
+      timings[n] += time.perf_counter() - t0
+
+    eventCount += 1
+    if (decisions[0] != decisions[1]) :
+      mismatchCount += 1
+
+    return decisions[1][1]
+
+  for _ in range(min(S.cursorMax, MAX_CURSORS)) :
+    cursor = S.getCursor()
+    expected = sorted(S.getTeacherPitchIDs()[1])
+
+    actions = [("note_off", p) for p in sorted(held) if (rng.random() > PROBA_HOLD)]
+    if (rng.random() < PROBA_EXCESS) :
+      actions.append(("note_on", rng.choice(MIDI_CODE_GRAND_PIANO_RANGE)))
+    actions += [("note_on", p) for p in rng.sample(expected, len(expected))]
+
+    # Release everything and try again if the notes held block the progress
+    actions += [("note_off", p) for p in range(128)]
+    actions += [("note_on", p) for p in expected]
+
+    step = 0
+    for (msgType, pitch) in actions[:MAX_EVENTS_PER_CURSOR] :
+      if ((msgType == "note_off") and not(pitch in held)) :
+        continue
+
+      if (msgType == "note_on") :
+        held.add(pitch)
+      else :
+        held.discard(pitch)
+
+      step = send(msgType, pitch)
+      if (step > 0) :
+        break
+
+    # NOTE: 'Score.cursorGoto()' needs the GUI. Both hands are active: the
+    # cursor can be set directly.
+    if (cursor >= S.cursorMax) :
+      break
+    S.cursor = cursor + max(step, 1)
+
+  return (eventCount, timings[0], timings[1], mismatchCount)
+
+
+
+# =============================================================================
+# Main code
+# =============================================================================
+if (__name__ == "__main__") :
+
+  parser = argparse.ArgumentParser(description = "Benchmark of the arbiter (cost per MIDI event)")
+  parser.add_argument("files", nargs = "*", help = "songs to play (default: all the .gq3 songs in the library)")
+  args = parser.parse_args()
+
+  songFiles = args.files
+  if not(songFiles) :
+    songFiles = [os.path.join(SONG_PATH, f) for f in sorted(os.listdir(SONG_PATH)) if f.endswith(".gq3")]
+
+  print(f"{'Song':<70} {'Events':>7} {'Legacy (us)':>12} {'Current (us)':>13} {'Speedup':>8}")
+  print("-"*114)
+
+  totalEvents = 0
+  totalLegacy = 0.0
+  totalCurrent = 0.0
+  mismatchCount = 0
+  for songFile in songFiles :
+    (events, legacyTime, currentTime, mismatch) = benchSong(songFile)
+    if (events == 0) :
+      continue
+
+    if (mismatch > 0) :
+      print(f"[ERROR] Decisions do not match for '{os.path.basename(songFile)}' ({mismatch} events)")
+      mismatchCount += mismatch
+
+    totalEvents += events
+    totalLegacy += legacyTime
+    totalCurrent += currentTime
+    print(f"{os.path.basename(songFile):<70} {events:>7} {1e6*legacyTime/events:>12.2f} {1e6*currentTime/events:>13.2f} {legacyTime/currentTime:>7.1f}x")
+
+  print("-"*114)
+  if (totalEvents > 0) :
+    print(f"{'TOTAL':<70} {totalEvents:>7} {1e6*totalLegacy/totalEvents:>12.2f} {1e6*totalCurrent/totalEvents:>13.2f} {totalLegacy/totalCurrent:>7.1f}x")
+  print(f"[INFO] Mismatching decisions: {mismatchCount}")
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : benchCursorsLR
+# File name     : benchCursorsLR.py
+# Purpose       : benchmark of the 'Score._buildCursorsLR()' function
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# Description
+# =============================================================================
+# Compares the former implementation of 'Score._buildCursorsLR()' (membership
+# test with a linear scan of the list for each timecode) with the current one
+# on all the songs of the library.
+#
+# The outputs of both implementations are checked for equality.
+#
+# HOW TO USE IT
+# Run this script from the root of the project:
+# > python -m src.tools.benchCursorsLR
+#
+# NOTES
+# - '.mid' files are imported with the first track assigned to the right hand
+#   and the second one to the left hand (just like the track selection GUI
+#   would propose it)
+# - the legacy implementation is slow on large scores: be patient.
+
+
+
+# =============================================================================
+# External libs
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.score as score
+
+# Standard libraries
+import contextlib
+import io
+import mido
+import os
+import time
+
+
+
+# =============================================================================
+# Constants pool
+# =============================================================================
+# Number of runs of the current implementation (the fastest one is kept)
+N_RUNS = 5
+
+
+
+# =============================================================================
+# Functions
+# =============================================================================
+def buildCursorsLR_legacy(noteOnTimecodes) :
+  """
+  Former implementation of 'Score._buildCursorsLR()' (reference)
+  """
+
+  cursorsLeft  = []
+  cursorsRight = []
+
+  for (index, timecode) in enumerate(noteOnTimecodes["LR"]) :
+    if (timecode in noteOnTimecodes["L"]) :
+      cursorsLeft.append(index)
+
+    if (timecode in noteOnTimecodes["R"]) :
+      cursorsRight.append(index)
+
+  return (cursorsLeft, cursorsRight)
+
+
+
+def guessMidiTracks(midiFile) :
+  """
+  Returns a track assignment for a MIDI file: the first 2 tracks containing
+  notes are assigned to the right and left hand respectively.
+  """
+
+  midiTracks = []
+  hands = ["R", "L"]
+  for track in mido.MidiFile(midiFile).tracks :
+    hasNotes = any(((msg.type == "note_on") and (msg.velocity > 0)) for msg in track)
+    if (hasNotes and hands) :
+      midiTracks.append(hands.pop(0))
+    else :
+      midiTracks.append("")
+
+  return midiTracks
+
+
+
+def loadScore(songFile) :
+  """
+  Loads a song in a Score object (console output is muted)
+  Returns None if the file type is not supported.
+  """
+
+  S = score.Score(None)
+  (_, ext) = os.path.splitext(songFile)
+
+  with contextlib.redirect_stdout(io.StringIO()) :
+    if (ext == ".gq3") :
+      S.loadGq3File(songFile)
+    elif (ext == ".pr") :
+      S.loadPrFile(songFile)
+    elif (ext == ".mid") :
+      S.loadMidiFile(songFile, guessMidiTracks(songFile))
+    else :
+      return None
+
+  return S
+
+
+
+# =============================================================================
+# Main code
+# =============================================================================
+if (__name__ == "__main__") :
+
+  songFiles = sorted(os.listdir(SONG_PATH))
+
+  print(f"{'Song':<70} {'Steps':>6} {'Legacy (ms)':>12} {'Current (ms)':>13} {'Speedup':>8}")
+  print("-"*113)
+
+  totalLegacy = 0.0
+  totalCurrent = 0.0
+  mismatchCount = 0
+  for songFile in songFiles :
+    try :
+      S = loadScore(os.path.join(SONG_PATH, songFile))
+    # NOTE: the loaders call 'exit()' on unsupported files
+    except (Exception, SystemExit) as err :
+      print(f"{songFile:<70} [SKIPPED] {type(err).__name__} {err}")
+      continue
+
+    if S is None :
+      continue
+
+    t0 = time.perf_counter()
+    (cursorsLeft, cursorsRight) = buildCursorsLR_legacy(S.noteOnTimecodes)
+    t1 = time.perf_counter()
+    legacyTime = t1 - t0
+
+    currentTime = float("inf")
+    for _ in range(N_RUNS) :
+      t0 = time.perf_counter()
+      S._buildCursorsLR()
+      t1 = time.perf_counter()
+      currentTime = min(currentTime, t1 - t0)
+
+    if ((S.cursorsLeft.tolist() != cursorsLeft) or (S.cursorsRight.tolist() != cursorsRight)) :
+      print(f"[ERROR] Outputs do not match for '{songFile}'")
+      mismatchCount += 1
+
+    totalLegacy += legacyTime
+    totalCurrent += currentTime
+    print(f"{songFile:<70} {S.length:>6} {1000*legacyTime:>12.2f} {1000*currentTime:>13.2f} {legacyTime/currentTime:>7.1f}x")
+
+  print("-"*113)
+  print(f"{'TOTAL':<70} {'':>6} {1000*totalLegacy:>12.2f} {1000*totalCurrent:>13.2f} {totalLegacy/totalCurrent:>7.1f}x")
+  print(f"[INFO] Mismatching outputs: {mismatchCount}")
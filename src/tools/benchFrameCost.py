@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : benchFrameCost
+# File name     : benchFrameCost.py
+# Purpose       : compares the cost of a frame with and without dirty rectangles
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# Description
+# =============================================================================
+# Runs the main window of the app on a song and measures the time spent on
+# each frame (periodic tasks of the widgets, rendering, display update) in 2
+# modes:
+# - "full"  : the whole screen is redrawn at every frame (previous behaviour
+#             of the main loop)
+# - "dirty" : only the areas invalidated by the widgets are redrawn (see
+#             'GangQin.renderFrame()')
+#
+# Two scenarios are played:
+# - "idle"  : nothing happens (the score is left open on a cursor)
+# - "dense" : a player goes through the densest passage of the song: the
+#             notes of the cursor are pressed on a frame, released on the next
+#             one (the cursor moves every 2 frames)
+#
+# The time waiting for the next frame (frame rate limit) is not counted: the
+# figures are the work done by the app. The load is given for GUI_FPS.
+#
+# HOW TO USE IT
+# Run this script from the root of the project:
+# > python -m src.tools.benchFrameCost
+# > python -m src.tools.benchFrameCost ./songs/Chilly_Gonzales_Gogol.gq3 --frames 600
+# > python -m src.tools.benchFrameCost --headless
+#
+# NOTES
+# - only '.gq3' songs are supported
+# - with '--headless' nothing is shown (SDL dummy video driver): the display
+#   update is much cheaper than with a real window.
+
+
+
+# =============================================================================
+# External libs
+# =============================================================================
+# Standard libraries
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+# NOTE: the video driver must be selected before pygame is initialised
+if ("--headless" in sys.argv) :
+  os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+import mido
+import numpy as np
+import pygame
+
+# Project libraries
+# NOTE: 'gangQin.py' imports some modules without the 'src.' prefix: the 'src'
+# folder must be in the path (see 'replay.py')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.commons import *
+import gangQin
+
+
+
+# =============================================================================
+# Constants pool
+# =============================================================================
+DEFAULT_SONG = "Beethoven_Fuer_Elise.gq3"
+
+# Number of frames measured per scenario and mode
+DEFAULT_FRAMES = 300
+
+
+
+# =============================================================================
+# Functions
+# =============================================================================
+def loadApp(gq3File) :
+  """
+  Creates the app and loads a song (without the file selection GUI)
+  """
+
+  with contextlib.redirect_stdout(io.StringIO()) :
+    app = gangQin.GangQin()
+    app.widgets[WIDGET_ID_SCORE].loadGq3File(gq3File)
+    app.widgets[WIDGET_ID_STAFFSCOPE].load(gq3File)
+
+  return app
+
+
+
+def getDensestCursor(scoreObj, span) :
+  """
+  Returns the cursor starting the passage of 'span' cursors with the most
+  notes to play.
+  """
+
+  counts = np.array([len(notes) for notes in scoreObj.notesByCursor_pressed], dtype = np.int64)
+  span = max(min(span, len(counts)), 1)
+  sums = np.convolve(counts, np.ones(span, dtype = np.int64), mode = "valid")
+
+  return int(np.argmax(sums))
+
+
+
+def runFrames(app, frameCount, fullRedraw, player) :
+  """
+  Runs frames of the main loop (without the frame rate limit) and returns
+  the duration of each of them (seconds)
+
+  'player' is called before each frame with the frame number (simulated
+  MIDI input) or is None.
+  """
+
+  durations = []
+
+  # Start from a screen fully drawn
+  app.renderFrame(fullRedraw = True)
+
+  for n in range(frameCount) :
+    pygame.event.get()
+    if player is not None :
+      player(n)
+
+    t0 = time.perf_counter()
+    app._midiInputProcess()
+    for widget in app.widgets.values() :
+      widget.update()
+    app.renderFrame(fullRedraw)
+    durations.append(time.perf_counter() - t0)
+
+  # Notes released on the last frame
+  app._midiInputProcess()
+
+  return durations
+
+
+
+def makePlayer(app) :
+  """
+  Returns a player pressing the notes of the cursor on even frames and
+  releasing them on odd frames.
+  """
+
+  scoreObj = app.widgets[WIDGET_ID_SCORE]
+  held = []
+
+  def player(n) :
+    if ((n % 2) == 0) :
+      for N in scoreObj.getTeacherNotes() :
+        if not(N.sustained or N.inactive) :
+          held.append(N.pitch)
+          app._onMidiInputCallback(mido.Message("note_on", note = N.pitch, velocity = 64))
+    else :
+      for pitch in held :
+        app._onMidiInputCallback(mido.Message("note_off", note = pitch, velocity = 0))
+      held.clear()
+
+  return player
+
+
+
+def runScenario(app, name, frameCount, startCursor) :
+  """
+  Runs a scenario in both modes from the same cursor.
+  Returns the results: {mode: (mean, 95th percentile) in milliseconds}
+  """
+
+  scoreObj = app.widgets[WIDGET_ID_SCORE]
+  results = {}
+
+  for (mode, fullRedraw) in [("full", True), ("dirty", False)] :
+    scoreObj.cursorGoto(startCursor)
+    player = makePlayer(app) if (name == "dense") else None
+
+    with contextlib.redirect_stdout(io.StringIO()) :
+      durations = np.array(runFrames(app, frameCount, fullRedraw, player))
+
+    results[mode] = (1e3*np.mean(durations), 1e3*np.percentile(durations, 95))
+
+  return results
+
+
+
+# =============================================================================
+# Main code
+# =============================================================================
+if (__name__ == "__main__") :
+
+  parser = argparse.ArgumentParser(description = "Compares the cost of a frame with and without dirty rectangles")
+  parser.add_argument("song", nargs = "?", default = os.path.join(SONG_PATH, DEFAULT_SONG), help = "song to load (.gq3)")
+  parser.add_argument("--frames", type = int, default = DEFAULT_FRAMES, help = "number of frames per scenario and mode")
+  parser.add_argument("--headless", action = "store_true", help = "no window (SDL dummy video driver)")
+  args = parser.parse_args()
+
+  app = loadApp(args.song)
+  scoreObj = app.widgets[WIDGET_ID_SCORE]
+
+  # Position of the scenarios
+  idleCursor  = scoreObj.getCursor()
+  denseCursor = getDensestCursor(scoreObj, args.frames//2)
+
+  frameTime = 1e3/GUI_FPS
+  print(f"[INFO] Song: '{os.path.basename(args.song)}', {args.frames} frames per run, dense passage from cursor {denseCursor+1}")
+  print(f"{'Scenario':<10} {'Mode':<6} {'Mean (ms)':>10} {'P95 (ms)':>10} {'Load':>7}")
+  print("-"*47)
+
+  for (name, cursor) in [("idle", idleCursor), ("dense", denseCursor)] :
+    results = runScenario(app, name, args.frames, cursor)
+    for (mode, (mean, p95)) in results.items() :
+      print(f"{name:<10} {mode:<6} {mean:>10.3f} {p95:>10.3f} {100*mean/frameTime:>6.1f}%")
+
+    (meanFull, meanDirty) = (results["full"][0], results["dirty"][0])
+    print(f"{name:<10} {'gain':<6} {meanFull/meanDirty:>9.1f}x")
+    print("-"*47)
+
+  app.widgets[WIDGET_ID_PLAYBACK].close()
+  pygame.quit()
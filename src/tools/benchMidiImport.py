@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : benchMidiImport
+# File name     : benchMidiImport.py
+# Purpose       : import throughput of the MIDI parser vs 'mido'
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# Description
+# =============================================================================
+# Compares the time needed to read the MIDI files of the library with 'mido'
+# (as the import used to do it) and with the project's parser ('smfParser.py')
+#
+# For a fair comparison, the 'mido' side includes the loop on the messages
+# that extracts the events used by the import (notes, tempo, time and key
+# signatures).
+#
+# The events read by both parsers are checked for equality.
+#
+# HOW TO USE IT
+# Run this script from the root of the project:
+# > python -m src.tools.benchMidiImport
+
+
+
+# =============================================================================
+# External libs
+# =============================================================================
+# Project libraries
+from src.commons import *
+import src.smfParser as smfParser
+
+# Standard libraries
+import mido
+import os
+import time
+
+
+
+# =============================================================================
+# Constants pool
+# =============================================================================
+# Number of runs for each parser (the fastest one is kept)
+N_RUNS = 3
+
+
+
+# =============================================================================
+# Functions
+# =============================================================================
+def readEvents_mido(midiFile) :
+  """
+  Reads the events of a MIDI file with 'mido' (reference)
+  Returns a list with the events of each track.
+  """
+
+  tracks = []
+  for track in mido.MidiFile(midiFile).tracks :
+    currTime = 0
+    notes = []; tempos = []; timeSignatures = []; keySignatures = []
+    for msg in track :
+      currTime += msg.time
+      if (msg.type == "note_on") :
+        notes.append((currTime, msg.note, msg.velocity, msg.channel))
+      elif (msg.type == "note_off") :
+        notes.append((currTime, msg.note, 0, msg.channel))
+      elif (msg.type == "set_tempo") :
+        tempos.append((currTime, msg.tempo))
+      elif (msg.type == "time_signature") :
+        timeSignatures.append((currTime, msg.numerator, msg.denominator))
+      elif (msg.type == "key_signature") :
+        keySignatures.append((currTime, msg.key))
+
+    tracks.append((track.name, notes, tempos, timeSignatures, keySignatures))
+
+  return tracks
+
+
+
+def readEvents_smf(midiFile) :
+  """
+  Reads the events of a MIDI file with the project's parser.
+  Returns a list with the events of each track (same format as 'readEvents_mido')
+  """
+
+  tracks = []
+  for track in smfParser.parse(midiFile).tracks :
+    notes = list(zip(track.noteTime.tolist(), track.notePitch.tolist(), track.noteVelocity.tolist(), track.noteChannel.tolist()))
+    tracks.append((track.name, notes, track.tempos, track.timeSignatures, track.keySignatures))
+
+  return tracks
+
+
+
+def timeIt(function, midiFile) :
+  """
+  Returns the output of 'function(midiFile)' and its best execution time.
+  """
+
+  bestTime = float("inf")
+  for _ in range(N_RUNS) :
+    t0 = time.perf_counter()
+    out = function(midiFile)
+    t1 = time.perf_counter()
+    bestTime = min(bestTime, t1 - t0)
+
+  return (out, bestTime)
+
+
+
+# =============================================================================
+# Main code
+# =============================================================================
+if (__name__ == "__main__") :
+
+  songFiles = sorted(f for f in os.listdir(SONG_PATH) if f.lower().endswith(".mid"))
+
+  print(f"{'Song':<70} {'Size (kB)':>10} {'Events':>8} {'mido (ms)':>10} {'smf (ms)':>9} {'Speedup':>8}")
+  print("-"*120)
+
+  totalBytes = 0
+  totalEvents = 0
+  totalMido = 0.0
+  totalSmf = 0.0
+  mismatchCount = 0
+  for songFile in songFiles :
+    midiFile = os.path.join(SONG_PATH, songFile)
+    try :
+      (ref, midoTime) = timeIt(readEvents_mido, midiFile)
+    except (OSError, EOFError, ValueError) as err :
+      print(f"{songFile:<70} [SKIPPED] {type(err).__name__} {err}")
+      continue
+
+    (out, smfTime) = timeIt(readEvents_smf, midiFile)
+
+    if (out != ref) :
+      print(f"[ERROR] Events do not match for '{songFile}'")
+      mismatchCount += 1
+
+    fileSize = os.path.getsize(midiFile)
+    eventCount = sum(len(track[1]) for track in ref)
+
+    totalBytes += fileSize
+    totalEvents += eventCount
+    totalMido += midoTime
+    totalSmf += smfTime
+    print(f"{songFile:<70} {fileSize/1024:>10.1f} {eventCount:>8} {1000*midoTime:>10.2f} {1000*smfTime:>9.2f} {midoTime/smfTime:>7.1f}x")
+
+  print("-"*120)
+  print(f"{'TOTAL':<70} {totalBytes/1024:>10.1f} {totalEvents:>8} {1000*totalMido:>10.2f} {1000*totalSmf:>9.2f} {totalMido/totalSmf:>7.1f}x")
+  print(f"[INFO] Throughput (mido)      : {totalBytes/totalMido/1e6:.2f} MB/s, {totalEvents/totalMido/1e6:.2f} Mevents/s")
+  print(f"[INFO] Throughput (smfParser) : {totalBytes/totalSmf/1e6:.2f} MB/s, {totalEvents/totalSmf/1e6:.2f} Mevents/s")
+  print(f"[INFO] Mismatching outputs: {mismatchCount}")
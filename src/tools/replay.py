@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : replay
+# File name     : replay.py
+# Purpose       : replays MIDI input through the arbiter and sequencer (headless)
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# Description
+# =============================================================================
+# Feeds a stream of MIDI events to the gameplay machinery of the app
+# ('Arbiter' and 'Sequencer', just like the main loop does) without any
+# window, and reports:
+# - the final cursor
+# - the number of decisions of each type taken by the arbiter
+# - the throughput (events per second, MIDI processing only)
+#
+# The event stream is either:
+# - a session recording ('.gqrec', see 'sessionRecorder.py'): the events are
+#   replayed on the song they were recorded on. The cursor of each event is
+#   checked against the recording: when it differs (e.g. the user moved the
+#   cursor with the arrow keys during the session), the cursor is set back
+#   to the recorded one and the event is counted as a 'resync'.
+# - a synthetic player going through the score: it presses the expected
+#   notes, sometimes holds notes longer than needed or plays wrong notes
+#   (pseudo-random with a fixed seed: runs are reproducible)
+#
+# The report can be saved ('--output') and compared with a previous one
+# ('--compare'): any change in the final cursors or in the decision counts
+# is a change of behaviour of the arbitration.
+#
+# HOW TO USE IT
+# Run this script from the root of the project:
+# > python -m src.tools.replay
+# > python -m src.tools.replay ./songs/Beethoven_Fuer_Elise.gq3 --wrong-rate 0.1
+# > python -m src.tools.replay ./logs/sessions/Beethoven_Fuer_Elise___20261016_213015.gqrec
+# > python -m src.tools.replay --output baseline.json
+# > python -m src.tools.replay --compare baseline.json
+#
+# NOTES
+# - only '.gq3' songs are supported
+# - the widgets not involved in the arbitration (keyboard, piano roll...) are
+#   not created. The stats and the finger selector are replaced by stubs.
+
+
+
+# =============================================================================
+# External libs
+# =============================================================================
+# Standard libraries
+import argparse
+import contextlib
+import io
+import json
+import mido
+import os
+import random
+import sys
+import time
+
+# Project libraries
+# NOTE: some modules import the arbiter without the 'src.' prefix (like
+# 'gangQin.py' does): the 'src' folder must be in the path so that the
+# arbiter statuses are the same objects everywhere.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.commons import *
+import arbiter
+import src.score as score
+import src.sessionRecorder as sessionRecorder
+import src.widgets.sequencer as sequencer
+
+
+
+# =============================================================================
+# Constants pool
+# =============================================================================
+# Synthetic player
+PROBA_WRONG_NOTE  = 0.02    # Default rate of wrong notes (per cursor)
+PROBA_HOLD        = 0.2     # A note is held after the cursor it was expected on
+SEED              = 1234
+
+# Maximum number of events per song (synthetic player)
+MAX_EVENTS = 20000
+
+# Maximum number of attempts of the synthetic player on a cursor
+MAX_ATTEMPTS = 3
+
+
+
+# =============================================================================
+# Functions
+# =============================================================================
+class ReplayStats :
+  """
+  Stub of the 'Stats' widget: only counts the notes.
+  """
+
+  def __init__(self) :
+    self.correctCount = 0
+    self.wrongCount = 0
+    self.lastActivity = time.perf_counter()
+
+  def logCorrectNote(self) :
+    self.correctCount += 1
+
+  def logWrongNote(self) :
+    self.wrongCount += 1
+
+  def onUserActivity(self) :
+    pass
+
+
+
+class ReplayFingerSelector :
+  """
+  Stub of the 'FingerSelector' widget.
+  """
+
+  def highlightReset(self) :
+    pass
+
+
+
+class ReplayArbiter(arbiter.Arbiter) :
+  """
+  Arbiter counting its decisions.
+  """
+
+  def __init__(self, top) :
+    super().__init__(top)
+    self.decisionCount = {}
+
+  def eval(self) :
+    (ret, step) = super().eval()
+    for status in ret :
+      self.decisionCount[status.name] = self.decisionCount.get(status.name, 0) + 1
+    return (ret, step)
+
+
+
+class ReplayApp :
+  """
+  Stub of the app ('top' object of the widgets) holding the widgets needed
+  by the arbitration.
+  """
+
+  def __init__(self, gq3File) :
+    self.midiTranspose = 0
+    self.widgets = {}
+    self.widgets[WIDGET_ID_SCORE]           = score.Score(self)
+    self.widgets[WIDGET_ID_ARBITER]         = ReplayArbiter(self)
+    self.widgets[WIDGET_ID_SEQUENCER]       = sequencer.Sequencer(self)
+    self.widgets[WIDGET_ID_STATS]           = ReplayStats()
+    self.widgets[WIDGET_ID_FINGERSELECTOR]  = ReplayFingerSelector()
+
+    self.widgets[WIDGET_ID_SCORE].loadGq3File(gq3File)
+
+    self.eventCount = 0
+    self.processTime = 0.0
+
+
+
+  def onMidiInput(self, midiMessage) :
+    """
+    Routes a MIDI event to the widgets (same order as 'GangQin._onMidiInput()')
+    Returns the cursor after the event.
+    """
+
+    t0 = time.perf_counter()
+    self.widgets[WIDGET_ID_ARBITER].onExternalMidiEvent(midiMessage)
+    self.widgets[WIDGET_ID_SEQUENCER].onExternalMidiEvent(midiMessage)
+    self.processTime += time.perf_counter() - t0
+    self.eventCount += 1
+
+    return self.widgets[WIDGET_ID_SCORE].getCursor()
+
+
+
+def replaySynthetic(app, wrongRate) :
+  """
+  Goes through the score with a synthetic player.
+  Returns the number of cursors skipped (the player could not validate them)
+  """
+
+  S = app.widgets[WIDGET_ID_SCORE]
+  rng = random.Random(SEED)
+  held = set()
+  skipCount = 0
+
+  def send(msgType, pitch) :
+    if (msgType == "note_on") :
+      held.add(pitch)
+      return app.onMidiInput(mido.Message("note_on", note = pitch, velocity = 64))
+    else :
+      held.discard(pitch)
+      return app.onMidiInput(mido.Message("note_off", note = pitch, velocity = 0))
+
+  while ((S.getCursor() < S.cursorMax) and (app.eventCount < MAX_EVENTS)) :
+    cursor = S.getCursor()
+    expected = sorted(S.getTeacherPitchIDs()[1])
+
+    for attempt in range(MAX_ATTEMPTS) :
+
+      # Release the previous notes (some of them are held longer)
+      for pitch in sorted(held) :
+        if ((attempt > 0) or (rng.random() > PROBA_HOLD)) :
+          send("note_off", pitch)
+
+      if (rng.random() < wrongRate) :
+        send("note_on", rng.choice(MIDI_CODE_GRAND_PIANO_RANGE))
+
+      for pitch in rng.sample(expected, len(expected)) :
+        if (pitch in held) :
+          send("note_off", pitch)
+        if (send("note_on", pitch) != cursor) :
+          break
+
+      if (S.getCursor() != cursor) :
+        break
+
+    else :
+      skipCount += 1
+      S.cursorGoto(cursor + 1)
+
+  for pitch in sorted(held) :
+    send("note_off", pitch)
+
+  return skipCount
+
+
+
+def replayRecording(app, columns) :
+  """
+  Replays the events of a session recording.
+  Returns the number of resyncs (cursor different from the recorded one)
+  """
+
+  S = app.widgets[WIDGET_ID_SCORE]
+  resyncCount = 0
+
+  for (status, data1, data2, transpose, cursor) in zip(columns["status"].tolist(), columns["note"].tolist(), columns["velocity"].tolist(), columns["transpose"].tolist(), columns["cursor"].tolist()) :
+    if (S.getCursor() != cursor) :
+      S.cursorGoto(cursor)
+      resyncCount += 1
+
+    try :
+      midiMessage = mido.Message.from_bytes([status, data1, data2])
+    except ValueError :
+      continue
+
+    # The events are recorded as played: undo the input transpose 
+    # (same as 'GangQin._midiInputPreProcessor()')
+    if (midiMessage.type in ("note_on", "note_off")) :
+      midiMessage.note = midiMessage.note - transpose
+
+    app.onMidiInput(midiMessage)
+
+  return resyncCount
+
+
+
+def replayFile(inputFile, wrongRate) :
+  """
+  Replays a song (synthetic player) or a session recording.
+  Returns the report as a dictionary.
+  """
+
+  report = {"file": os.path.basename(inputFile), "status": "OK", "message": ""}
+
+  if inputFile.endswith(SESSION_RECORDER_EXTENSION) :
+    ret = sessionRecorder.load(inputFile)
+    if ret is None :
+      return report | {"status": "FAILED", "message": "unknown format"}
+    (header, columns) = ret
+    gq3File = os.path.join(SONG_PATH, header["song"])
+  else :
+    (columns, gq3File) = (None, inputFile)
+
+  log = io.StringIO()
+  try :
+    with contextlib.redirect_stdout(log) :
+      app = ReplayApp(gq3File)
+      if columns is None :
+        report["skipped"] = replaySynthetic(app, wrongRate)
+      else :
+        report["resyncs"] = replayRecording(app, columns)
+
+  # NOTE: the loaders call 'exit()' on unsupported files
+  except (Exception, SystemExit) as err :
+    return report | {"status": "FAILED", "message": f"{type(err).__name__} {err}"}
+
+  S = app.widgets[WIDGET_ID_SCORE]
+  report["cursor"]      = S.getCursor()
+  report["cursorMax"]   = S.cursorMax
+  report["events"]      = app.eventCount
+  report["eventsPerSec"]= (app.eventCount/app.processTime) if (app.processTime > 0) else 0.0
+  report["decisions"]   = dict(sorted(app.widgets[WIDGET_ID_ARBITER].decisionCount.items()))
+  return report
+
+
+
+def compareReports(reports, baseline) :
+  """
+  Compares the reports with the ones of a previous run.
+  Returns the list of differences (strings)
+  """
+
+  ref = {r["file"]: r for r in baseline}
+  diffs = []
+  for r in reports :
+    if not(r["file"] in ref) :
+      continue
+
+    for field in ["status", "cursor", "events", "decisions"] :
+      if (r.get(field) != ref[r["file"]].get(field)) :
+        diffs.append(f"{r['file']}: '{field}' changed from {ref[r['file']].get(field)} to {r.get(field)}")
+
+  return diffs
+
+
+
+# =============================================================================
+# Main code
+# =============================================================================
+if (__name__ == "__main__") :
+
+  parser = argparse.ArgumentParser(description = "Replays MIDI input through the arbiter and the sequencer (headless)")
+  parser.add_argument("files", nargs = "*", help = "songs (.gq3) or session recordings (.gqrec) to replay (default: all the .gq3 songs in the library)")
+  parser.add_argument("--wrong-rate", type = float, default = PROBA_WRONG_NOTE, help = "rate of wrong notes of the synthetic player")
+  parser.add_argument("--output", help = "saves the report (JSON)")
+  parser.add_argument("--compare", help = "compares with a report saved with --output")
+  args = parser.parse_args()
+
+  inputFiles = args.files
+  if not(inputFiles) :
+    inputFiles = [os.path.join(SONG_PATH, f) for f in sorted(os.listdir(SONG_PATH)) if f.endswith(".gq3")]
+
+  print(f"{'File':<70} {'Cursor':>13} {'Events':>7} {'Events/s':>9}  Decisions")
+  print("-"*140)
+
+  reports = []
+  for inputFile in inputFiles :
+    r = replayFile(inputFile, args.wrong_rate)
+    reports.append(r)
+    if (r["status"] != "OK") :
+      print(f"{r['file']:<70} [{r['status']}] {r['message']}")
+      continue
+
+    decisions = ", ".join(f"{k}: {v}" for (k, v) in r["decisions"].items())
+    print(f"{r['file']:<70} {r['cursor']:>6}/{r['cursorMax']:<6} {r['events']:>7} {r['eventsPerSec']:>9.0f}  {decisions}")
+
+  print("-"*140)
+  totalEvents = sum(r.get("events", 0) for r in reports)
+  totalTime = sum(r["events"]/r["eventsPerSec"] for r in reports if (r.get("eventsPerSec", 0) > 0))
+  if (totalTime > 0) :
+    print(f"[INFO] {totalEvents} events processed at {totalEvents/totalTime:.0f} events/s")
+
+  if args.output :
+    with open(args.output, "w") as f :
+      json.dump(reports, f, indent = 2)
+    print(f"[INFO] Report saved to '{args.output}'")
+
+  if args.compare :
+    with open(args.compare, "r") as f :
+      diffs = compareReports(reports, json.load(f))
+
+    for d in diffs :
+      print(f"[WARNING] {d}")
+    print(f"[INFO] Differences with '{args.compare}': {len(diffs)}")
+    if diffs :
+      exit(1)
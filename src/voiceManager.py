@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Project       : gangQin
+# Module name   : voiceManager
+# File name     : voiceManager.py
+# File type     : Python script (Python 3)
+# Purpose       : note on/off scheduling for the MIDI out playback
+# Author        : QuBi (nitrogenium@outlook.fr)
+# Creation date : Friday, 16 October 2026
+# -----------------------------------------------------------------------------
+# Best viewed with space indentation (2 spaces)
+# =============================================================================
+
+# =============================================================================
+# DESCRIPTION
+# =============================================================================
+# The playback (see 'playback.py') plays the notes of the cursor on the MIDI
+# output. Each note must be released after its duration in the score, even
+# if the user keeps scrolling.
+#
+# The voice manager does it from a dedicated thread:
+# - the main loop only queues requests ('VoiceManager.noteOn()',
+#   'VoiceManager.releaseAll()'): nothing is sent from the UI thread
+# - the thread keeps the pool of the notes currently sounding (the 'voices')
+#   and a heap of their release times. It sleeps until the next release or
+#   the next request.
+# - all the messages due at a given time are sent together: the requests
+#   queued since the last wake-up, and the note offs due within the next
+#   tick (PLAYBACK_TICK_SEC)
+#
+# A note played again while still sounding is released first (retrigger).
+# When the pool is full (fast scrolling), the oldest voice is released to
+# make room: the number of notes held on the output is bounded.
+#
+# The heap is not cleaned when a voice is released early: its entry is
+# skipped when it pops out (the voice has a new generation number or is
+# gone).
+
+
+
+# =============================================================================
+# EXTERNALS
+# =============================================================================
+# Project libraries
+from src.commons import *
+
+# Standard libraries
+import collections
+import heapq
+import mido
+import threading
+import time
+
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+# None.
+
+
+
+# =============================================================================
+# CLASS DEFINITION
+# =============================================================================
+class VoiceManager :
+
+  """
+  VOICE_MANAGER object
+
+  Plays notes with a given duration on the MIDI output.
+
+  'sendFunction' is called with each MIDI message (mido.Message) to send.
+  It is called from the thread of the voice manager.
+
+  The thread is started on the first note and stopped by 'VoiceManager.stop()'
+  """
+
+  def __init__(self, sendFunction, maxVoices = PLAYBACK_MAX_VOICES) :
+
+    self.sendFunction = sendFunction
+    self.maxVoices    = maxVoices
+
+    self.requests   = collections.deque()   # Requests of the main loop (appended by the main loop, popped by the thread)
+    self.voices     = {}                    # Notes sounding: pitch -> generation (by order of note on)
+    self.releases   = []                    # Heap of the releases: (time in ns, generation, pitch)
+    self.generation = 0
+
+    self._thread  = None
+    self._running = False
+    self._wake    = threading.Event()
+
+    # Counters (written by the thread only)
+    self.messageCount = 0
+    self.batchCount   = 0
+    self.stolenCount  = 0
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD VoiceManager.noteOn()
+  # ---------------------------------------------------------------------------
+  def noteOn(self, pitch: int, velocity: int, duration: float) -> None :
+    """
+    Plays a note for 'duration' seconds.
+    """
+
+    if self._thread is None :
+      self._running = True
+      self._thread = threading.Thread(target = self._run, name = "voiceManager", daemon = True)
+      self._thread.start()
+
+    self.requests.append((pitch, velocity, duration))
+    self._wake.set()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD VoiceManager.releaseAll()
+  # ---------------------------------------------------------------------------
+  def releaseAll(self) -> None :
+    """
+    Releases all the notes sounding.
+    """
+
+    if self._thread is None :
+      return
+
+    self.requests.append(None)
+    self._wake.set()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD VoiceManager.stop()
+  # ---------------------------------------------------------------------------
+  def stop(self) -> None :
+    """
+    Releases all the notes and stops the thread.
+    """
+
+    if self._thread is None :
+      return
+
+    self._running = False
+    self._wake.set()
+    self._thread.join()
+    self._thread = None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD VoiceManager.getCounters()
+  # ---------------------------------------------------------------------------
+  def getCounters(self) -> dict :
+    """
+    Returns the counters of the voice manager: messages sent, number of
+    batches they were sent in, voices released early to make room.
+    """
+
+    return {
+      "messages"  : self.messageCount,
+      "batches"   : self.batchCount,
+      "stolen"    : self.stolenCount
+    }
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD VoiceManager._processRequests()                            [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _processRequests(self, now: int, batch: list) -> None :
+    """
+    Processes the requests queued by the main loop.
+    The messages to send are appended to 'batch'.
+    """
+
+    while self.requests :
+      request = self.requests.popleft()
+
+      if request is None :
+        self._releaseVoices(list(self.voices), batch)
+        continue
+
+      (pitch, velocity, duration) = request
+
+      # Retrigger
+      if (pitch in self.voices) :
+        self._releaseVoices([pitch], batch)
+
+      # Pool full: release the oldest voice
+      elif (len(self.voices) >= self.maxVoices) :
+        self._releaseVoices([next(iter(self.voices))], batch)
+        self.stolenCount += 1
+
+      self.generation += 1
+      self.voices[pitch] = self.generation
+      heapq.heappush(self.releases, (now + int(1e9*duration), self.generation, pitch))
+      batch.append(mido.Message("note_on", note = pitch, velocity = velocity))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD VoiceManager._processReleases()                            [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _processReleases(self, now: int, batch: list) -> None :
+    """
+    Releases the voices due within the next tick.
+    The messages to send are appended to 'batch'.
+    """
+
+    horizon = now + int(1e9*PLAYBACK_TICK_SEC)
+    while (self.releases and (self.releases[0][0] <= horizon)) :
+      (_, generation, pitch) = heapq.heappop(self.releases)
+      if (self.voices.get(pitch) == generation) :
+        self._releaseVoices([pitch], batch)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD VoiceManager._releaseVoices()                              [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _releaseVoices(self, pitches: list, batch: list) -> None :
+    """
+    Removes voices from the pool and appends their note off to 'batch'.
+    """
+
+    for pitch in pitches :
+      del self.voices[pitch]
+      batch.append(mido.Message("note_off", note = pitch, velocity = 0))
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD VoiceManager._run()                                        [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _run(self) -> None :
+    """
+    Main function of the thread.
+    """
+
+    while self._running :
+      # NOTE: cleared before reading the requests, so that a request queued 
+      # in the meantime wakes the thread up again
+      self._wake.clear()
+
+      batch = []
+      now = time.perf_counter_ns()
+      self._processRequests(now, batch)
+      self._processReleases(now, batch)
+
+      for midiMessage in batch :
+        self.sendFunction(midiMessage)
+
+      if batch :
+        self.messageCount += len(batch)
+        self.batchCount += 1
+
+      # Sleep until the next release (or the next request)
+      timeout = None
+      if self.releases :
+        timeout = max(1e-9*(self.releases[0][0] - time.perf_counter_ns()), 0.0)
+      self._wake.wait(timeout)
+
+    # Stopped: release everything
+    batch = []
+    self.requests.clear()
+    self._releaseVoices(list(self.voices), batch)
+    for midiMessage in batch :
+      self.sendFunction(midiMessage)
+
+    self.releases = []
+
+
+
+# =============================================================================
+# UNIT TESTS
+# =============================================================================
+if (__name__ == "__main__") :
+  print("[INFO] There are no unit tests available for 'voiceManager.py'")
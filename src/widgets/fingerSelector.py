@@ -84,6 +84,10 @@ class FingerSelector(widget.Widget) :
     self.highlightedIndex  = -1       # Note being edited (as index in the 'activeNotes' array)
     self.highlightedCursor = -1       # Cursor value where the note was requested to be edited
 
+    # Area of the screen drawn by the widget
+    (locX, locY) = self.loc
+    self.renderRects = [pygame.Rect(locX, locY - 6, 96 + (12*23), 26)]
+
 
 
   # ---------------------------------------------------------------------------
@@ -94,14 +98,6 @@ class FingerSelector(widget.Widget) :
     Renders the finger selector widget on screen.
     """
 
-    # Hide the widget as soon as the cursor changes
-    # The cursor changing is a sign that the finger edition is done.
-    if (self.top.widgets[WIDGET_ID_SCORE].getCursor() != self.highlightedCursor) :
-      self.highlightedNote    = None
-      self.highlightedIndex   = -1
-      self.highlightedCursor  = -1
-      self.visible            = False
-
     if (self.visible) :
       (locX, locY) = self.loc  
       text.render(self.top.screen, f"FINGER: ", self.loc, 2, FINGER_SELECTOR_TEXT_COLOR)
@@ -130,6 +126,35 @@ class FingerSelector(widget.Widget) :
     
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD: FingerSelector.update()
+  # ---------------------------------------------------------------------------
+  def update(self) -> None :
+    """
+    Hides the widget as soon as the cursor changes.
+    The cursor changing is a sign that the finger edition is done.
+    """
+
+    if (self.top.widgets[WIDGET_ID_SCORE].getCursor() != self.highlightedCursor) :
+      self.highlightedNote    = None
+      self.highlightedIndex   = -1
+      self.highlightedCursor  = -1
+      self.visible            = False
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: FingerSelector.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
+    """
+
+    return (self.visible, self.sel)
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD: FingerSelector._getActiveNotes()                          [PRIVATE]
   # ---------------------------------------------------------------------------
@@ -29,7 +29,9 @@ from shapely.geometry import Point, Polygon     # For point in polygon test
 # =============================================================================
 # CONSTANTS
 # =============================================================================
-# None.
+# Transparent color of the pre-rendered keyboard (must differ from the colors
+# of the keys)
+KEYBOARD_BASE_LAYER_COLORKEY = (255, 0, 255)
 
 
 
@@ -74,18 +76,21 @@ class Keyboard(widget.Widget) :
     self.sqWhiteNoteOverlapRightRGB = (140, 255, 146)
     self.sqBlackNoteOverlapRightRGB = (140, 255, 146)
 
-    # Define shorthand notations
-    self.c = KEYBOARD_BLACK_NOTE_HEIGHT
-    self.d = KEYBOARD_BLACK_NOTE_WIDTH
-    self.s = KEYBOARD_NOTE_CHANFER
-    self.e = KEYBOARD_NOTE_SPACING
-    self.x = self.loc[0]; self.y = self.loc[1]
-
     # TODO: add description
     self.litKeysPolygons = []
 
+    # Current appearance of the mouse cursor
+    self.mouseCursor = pygame.SYSTEM_CURSOR_ARROW
+
+    # Pre-rendered graphics (see 'Keyboard._makeSprites()')
+    self.baseLayer      = None    # The keyboard without any key pressed
+    self.sprites        = {}      # Overlays of the keys pressed (built on first use)
+    self.spriteGeometry = None    # Geometry the graphics were rendered with
+    self.keyLeft        = []      # Left edge of each key
+
     # Generate polygons for all notes and store them in 'Keyboard.polygons'
-    self._makePolygons()
+    # then pre-render the keyboard
+    self._makeSprites()
 
     # List of notes currently pressed
     #self.activeNotes      = []
@@ -100,26 +105,67 @@ class Keyboard(widget.Widget) :
   def render(self) -> None :
     """
     Draws the keyboard using the polygons generated for each note.
-    This function is called every time the app renders a new frame.
+    This function is called every time the widget needs to be redrawn.
+
+    The keyboard and the keys pressed are pre-rendered: the rendering is a 
+    blit of the keyboard, then a blit per key pressed.
     """
 
     # Render the keyboard
-    for i in MIDI_CODE_GRAND_PIANO_RANGE :
-      if ((i % 12) in MIDI_CODE_BLACK_NOTES_MOD12) :
-        pygame.draw.polygon(self.top.screen, KEYBOARD_BLACK_NOTE_COLOR, self.polygons[i])
-      else :
-        pygame.draw.polygon(self.top.screen, KEYBOARD_WHITE_NOTE_COLOR, self.polygons[i])
+    if (self._getGeometry() != self.spriteGeometry) :
+      self._makeSprites()
+
+    self.top.screen.blit(self.baseLayer, self.renderRects[0].topleft)
 
     # Render the notes from the Score and from the keyboard input
     if (WIDGET_ID_SCORE in self.top.widgets) :
       self.litKeysPolygons = []
       self.activeNotesScore = self.top.widgets[WIDGET_ID_SCORE].getTeacherNotes()
+      self._renderUpcoming(self.top.widgets[WIDGET_ID_SCORE].getUpcomingNotes())
       self._renderKeyPress(self.activeNotesScore)
       self._renderKeyPress(self.activeNotesMIDI)
 
-    # Render the mouse cursor
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Keyboard.update()
+  # ---------------------------------------------------------------------------
+  def update(self) -> None :
+    """
+    Updates the mouse cursor (hand when hovering over a note that can be 
+    clicked)
+    This function is called at every frame of the top level application.
+    """
+
     self._renderMouseArrow()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Keyboard.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
     
+    The notes of the score are drawn with their current attributes (hand, 
+    finger...): the key changes with each edit of the score, and when a note
+    gets highlighted by the finger selector.
+    """
+
+    if not(WIDGET_ID_SCORE in self.top.widgets) :
+      return tuple(N.pitch for N in self.activeNotesMIDI)
+
+    scoreObj = self.top.widgets[WIDGET_ID_SCORE]
+    return (
+      scoreObj.getCursor(),
+      scoreObj.activeHands,
+      scoreObj.lookAheadDistance,
+      scoreObj.editCount,
+      tuple(N.highlight for N in scoreObj.getTeacherNotes()),
+      tuple(N.pitch for N in self.activeNotesMIDI)
+    )
+
 
 
   # ---------------------------------------------------------------------------
@@ -138,11 +184,16 @@ class Keyboard(widget.Widget) :
       # TODO: 'detectedNotes' must contain active notes only (no sustained note)
       (isNoteHit, _) = self.clickHitTest((mouse_x, mouse_y))
       if isNoteHit :
-        pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_HAND)
+        mouseCursor = pygame.SYSTEM_CURSOR_HAND
       else :
-        pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_ARROW)
+        mouseCursor = pygame.SYSTEM_CURSOR_ARROW
     else:
-      pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_ARROW)
+      mouseCursor = pygame.SYSTEM_CURSOR_ARROW
+
+    # Only call the system when the cursor changes
+    if (mouseCursor != self.mouseCursor) :
+      pygame.mouse.set_cursor(mouseCursor)
+      self.mouseCursor = mouseCursor
 
 
 
@@ -220,12 +271,60 @@ class Keyboard(widget.Widget) :
 
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD Keyboard._renderUpcoming()                                 [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _renderUpcoming(self, notes) -> None :
+    """
+    Renders the upcoming notes (lookahead feature).
+    
+    They are drawn first so that the notes to play are on top. Unlike the 
+    teacher notes, they cannot be clicked.
+    """
+
+    for noteObj in notes :
+      self._renderSimpleKeyPress(self.top.screen, noteObj)
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD Keyboard._renderSimpleKeyPress()                           [PRIVATE]
   # ---------------------------------------------------------------------------
   def _renderSimpleKeyPress(self, screenInst, noteObj) :
     """
-    Renders a keypress on a black note.
+    Renders a keypress on a note.
+
+    The overlay of the key is pre-rendered on first use, for each combination
+    of key color, note colors (hand, state) and finger.
+    """
+
+    if (noteObj.keyColor == note.keyColor_T.WHITE_KEY) :
+      loc = (self.keyLeft[noteObj.pitch], self.y + self.c + self.e)
+    elif (noteObj.keyColor == note.keyColor_T.BLACK_KEY) :
+      loc = (self.keyLeft[noteObj.pitch], self.y + 50)
+    else :
+      return
+
+    if (noteObj.fromKeyboardInput) :
+      spriteKey = (noteObj.keyColor, None, None, None)
+    else :
+      (rectColor, rectOutlineColor, _) = noteObj.getNoteColor()
+      spriteKey = (noteObj.keyColor, rectColor, rectOutlineColor, noteObj.finger)
+
+    if not(spriteKey in self.sprites) :
+      self.sprites[spriteKey] = self._makeKeyPressSprite(noteObj)
+
+    screenInst.blit(self.sprites[spriteKey], loc)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Keyboard._makeKeyPressSprite()                             [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _makeKeyPressSprite(self, noteObj) :
+    """
+    Renders the overlay of a keypress on a transparent surface.
+    The top left corner of the surface goes on the left edge of the key.
 
     Adapts the rendering if the note comes from the score or from the
     input keyboard ('fromKeyboardInput' attribute)
@@ -233,8 +332,7 @@ class Keyboard(widget.Widget) :
 
     if (noteObj.keyColor == note.keyColor_T.WHITE_KEY) :
       eps = 3
-      u = [x[0] for x in self.polygons[noteObj.pitch]]
-      x0 = min(u); y0 = self.y + self.c + self.e
+      x0 = 0; y0 = 0
       h = KEYBOARD_WHITE_NOTE_HEIGHT - (self.c + self.e) - (2*eps)
       w = KEYBOARD_WHITE_NOTE_WIDTH - (2*self.e) - (2*eps)
       rect = [(x0 + eps, y0 + eps)]
@@ -243,8 +341,7 @@ class Keyboard(widget.Widget) :
       rect += utils.Vector2D(0, -h)
     elif (noteObj.keyColor == note.keyColor_T.BLACK_KEY) :
       eps = 2
-      u = [x[0] for x in self.polygons[noteObj.pitch]]
-      x0 = min(u); y0 = self.y + 50
+      x0 = 0; y0 = 0
       h = self.c - self.e - (2*eps) - 50
       w = self.d - (2*self.e) - (2*eps)
       rect = [(x0 + eps, y0 + eps)]
@@ -254,33 +351,104 @@ class Keyboard(widget.Widget) :
     else :
       pass
 
+    # Margin for the finger number and the outline
+    sprite = pygame.Surface((w + (2*eps) + 16, h + (2*eps) + 16), pygame.SRCALPHA)
+
     # Notes played from the MIDI keyboard have a different shape
     if (noteObj.fromKeyboardInput) :
       if (noteObj.keyColor == note.keyColor_T.WHITE_KEY) :
-        pygame.draw.circle(screenInst, (10, 10, 10), (x0 + 4 + w/2, y0 + 5 + h/2), 5)
+        pygame.draw.circle(sprite, (10, 10, 10), (x0 + 4 + w/2, y0 + 5 + h/2), 5)
       elif (noteObj.keyColor == note.keyColor_T.BLACK_KEY) :
-        pygame.draw.circle(screenInst, (200, 200, 200), (x0 + 2 + w/2, y0 + 1 + h/2), 5)
+        pygame.draw.circle(sprite, (200, 200, 200), (x0 + 2 + w/2, y0 + 1 + h/2), 5)
       else : 
         pass
 
     else :
       (rectColor, rectOutlineColor, _) = noteObj.getNoteColor()
-      pygame.draw.polygon(screenInst, rectColor, rect)
+      pygame.draw.polygon(sprite, rectColor, rect)
 
       # Draw the rectangle outline
       for i in range(4) :
-        pygame.draw.line(screenInst, rectOutlineColor, (rect[i][0], rect[i][1]), (rect[(i+1) % 4][0], rect[(i+1) % 4][1]), 1)
+        pygame.draw.line(sprite, rectOutlineColor, (rect[i][0], rect[i][1]), (rect[(i+1) % 4][0], rect[(i+1) % 4][1]), 1)
 
       # Show finger number
       if (noteObj.finger != note.finger_T.UNDEFINED) :
         
         if (noteObj.keyColor == note.keyColor_T.WHITE_KEY) :
-          text.render(screenInst, str(noteObj.finger.value), (x0+7, y0+19), 2, KEYBOARD_FINGERSATZ_FONT_COLOR_BLACK_NOTE)
+          text.render(sprite, str(noteObj.finger.value), (x0+7, y0+19), 2, KEYBOARD_FINGERSATZ_FONT_COLOR_BLACK_NOTE)
         elif (noteObj.keyColor == note.keyColor_T.BLACK_KEY) :
-          text.render(screenInst, str(noteObj.finger.value), (x0+1, y0+19), 2, KEYBOARD_FINGERSATZ_FONT_COLOR_WHITE_NOTE)
+          text.render(sprite, str(noteObj.finger.value), (x0+1, y0+19), 2, KEYBOARD_FINGERSATZ_FONT_COLOR_WHITE_NOTE)
         else :
           pass
 
+    return sprite
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Keyboard._getGeometry()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _getGeometry(self) -> tuple :
+    """
+    Returns everything the pre-rendered graphics depend on: position and 
+    geometry of the keyboard.
+    """
+
+    return (
+      self.loc,
+      KEYBOARD_WHITE_NOTE_HEIGHT, KEYBOARD_WHITE_NOTE_WIDTH,
+      KEYBOARD_BLACK_NOTE_HEIGHT, KEYBOARD_BLACK_NOTE_WIDTH,
+      KEYBOARD_NOTE_CHANFER, KEYBOARD_NOTE_SPACING,
+      KEYBOARD_WHITE_NOTE_COLOR, KEYBOARD_BLACK_NOTE_COLOR
+    )
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD Keyboard._makeSprites()                                    [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _makeSprites(self) -> None :
+    """
+    Generates the polygons of the notes and pre-renders the keyboard (no key 
+    pressed) on a surface with a color key ('Keyboard.baseLayer'): much 
+    faster to blit than a surface with an alpha channel.
+    The overlays of the keys pressed are dropped: they are rendered again on 
+    first use.
+
+    Called at init, and again if the geometry of the keyboard changes.
+    """
+
+    # Define shorthand notations
+    self.c = KEYBOARD_BLACK_NOTE_HEIGHT
+    self.d = KEYBOARD_BLACK_NOTE_WIDTH
+    self.s = KEYBOARD_NOTE_CHANFER
+    self.e = KEYBOARD_NOTE_SPACING
+    self.x = self.loc[0]; self.y = self.loc[1]
+
+    self._makePolygons()
+
+    # The overlays are drawn from the left edge of the keys
+    self.keyLeft = [min([x for (x, _) in self.polygons[i]], default = 0) for i in range(128)]
+
+    # Area of the screen drawn by the widget: bounding box of the keys
+    xList = [x for i in MIDI_CODE_GRAND_PIANO_RANGE for (x, _) in self.polygons[i]]
+    yList = [y for i in MIDI_CODE_GRAND_PIANO_RANGE for (_, y) in self.polygons[i]]
+    self.renderRects = [pygame.Rect(min(xList), min(yList), max(xList) - min(xList) + 1, max(yList) - min(yList) + 1)]
+
+    (xRef, yRef) = self.renderRects[0].topleft
+    self.baseLayer = pygame.Surface(self.renderRects[0].size)
+    self.baseLayer.fill(KEYBOARD_BASE_LAYER_COLORKEY)
+    for i in MIDI_CODE_GRAND_PIANO_RANGE :
+      polygon = [(x - xRef, y - yRef) for (x, y) in self.polygons[i]]
+      if ((i % 12) in MIDI_CODE_BLACK_NOTES_MOD12) :
+        pygame.draw.polygon(self.baseLayer, KEYBOARD_BLACK_NOTE_COLOR, polygon)
+      else :
+        pygame.draw.polygon(self.baseLayer, KEYBOARD_WHITE_NOTE_COLOR, polygon)
+    self.baseLayer.set_colorkey(KEYBOARD_BASE_LAYER_COLORKEY, pygame.RLEACCEL)
+
+    self.sprites = {}
+    self.spriteGeometry = self._getGeometry()
+
 
   
   # # ---------------------------------------------------------------------------
@@ -69,10 +69,13 @@ class Metronome(widget.Widget)  :
     
     self.tickInterval_ms = 1000
 
-    self.METRONOME_TASK = pygame.USEREVENT + 1
+    self.METRONOME_TASK = pygame.event.custom_type()
 
     self.msgQueue = []
 
+    # Area of the screen drawn by the widget
+    self.renderRects = [pygame.Rect(950, 470, 300, 14)]
+
     self._prepareWaves()
     self._init()
 
@@ -104,7 +107,8 @@ class Metronome(widget.Widget)  :
     Description is TODO.
     """
     
-    pygame.time.set_timer(self.METRONOME_TASK, self.getInterval_ms())
+    # NOTE: the timer is only armed while the metronome is on: its events
+    # would wake the app up for nothing (see 'frameScheduler.py')
     pygame.mixer.init(frequency = 44100, size = -16, channels = 1, buffer = 512)
 
 
@@ -145,12 +149,14 @@ class Metronome(widget.Widget)  :
         if (key == pygame.K_KP_PLUS) :
           self._optionMode = True
           self.bpm += 1
-          pygame.time.set_timer(self.METRONOME_TASK, self.getInterval_ms())
+          if self.enabled :
+            pygame.time.set_timer(self.METRONOME_TASK, self.getInterval_ms())
         
         if (key == pygame.K_KP_MINUS) :
           self._optionMode = True
           self.bpm -= 1
-          pygame.time.set_timer(self.METRONOME_TASK, self.getInterval_ms())
+          if self.enabled :
+            pygame.time.set_timer(self.METRONOME_TASK, self.getInterval_ms())
 
         else :
           self.switched = False
@@ -219,6 +225,18 @@ class Metronome(widget.Widget)  :
 
     if self.enabled :
       text.render(self.top.screen, f"BPM:{self.bpm} - {self.num}/{self.denom} - {self.counter}", (950, 470), 2, GUI_TEXT_COLOR)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Metronome.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
+    """
+
+    return (self.enabled, self.bpm, self.num, self.denom, self.counter)
   
     
 
@@ -70,6 +70,10 @@ class PianoRoll(widget.Widget) :
 
     self.notesInWindow = []
     self.cursorCache = -1
+
+    # Area of the screen drawn by the widget (the outline of the notes is 3 
+    # pixels wide)
+    self.renderRects = [pygame.Rect(self.x - 2, self.yTop - 2, (52*KEYBOARD_WHITE_NOTE_WIDTH) + 5, (self.yBottom - self.yTop) + 5)]
     
 
 
@@ -79,7 +83,7 @@ class PianoRoll(widget.Widget) :
   def render(self) :
     """
     Draws the pianoroll on screen.
-    This function is called every time the app renders a new frame.
+    This function is called every time the widget needs to be redrawn.
     """
 
     # Disable rendering if the staffscope has something to show
@@ -97,6 +101,30 @@ class PianoRoll(widget.Widget) :
 
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD: PianoRoll.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
+    """
+
+    if (WIDGET_ID_STAFFSCOPE in self.top.widgets) :
+      if not(self.top.widgets[WIDGET_ID_STAFFSCOPE].isViewEmpty()) :
+        return (False,)
+
+    scoreObj = self.top.widgets[WIDGET_ID_SCORE]
+    return (
+      True,
+      scoreObj.getCursor(),
+      scoreObj.activeHands,
+      scoreObj.editCount,
+      tuple(N.highlight for N in scoreObj.getTeacherNotes()),
+      tuple(self.activePitches)
+    )
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD PianoRoll._renderKeyLines()                                [PRIVATE]
   # ---------------------------------------------------------------------------
@@ -205,29 +233,35 @@ class PianoRoll(widget.Widget) :
     # List the notes that intersect the current window
     self.notesInWindow = []
 
-    for notesAtCursor in self.top.widgets[WIDGET_ID_SCORE].notesByCursor_pressed[cursor:] :
+    # Candidates: the teacher notes at the current cursor (i.e. including the 
+    # ones pressed earlier and still held, with their 'sustained'/'inactive' 
+    # attributes) then the notes pressed afterwards.
+    candidates = self.top.widgets[WIDGET_ID_SCORE].getTeacherNotes()
+    for notesAtCursor in self.top.widgets[WIDGET_ID_SCORE].notesByCursor_pressed[(cursor+1):] :
       
       # Don't bother analysing past the visible window 
       # (note are sorted with ascending timecodes)
       if (notesAtCursor[0].startTime > winEnd) :
         break
-      
-      for N in notesAtCursor :
 
-        # Shorcuts
-        noteStart = N.startTime 
-        noteEnd   = N.stopTime
+      candidates += notesAtCursor
       
-        # Ignore notes with 0-duration
-        if (noteEnd == noteStart) : 
-          continue
-
-        # Does the note span intersect the current view window?
-        if (
-          ((noteStart >= winStart)  and (noteStart < winEnd)) or    # The note starts in the window
-          ((noteEnd >= winStart)    and (noteEnd < winEnd))   or    # The note ends in the window
-          ((noteStart <= winStart)  and (noteEnd >= winEnd))        # The note starts before the window and ends after the window
-        ) : self.notesInWindow.append(N)
+    for N in candidates :
+
+      # Shorcuts
+      noteStart = N.startTime 
+      noteEnd   = N.stopTime
+    
+      # Ignore notes with 0-duration
+      if (noteEnd == noteStart) : 
+        continue
+
+      # Does the note span intersect the current view window?
+      if (
+        ((noteStart >= winStart)  and (noteStart < winEnd)) or    # The note starts in the window
+        ((noteEnd >= winStart)    and (noteEnd < winEnd))   or    # The note ends in the window
+        ((noteStart <= winStart)  and (noteEnd >= winEnd))        # The note starts before the window and ends after the window
+      ) : self.notesInWindow.append(N)
 
 
     # Sort the notes to display them in a given order.
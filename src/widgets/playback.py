@@ -18,9 +18,9 @@
 from src.commons import *
 import src.widgets.widget as widget
 import src.text as text
+import src.voiceManager as voiceManager
 
 # Standard libraries
-import mido
 import pygame
 
 
@@ -40,7 +40,9 @@ class Playback(widget.Widget) :
   """
   PLAYBACK object
   
-  Description is TODO.
+  Plays the notes of the cursor on the MIDI output (toggled with P).
+  Each note is released after its duration in the score: the note on/off 
+  are scheduled by a voice manager (see 'voiceManager.py')
   """
 
   def __init__(self, top) :
@@ -51,7 +53,10 @@ class Playback(widget.Widget) :
     self.name = "playback"
 
     self.enable = False
-    self._midiOutActiveNotes = []   # pitches currently held on MIDI out
+    self.voices = voiceManager.VoiceManager(self._send)
+
+    # Area of the screen drawn by the widget
+    self.renderRects = [pygame.Rect(200, 470, 12, 14)]
     
 
 
@@ -60,11 +65,10 @@ class Playback(widget.Widget) :
   # ---------------------------------------------------------------------------
   def play(self) -> None :
     """
-    Updates MIDI out to reflect the notes at the current cursor.
+    Plays the notes starting at the current cursor on MIDI out.
 
-    - Notes that just appeared  -> note_on
+    - Notes that just appeared  -> note_on, note_off after their duration
     - Notes that are sustained  -> keep sounding (no action)
-    - Notes that disappeared    -> note_off
     """
 
     if not(self.enable) :
@@ -74,26 +78,18 @@ class Playback(widget.Widget) :
       return
 
 
-    # Close everything before playing the new cursor
-    for pitch in self._midiOutActiveNotes :
-      self.top._onMidiOutputCallback(mido.Message("note_off", note = pitch, velocity = 0))
-    self._midiOutActiveNotes = []
-
     # Request the current notes
-    notes = self.top.widgets[WIDGET_ID_SCORE].getTeacherNotes()
+    S = self.top.widgets[WIDGET_ID_SCORE]
+    notes = S.getTeacherNotes()
 
     for N in notes :
       if not(N.sustained) :
         
         velocity = N.velocity if (N.velocity > 0) else 80
+        duration = S.tempoMap.toSeconds(N.stopTime) - S.tempoMap.toSeconds(N.startTime)
+        duration = min(max(duration, PLAYBACK_NOTE_DURATION_MIN_SEC), PLAYBACK_NOTE_DURATION_MAX_SEC)
 
-        self.top._onMidiOutputCallback(mido.Message("note_on",  note = N.pitch, velocity = velocity))
-        self._midiOutActiveNotes.append(N.pitch)
-
-
-    # TODO
-    # Add a timer to clear the active notes after a while or as soon as the user
-    # plays anything.
+        self.voices.noteOn(N.pitch, velocity, duration)
 
 
 
@@ -103,12 +99,10 @@ class Playback(widget.Widget) :
   def close(self) -> None :
     """
     Terminates all notes on the MIDI output interface properly.
+    Must be called before closing the MIDI output.
     """
     
-    if (self.top.midiOutPort is None) :
-      return
-    
-    self.closeOpenNotes()
+    self.voices.stop()
 
 
 
@@ -117,14 +111,26 @@ class Playback(widget.Widget) :
   # ---------------------------------------------------------------------------
   def closeOpenNotes(self) :
     """
-    Send a note off event to all the notes stored in the midiOutActiveNotes
-    array.
+    Releases all the notes currently playing.
+    The note offs are sent by the voice manager (not from the caller).
     """
     
-    for pitch in self._midiOutActiveNotes :
-      self.top.midiOutPort.send(mido.Message("note_off", note = pitch, velocity = 0))
+    self.voices.releaseAll()
+
 
-    self._midiOutActiveNotes = []
+
+  # ---------------------------------------------------------------------------
+  # METHOD Playback._send()                                           [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _send(self, midiMessage) -> None :
+    """
+    Sends a MIDI message of the voice manager.
+
+    NOTE: runs in the thread of the voice manager.
+    """
+
+    if (self.top.midiOutPort is not None) :
+      self.top._onMidiOutputCallback(midiMessage)
 
 
 
@@ -161,6 +167,18 @@ class Playback(widget.Widget) :
 
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD: Playback.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
+    """
+
+    return (self.enable,)
+
+
+
 # =============================================================================
 # UNIT TESTS
 # =============================================================================
@@ -57,6 +57,9 @@ class ProgressBar(widget.Widget) :
     
     self.enabled = False
 
+    # Area of the screen drawn by the widget
+    self.renderRects = [pygame.Rect(950, 470, 300, 14)]
+
   
   
   # ---------------------------------------------------------------------------
@@ -70,6 +73,20 @@ class ProgressBar(widget.Widget) :
     if self.enabled :
       text.render(self.top.screen, f"BPM:{self.bpm} - {self.num}/{self.denom} - {self.counter}", (950, 470), 2, GUI_TEXT_COLOR)
   
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: ProgressBar.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
+    """
+
+    if self.enabled :
+      return (self.enabled, self.bpm, self.num, self.denom, self.counter)
+    else :
+      return (self.enabled,)
     
 
 
@@ -17,6 +17,8 @@
 # Project libraries
 from src.commons import *
 import src.widgets.widget as widget
+import src.autoplay as autoplay
+import src.text as text
 import arbiter
 
 # Standard libraries
@@ -45,8 +47,11 @@ class Sequencer(widget.Widget) :
   It can be determined by:
   - the user (scrolling)
   - the MIDI keyboard inputs (if approved by the Arbiter)
-  - the inner clock (for playback)
+  - the inner clock (autoplay, see 'autoplay.py')
   - the 'note search' feature
+  - the 'passage search' feature: a sequence of chords is played on the 
+    keyboard and searched in the score (see 'Score.searchPassage()').
+    The results can be browsed one after the other.
   """
 
   def __init__(self, top) :
@@ -58,6 +63,20 @@ class Sequencer(widget.Widget) :
 
     # Internal attributes (not much yet)
     self.isAutoPlaying = False      # True when the sequencer plays the notes automatically
+    self.autoPlayer = autoplay.AutoPlayer(self._autoPlaySend)
+    self.autoPlayCursor = -1        # Cursor last set by the autoplay
+
+    # Passage search
+    self.searchCapture        = False   # True while the query chords are being played
+    self.searchQuery          = []      # Chords of the query (list of lists of MIDI codes)
+    self.searchHeld           = set()   # Notes currently held during the capture
+    self.searchChord          = set()   # Notes of the chord being captured
+    self.searchTranspose      = SEARCH_PASSAGE_TRANSPOSE
+    self.searchResults        = []      # Output of 'Score.searchPassage()'
+    self.searchResultIndex    = -1
+
+    # Area of the screen drawn by the widget (status line)
+    self.renderRects = [pygame.Rect(700, 18, 300, 18)]
 
 
 
@@ -98,9 +117,16 @@ class Sequencer(widget.Widget) :
         elif (key == pygame.K_UP) :
           self.top.widgets[WIDGET_ID_SCORE].cursorGotoNearestBookmark(direction = 1)
 
+        # SPACE: start/stop the autoplay
         elif (key == pygame.K_SPACE) :
-          self.isAutoPlaying = not(self.isAutoPlaying)
-          print("Autoplay")
+          if self.isAutoPlaying :
+            self.autoPlayStop()
+          else :
+            self.autoPlayStart()
+
+        # N: jump to the next result of the passage search
+        elif (key == pygame.K_n) :
+          self.searchCycle(1)
 
 
 
@@ -115,6 +141,36 @@ class Sequencer(widget.Widget) :
         elif (key == pygame.K_RIGHT) :
           self.top.widgets[WIDGET_ID_SCORE].cursorStep(10)
 
+        # CTRL + N: jump to the previous result of the passage search
+        elif (key == pygame.K_n) :
+          self.searchCycle(-1)
+
+      # Shift-modified keypress
+      elif (modifier == "shift") :
+
+        # SHIFT + UP: autoplay faster
+        if (key == pygame.K_UP) :
+          self.autoPlaySetTempoScale(self.autoPlayer.tempoScale + AUTOPLAY_TEMPO_SCALE_STEP)
+
+        # SHIFT + DOWN: autoplay slower
+        elif (key == pygame.K_DOWN) :
+          self.autoPlaySetTempoScale(self.autoPlayer.tempoScale - AUTOPLAY_TEMPO_SCALE_STEP)
+
+        # SHIFT + F: start/stop the capture of a passage to search
+        elif (key == pygame.K_f) :
+          if self.searchCapture :
+            self.searchStop()
+          else :
+            self.searchStart()
+
+      # Alt-modified keypress
+      elif (modifier == "alt") :
+
+        # ALT + F: toggle the transposition invariance in the passage search
+        if (key == pygame.K_f) :
+          self.searchTranspose = not(self.searchTranspose)
+          print(f"[INFO] Passage search: transposition invariance {'ON' if self.searchTranspose else 'OFF'}")
+
 
 
   # ---------------------------------------------------------------------------
@@ -152,6 +208,11 @@ class Sequencer(widget.Widget) :
     Updates the Sequencer machinery in case of an external MIDI input.
     """
 
+    # The notes played during the capture of a passage are not arbitrated
+    if self.searchCapture :
+      self._searchCaptureEvent(midiMessage)
+      return
+
     (decision, step) = self.top.widgets[WIDGET_ID_ARBITER].eval()
 
     if (arbiter.arbiterStatus.VALID_INPUT in decision) :
@@ -164,7 +225,250 @@ class Sequencer(widget.Widget) :
 
     elif (arbiter.arbiterStatus.EXCESS_NOTE in decision) :
       self.top.widgets[WIDGET_ID_STATS].logWrongNote()
-      
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.autoPlayStart()
+  # ---------------------------------------------------------------------------
+  def autoPlayStart(self) -> None :
+    """
+    Starts playing the score from the current cursor.
+    """
+
+    S = self.top.widgets[WIDGET_ID_SCORE]
+    self.top.widgets[WIDGET_ID_PLAYBACK].closeOpenNotes()
+
+    if not(self.autoPlayer.start(S, S.getCursor())) :
+      return
+
+    self.isAutoPlaying = True
+    self.autoPlayCursor = S.getCursor()
+    print(f"[INFO] Autoplay started at cursor = {self.autoPlayCursor} (tempo x{self.autoPlayer.tempoScale:.2f})")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.autoPlayStop()
+  # ---------------------------------------------------------------------------
+  def autoPlayStop(self) -> None :
+    """
+    Stops the autoplay.
+    """
+
+    if not(self.isAutoPlaying) :
+      return
+
+    self.autoPlayer.stop()
+    self.isAutoPlaying = False
+
+    counters = self.autoPlayer.getCounters()
+    print(f"[INFO] Autoplay stopped: {counters['events']} events, scheduling jitter {1e6*counters['jitterMean']:.0f} us (average), {1e6*counters['jitterMax']:.0f} us (max)")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.autoPlaySetTempoScale()
+  # ---------------------------------------------------------------------------
+  def autoPlaySetTempoScale(self, scale: float) -> None :
+    """
+    Sets the tempo scaling factor of the autoplay (1.0: tempo of the score)
+    """
+
+    self.autoPlayer.setTempoScale(round(scale, 2))
+    print(f"[INFO] Autoplay tempo: x{self.autoPlayer.tempoScale:.2f}")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.autoPlayUpdate()
+  # ---------------------------------------------------------------------------
+  def autoPlayUpdate(self) -> None :
+    """
+    Moves the cursor to the location reached by the autoplay.
+    Must be called at each frame by the main loop.
+
+    If the cursor was moved by something else in the meantime (user, MIDI 
+    input), the autoplay starts again from there.
+    """
+
+    if not(self.isAutoPlaying) :
+      return
+
+    S = self.top.widgets[WIDGET_ID_SCORE]
+    if (S.getCursor() != self.autoPlayCursor) :
+      self.autoPlayer.start(S, S.getCursor())
+      self.autoPlayCursor = S.getCursor()
+      return
+
+    cursor = self.autoPlayer.cursor
+    if (cursor != self.autoPlayCursor) :
+      S.cursorGoto(cursor, force = True)
+      self.autoPlayCursor = S.getCursor()
+
+    if self.autoPlayer.finished :
+      self.autoPlayStop()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer._autoPlaySend()                                 [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _autoPlaySend(self, midiMessage) -> None :
+    """
+    Sends a MIDI message of the autoplay.
+
+    NOTE: runs in the timer thread of the autoplay.
+    """
+
+    if (self.top.midiOutPort is not None) :
+      self.top._onMidiOutputCallback(midiMessage)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.searchStart()
+  # ---------------------------------------------------------------------------
+  def searchStart(self) -> None :
+    """
+    Starts the capture of a passage to search in the score.
+    The chords played on the keyboard are recorded until 'Sequencer.searchStop()'
+    is called.
+    """
+
+    self.searchCapture = True
+    self.searchQuery = []
+    self.searchHeld = set()
+    self.searchChord = set()
+    print("[INFO] Passage search: play the passage then press SHIFT+F again.")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.searchStop()
+  # ---------------------------------------------------------------------------
+  def searchStop(self) -> None :
+    """
+    Ends the capture of the passage, runs the search and jumps to the best
+    result.
+    """
+
+    self.searchCapture = False
+
+    # A chord still held is part of the query
+    if self.searchChord :
+      self.searchQuery.append(sorted(self.searchChord))
+      self.searchChord = set()
+
+    if not(self.searchQuery) :
+      print("[INFO] Passage search: nothing was played, search cancelled.")
+      return
+
+    self.searchResults = self.top.widgets[WIDGET_ID_SCORE].searchPassage(
+      self.searchQuery,
+      transpose = self.searchTranspose,
+      tolerance = SEARCH_PASSAGE_TOLERANCE
+    )
+    self.searchResultIndex = -1
+
+    print(f"[INFO] Passage search: {len(self.searchQuery)} chords, {len(self.searchResults)} results")
+    if self.searchResults :
+      self.searchCycle(1)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.searchCycle()
+  # ---------------------------------------------------------------------------
+  def searchCycle(self, direction = 1) -> None :
+    """
+    Jumps to the next (direction = 1) or previous (direction = -1) result of 
+    the passage search.
+    Results are browsed by order of relevance.
+    """
+
+    if not(self.searchResults) :
+      return
+    
+    self.searchResultIndex = (self.searchResultIndex + direction) % len(self.searchResults)
+    (cursor, cost, transposition) = self.searchResults[self.searchResultIndex]
+    self.top.widgets[WIDGET_ID_SCORE].cursorGoto(cursor)
+    print(f"[INFO] Passage search: result {self.searchResultIndex+1}/{len(self.searchResults)} at cursor = {cursor} (errors: {cost}, transposition: {transposition:+d})")
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer._searchCaptureEvent()                           [PRIVATE]
+  # ---------------------------------------------------------------------------
+  def _searchCaptureEvent(self, midiMessage) -> None :
+    """
+    Records the MIDI input during the capture of a passage.
+    A chord is made of all the notes pressed until they are all released.
+    """
+
+    if ((midiMessage.type == "note_on") and (midiMessage.velocity > 0)) :
+      self.searchHeld.add(midiMessage.note)
+      self.searchChord.add(midiMessage.note)
+
+    elif (midiMessage.type in ["note_on", "note_off"]) :
+      self.searchHeld.discard(midiMessage.note)
+      if (not(self.searchHeld) and self.searchChord) :
+        self.searchQuery.append(sorted(self.searchChord))
+        self.searchChord = set()
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.render()
+  # ---------------------------------------------------------------------------
+  def render(self) -> None :
+    """
+    Renders the status of the passage search and of the autoplay.
+    """
+
+    if self.searchCapture :
+      text.render(self.top.screen, f"FIND: {len(self.searchQuery)} CHORDS", (700, 20), 2, GUI_TEXT_COLOR)
+    elif (self.searchResultIndex >= 0) :
+      text.render(self.top.screen, f"FIND {self.searchResultIndex+1}/{len(self.searchResults)}", (700, 20), 2, GUI_TEXT_COLOR)
+    elif self.isAutoPlaying :
+      text.render(self.top.screen, f"AUTOPLAY X{self.autoPlayer.tempoScale:.2f}", (700, 20), 2, GUI_TEXT_COLOR)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.getUpdateDelay()
+  # ---------------------------------------------------------------------------
+  def getUpdateDelay(self) :
+    """
+    Returns the time (seconds) after which the widget needs the next frame 
+    (see 'Widget.getUpdateDelay()'): the cursor follows the autoplay at full 
+    frame rate.
+    """
+
+    if self.isAutoPlaying :
+      return 0
+
+    return None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Sequencer.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
+    """
+
+    return (
+      self.searchCapture, 
+      len(self.searchQuery), 
+      self.searchResultIndex, 
+      len(self.searchResults), 
+      self.isAutoPlaying, 
+      self.autoPlayer.tempoScale
+    )
+
 
 
 
@@ -94,6 +94,9 @@ class StaffScope(widget.Widget) :
 
     self.cursorWrongNoteCount = []
 
+    # Area of the screen drawn by the widget (snapshot, playglows and visual cues)
+    self.renderRects = [pygame.Rect(0, 40, GUI_SCREEN_WIDTH, TARGET_HEIGHT + 30)]
+
 
 
   # ---------------------------------------------------------------------------
@@ -329,29 +332,58 @@ class StaffScope(widget.Widget) :
     
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD StaffScope.update()
+  # ---------------------------------------------------------------------------
+  def update(self) -> None :
+    """
+    Loads the staff and the playglows of the current Score cursor.
+    This function is called at every frame of the top level application.
+    """
+
+    scoreCursor = self.top.widgets[WIDGET_ID_SCORE].getCursor()
+    self.loadImageByCursor(scoreCursor)
+    self.loadPlayGlowsByCursor(scoreCursor)
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD StaffScope.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen (see 'Widget.getRenderKey()')
+    """
+
+    return (
+      self._dbIndex,
+      self._dbCursor,
+      self.rulersVisible,
+      id(self.cursorWrongNoteCount),
+      tuple((p.toTuple(), p.hand, p.active) for p in self.playGlows)
+    )
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD StaffScope.render()
   # ---------------------------------------------------------------------------
   def render(self) :
     """
     Renders the staff and the playglows on screen.
-    This function is called at every frame of the top level application.
+    This function is called every time the widget needs to be redrawn.
     
     A staff must have been loaded prior to calling this function 
-    ('StaffScope.loadViewByIndex()' or 'StaffScope.loadImageByCursor()')
+    ('StaffScope.update()', 'StaffScope.loadViewByIndex()' or 
+    'StaffScope.loadImageByCursor()')
 
     When the 'ghost mode' is ON, all the playglows of the snapshot are rendered.
     A color scheme helps distinguish the active/inactive playglows.
     """
     
-    # Ask the current cursor from the Score object
-    scoreCursor = self.top.widgets[WIDGET_ID_SCORE].getCursor()
-
     # -------------------------------
     # Render the score image snapshot
     # -------------------------------
-    self.loadImageByCursor(scoreCursor)
-
     # TODO: use a proper function for that
     if (self.imgScaled != None) : self.top.screen.blit(self.imgScaled, (self.imgCoordX, self.imgCoordY))
     
@@ -371,7 +403,6 @@ class StaffScope(widget.Widget) :
     # --------------------
     # Render the playGlows
     # --------------------
-    self.loadPlayGlowsByCursor(scoreCursor)
     transparent_surface = pygame.Surface((self.top.screenWidth, self.top.screenHeight), pygame.SRCALPHA)
     transparent_surface.fill((0, 0, 0, 0))  # Completely transparent
     
@@ -64,6 +64,9 @@ class Stats(widget.Widget) :
    
     self.name = "stats"
 
+    # Nothing to draw
+    self.renderRects = []
+
     self.logName = ""
     self.logFile = ""
     self.mdName = ""                # Name of the report file (Markdown) e.g. "my_song.md"
@@ -94,6 +97,8 @@ class Stats(widget.Widget) :
     self.playedNotes = 0            # Total number of correct notes played, regardless of the arbiter's decision
     self.playedNotesValid = 0       # Total number of correct notes played i.e. valid keyboard input that incremented the cursor
 
+    self.inputLatencyLog = []       # Latency of the MIDI input for each session (see 'latency.py')
+
     self.intervalStartTime = -1         # | Deprecated feature
     self.intervalStartTimecode = -1     # | 
     self.intervalTimerTicking = False   # | 
@@ -175,7 +180,8 @@ class Stats(widget.Widget) :
       "cursorHistogram"             : {},
       "cursorWrongNoteCount"        : {},
       "playedNotes"                 : 0,
-      "playedNotesValid"            : 0
+      "playedNotesValid"            : 0,
+      "inputLatencyLog"             : []
     }
 
     for field in fieldsRef :
@@ -200,6 +206,7 @@ class Stats(widget.Widget) :
     self.cursorWrongNoteCount       = fieldsRef["cursorWrongNoteCount"]
     self.playedNotes                = fieldsRef["playedNotes"]
     self.playedNotesValid           = fieldsRef["playedNotesValid"]
+    self.inputLatencyLog            = fieldsRef["inputLatencyLog"]
 
 
 
@@ -409,6 +416,7 @@ class Stats(widget.Widget) :
       self.sessionCount               += 0                               # Already incremented at startup
       self.sessionLog                 += [self.generateSessionLog()]
       self.totalPracticeTime_sec      += sessionDuration_sec
+      self.inputLatencyLog            += [{"session": self.sessionCount} | self.top.latency.getSummary()]
       
       exportDict = {}
       exportDict["logName"]                     = self.logName
@@ -422,6 +430,7 @@ class Stats(widget.Widget) :
       exportDict["comboHighestAllTime"]         = self.comboHighestAllTime
       exportDict["playedNotes"]                 = self.playedNotes
       exportDict["playedNotesValid"]            = self.playedNotesValid
+      exportDict["inputLatencyLog"]             = self.inputLatencyLog
       
       with open(self.logFile, "w") as jsonFile :
         json.dump(exportDict, jsonFile, indent = 2)
@@ -14,7 +14,10 @@
 # =============================================================================
 # EXTERNALS
 # =============================================================================
-import mido
+# Project libraries
+import src.smfParser as smfParser
+
+# Standard libraries
 import tkinter as tk
 from tkinter import ttk
 
@@ -74,7 +77,9 @@ class TrackSelectionGUI :
     self.midiFile = midiFile
 
     # Read content of the MIDI file
-    midiObj = mido.MidiFile(midiFile)
+    # NOTE: the parsed file is kept in memory, the import in the Score that
+    # follows the track selection will not read it again.
+    midiObj = smfParser.load(midiFile)
     self.nTracks = len(midiObj.tracks)
     self.tracks = [Track() for _ in range(self.nTracks)]
 
@@ -90,15 +95,9 @@ class TrackSelectionGUI :
       else :
         trackName = "'" + trackName + "'"
 
-      # Count the notes in the track
-      noteCount = 0
-      for msg in track :
-        if ((msg.type == 'note_on') and (msg.velocity > 0)) :
-          noteCount += 1
-
       # Assign to the Track
       self.tracks[i].name = trackName
-      self.tracks[i].noteCount = noteCount
+      self.tracks[i].noteCount = track.noteCount
       self.tracks[i].panning = ""
 
       if ASSIGN_DEFAULT :
@@ -32,6 +32,20 @@ class Widget :
   The widget class contains pure functions that need to be overriden:
   - 'render': draws the widget's content on the screen
   - 'uiEvent': defines how the widget reacts to user inputs (click, keypress)
+  - 'update': periodic tasks of the widget (no drawing)
+  - 'getRenderKey': state of the widget shown on screen (see below)
+  - 'getUpdateDelay': when the widget needs the next frame (see below)
+
+  The app only redraws the areas of the screen that changed:
+  - 'renderRects' lists the areas the widget draws in (whole screen by 
+    default, empty if the widget draws nothing)
+  - 'getRenderKey' returns everything 'render' depends on (as a hashable 
+    value). The areas of the widget are redrawn when the key changes.
+    The default key (None) redraws the widget at every frame.
+
+  When nothing happens, the app slows down to a low frame rate (see 
+  'frameScheduler.py'). A widget that animates, or that has something to do 
+  at a given time, tells it with 'getUpdateDelay'.
 
   This widget class itself does not do anything.
   Widgets implemented in the gangQin app suite (gangQin player, gangQin capture
@@ -52,6 +66,10 @@ class Widget :
     # GUI interactions
     self.keyboardCtrlKey = False
 
+    # Areas of the screen the widget draws in (see 'Widget.getDirtyRects()')
+    self.renderRects = [pygame.Rect(0, 0, GUI_SCREEN_WIDTH, GUI_SCREEN_HEIGHT)]
+    self._renderKey = None
+
 
 
   # ---------------------------------------------------------------------------
@@ -119,6 +137,75 @@ class Widget :
     
 
 
+  # ---------------------------------------------------------------------------
+  # METHOD: Widget.update()
+  # ---------------------------------------------------------------------------
+  def update(self) -> None :
+    """
+    Runs the periodic tasks of the widget.
+    This function is called at every frame of the top level application, 
+    before rendering. It must not draw anything: 'render' is only called 
+    when the widget needs to be redrawn.
+
+    Override with the specific code of the widget.
+    """
+
+    pass
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Widget.getUpdateDelay()
+  # ---------------------------------------------------------------------------
+  def getUpdateDelay(self) :
+    """
+    Returns the time (seconds) after which the widget needs the next frame, 
+    even if nothing happens in the meantime (no user input):
+    - 0: the widget is animating, the app runs at full frame rate
+    - None (default): nothing planned, the idle frame rate is fine
+
+    Override with the specific code of the widget.
+    """
+
+    return None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Widget.getRenderKey()
+  # ---------------------------------------------------------------------------
+  def getRenderKey(self) :
+    """
+    Returns the state of the widget shown on screen, as a hashable value 
+    (usually a tuple).
+    The widget is redrawn when the key changes.
+    
+    The default key (None) redraws the widget at every frame.
+    Override with the specific code of the widget.
+    """
+
+    return None
+
+
+
+  # ---------------------------------------------------------------------------
+  # METHOD: Widget.getDirtyRects()
+  # ---------------------------------------------------------------------------
+  def getDirtyRects(self) -> list :
+    """
+    Returns the areas of the screen the widget invalidated since the last call 
+    (list of pygame.Rect)
+    """
+
+    key = self.getRenderKey()
+    if ((key is None) or (key != self._renderKey)) :
+      self._renderKey = key
+      return self.renderRects
+
+    return []
+
+
+
   # ---------------------------------------------------------------------------
   # METHOD: Widget._onKeyEvent()                                      [PRIVATE]
   # ---------------------------------------------------------------------------